@@ -77,5 +77,462 @@ END $$;
 -- Enable RLS on friends table if not enabled
 ALTER TABLE public.friends ENABLE ROW LEVEL SECURITY;
 
+-- Keyset pagination indexes: (owner, created_at, id) lets paged listings seek
+-- straight to the cursor position instead of sorting the whole history.
+CREATE INDEX IF NOT EXISTS challenges_challenger_created_idx ON public.challenges(challenger_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS challenges_opponent_created_idx ON public.challenges(opponent_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS notifications_user_created_idx ON public.notifications(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS friends_user_created_idx ON public.friends(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS friends_friend_created_idx ON public.friends(friend_id, created_at DESC, id DESC);
+
+-- Notification retention: deletes read notifications that are older than
+-- max_age_days or beyond each user's newest keep_per_user read ones. Each
+-- call handles the next batch_size users in id order (one index range scan
+-- per user on notifications_read_user_created_idx) and saves where it got
+-- to in job_state, so a pass spans as many calls as it needs and resumes
+-- across runs. Returns 'more' until the pass is done; after that new passes
+-- start at most every pass_interval_seconds. An advisory lock keeps other
+-- workers out ('busy'). Unread notifications are never touched.
+CREATE INDEX IF NOT EXISTS notifications_read_user_created_idx
+    ON public.notifications(user_id, created_at DESC, id DESC) WHERE read;
+
+-- Progress of resumable background jobs (service role only)
+CREATE TABLE IF NOT EXISTS public.job_state (
+    job TEXT PRIMARY KEY,
+    cursor_id UUID,
+    pass_finished_at TIMESTAMPTZ
+);
+
+ALTER TABLE public.job_state ENABLE ROW LEVEL SECURITY;
+
+-- The batch-of-rows version took three arguments
+DROP FUNCTION IF EXISTS public.compact_notifications(INTEGER, INTEGER, INTEGER);
+
+CREATE OR REPLACE FUNCTION public.compact_notifications(
+    max_age_days INTEGER,
+    keep_per_user INTEGER,
+    batch_size INTEGER,
+    pass_interval_seconds INTEGER
+) RETURNS TABLE(deleted INTEGER, status TEXT)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_cutoff TIMESTAMPTZ := NOW() - make_interval(days => max_age_days);
+    v_cursor UUID;
+    v_finished TIMESTAMPTZ;
+    v_user UUID;
+    v_users INTEGER := 0;
+    v_deleted INTEGER := 0;
+    v_rows INTEGER;
+BEGIN
+    -- Released when this call's transaction ends
+    IF NOT pg_try_advisory_xact_lock(hashtext('compact_notifications')) THEN
+        RETURN QUERY SELECT 0, 'busy'::TEXT;
+        RETURN;
+    END IF;
+
+    INSERT INTO public.job_state (job) VALUES ('compact_notifications') ON CONFLICT (job) DO NOTHING;
+    SELECT s.cursor_id, s.pass_finished_at INTO v_cursor, v_finished
+    FROM public.job_state s WHERE s.job = 'compact_notifications';
+
+    IF v_cursor IS NULL AND v_finished > NOW() - make_interval(secs => pass_interval_seconds) THEN
+        RETURN QUERY SELECT 0, 'idle'::TEXT;
+        RETURN;
+    END IF;
+
+    FOR v_user IN
+        SELECT p.id FROM public.profiles p
+        WHERE v_cursor IS NULL OR p.id > v_cursor
+        ORDER BY p.id
+        LIMIT batch_size
+    LOOP
+        DELETE FROM public.notifications n
+        WHERE n.id IN (
+            (SELECT x.id FROM public.notifications x
+             WHERE x.user_id = v_user AND x.read
+             ORDER BY x.created_at DESC, x.id DESC
+             OFFSET keep_per_user)
+            UNION
+            (SELECT x.id FROM public.notifications x
+             WHERE x.user_id = v_user AND x.read AND x.created_at < v_cutoff)
+        );
+        GET DIAGNOSTICS v_rows = ROW_COUNT;
+        v_deleted := v_deleted + v_rows;
+        v_users := v_users + 1;
+        v_cursor := v_user;
+    END LOOP;
+
+    IF v_users < batch_size THEN
+        UPDATE public.job_state SET cursor_id = NULL, pass_finished_at = NOW()
+        WHERE job = 'compact_notifications';
+        RETURN QUERY SELECT v_deleted, 'done'::TEXT;
+    ELSE
+        UPDATE public.job_state SET cursor_id = v_cursor
+        WHERE job = 'compact_notifications';
+        RETURN QUERY SELECT v_deleted, 'more'::TEXT;
+    END IF;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.compact_notifications(INTEGER, INTEGER, INTEGER, INTEGER) FROM PUBLIC, anon, authenticated;
+
+-- Prefix search fallback (LIKE 'q%') and the username index's refresh of new sign-ups
+CREATE INDEX IF NOT EXISTS profiles_username_pattern_idx ON public.profiles(username text_pattern_ops);
+CREATE INDEX IF NOT EXISTS profiles_created_idx ON public.profiles(created_at);
+
+-- Check-ins: append-only log replacing the challenge_progress.daily_log array
+ALTER TABLE public.challenge_progress ADD COLUMN IF NOT EXISTS total_checkins INTEGER DEFAULT 0;
+
+-- challenge_progress keeps the aggregates; the trigger below updates them
+-- atomically as each check-in is inserted.
+CREATE TABLE IF NOT EXISTS public.checkins (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    -- Kept (unlinked) when a participant gives up, so their history survives
+    progress_id UUID REFERENCES public.challenge_progress(id) ON DELETE SET NULL,
+    challenge_id UUID NOT NULL REFERENCES public.challenges(id) ON DELETE CASCADE,
+    user_id UUID NOT NULL REFERENCES public.profiles(id) ON DELETE CASCADE,
+    day_number INTEGER NOT NULL,
+    completed BOOLEAN NOT NULL,
+    notes TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS checkins_progress_idx ON public.checkins(progress_id, created_at);
+CREATE INDEX IF NOT EXISTS checkins_user_created_idx ON public.checkins(user_id, created_at);
+
+ALTER TABLE public.checkins ENABLE ROW LEVEL SECURITY;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_policies WHERE tablename = 'checkins' AND policyname = 'Users can view own checkins') THEN
+        CREATE POLICY "Users can view own checkins" ON public.checkins
+            FOR SELECT USING (auth.uid() = user_id);
+    END IF;
+END $$;
+
+-- Backfill from daily_log (with the trigger off so aggregates aren't counted twice)
+DROP TRIGGER IF EXISTS checkins_apply ON public.checkins;
+
+INSERT INTO public.checkins (progress_id, challenge_id, user_id, day_number, completed, notes, created_at)
+SELECT p.id, p.challenge_id, p.user_id,
+       COALESCE((e->>'day')::int, n::int),
+       COALESCE((e->>'completed')::boolean, false),
+       e->>'notes',
+       COALESCE((e->>'date')::timestamptz, p.updated_at)
+FROM public.challenge_progress p,
+     jsonb_array_elements(COALESCE(p.daily_log, '[]'::jsonb)) WITH ORDINALITY AS t(e, n)
+WHERE NOT EXISTS (SELECT 1 FROM public.checkins c WHERE c.progress_id = p.id);
+
+UPDATE public.challenge_progress
+SET total_checkins = jsonb_array_length(COALESCE(daily_log, '[]'::jsonb))
+WHERE COALESCE(total_checkins, 0) = 0;
+
+-- Applies a check-in to its progress row (row-locked, so concurrent
+-- check-ins can't lose updates) and numbers it.
+CREATE OR REPLACE FUNCTION public.apply_checkin() RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    UPDATE public.challenge_progress
+    SET total_checkins = total_checkins + 1,
+        completed_days = completed_days + CASE WHEN NEW.completed THEN 1 ELSE 0 END,
+        completion_percentage = COALESCE(
+            (completed_days + CASE WHEN NEW.completed THEN 1 ELSE 0 END) * 100.0 / NULLIF(total_days, 0), 0
+        ),
+        last_checkin = NEW.created_at,
+        updated_at = NOW()
+    WHERE id = NEW.progress_id
+    RETURNING total_checkins INTO NEW.day_number;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Progress record % not found', NEW.progress_id USING ERRCODE = 'no_data_found';
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS checkins_apply ON public.checkins;
+CREATE TRIGGER checkins_apply
+    BEFORE INSERT ON public.checkins
+    FOR EACH ROW EXECUTE FUNCTION public.apply_checkin();
+
+-- Records a check-in in one round trip: validates the challenge, appends the
+-- check-in (the checkins_apply trigger updates the aggregates) and returns
+-- the new progress plus what the API needs to notify the opponent.
+CREATE OR REPLACE FUNCTION public.record_checkin(
+    p_challenge_id UUID,
+    p_user_id UUID,
+    p_completed BOOLEAN,
+    p_notes TEXT DEFAULT NULL
+) RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_challenge public.challenges%ROWTYPE;
+    v_progress_id UUID;
+    v_day_number INTEGER;
+    v_progress JSONB;
+    v_username TEXT;
+BEGIN
+    SELECT * INTO v_challenge FROM public.challenges WHERE id = p_challenge_id;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Challenge not found' USING ERRCODE = 'P0002';
+    END IF;
+    IF v_challenge.status <> 'active' THEN
+        RAISE EXCEPTION 'Challenge is not active' USING ERRCODE = 'P0001';
+    END IF;
+
+    SELECT id INTO v_progress_id
+    FROM public.challenge_progress
+    WHERE challenge_id = p_challenge_id AND user_id = p_user_id;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Progress record not found' USING ERRCODE = 'P0002';
+    END IF;
+
+    INSERT INTO public.checkins (progress_id, challenge_id, user_id, completed, notes)
+    VALUES (v_progress_id, p_challenge_id, p_user_id, p_completed, p_notes)
+    RETURNING day_number INTO v_day_number;
+
+    SELECT to_jsonb(p) INTO v_progress
+    FROM (
+        SELECT id, challenge_id, user_id, skill_name, completed_days, total_days,
+               completion_percentage, last_checkin, total_checkins
+        FROM public.challenge_progress
+        WHERE id = v_progress_id
+    ) p;
+
+    SELECT username INTO v_username FROM public.profiles WHERE id = p_user_id;
+
+    RETURN jsonb_build_object(
+        'progress', v_progress,
+        'day_number', v_day_number,
+        'opponent_id', CASE WHEN v_challenge.challenger_id = p_user_id
+                            THEN v_challenge.opponent_id ELSE v_challenge.challenger_id END,
+        'username', v_username
+    );
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.record_checkin(UUID, UUID, BOOLEAN, TEXT) FROM PUBLIC, anon, authenticated;
+
+-- daily_log is no longer written; drop it once the backfill is verified:
+-- ALTER TABLE public.challenge_progress DROP COLUMN daily_log;
+
+-- Challenge stats on profiles (leaderboard), maintained by complete_due_challenges
+ALTER TABLE public.profiles
+    ADD COLUMN IF NOT EXISTS total_draws INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS current_streak INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS best_streak INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS days_completed INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS days_total INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS stats_updated_at TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS profiles_stats_updated_idx ON public.profiles(stats_updated_at, id)
+    WHERE stats_updated_at IS NOT NULL;
+
+-- Challenge lifecycle, run in batches by jobs/challenge_lifecycle.py.
+CREATE INDEX IF NOT EXISTS challenges_pending_response_idx
+    ON public.challenges(response_deadline) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS challenges_active_deadline_idx
+    ON public.challenges(deadline) WHERE status = 'active';
+
+-- Expires up to batch_size pending challenges past their response deadline.
+CREATE OR REPLACE FUNCTION public.expire_pending_challenges(batch_size INTEGER)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    expired INTEGER;
+BEGIN
+    UPDATE public.challenges
+    SET status = 'expired', updated_at = NOW()
+    WHERE id IN (
+        SELECT id FROM public.challenges
+        WHERE status = 'pending' AND response_deadline < NOW()
+        ORDER BY response_deadline
+        LIMIT batch_size
+        FOR UPDATE SKIP LOCKED
+    );
+
+    GET DIAGNOSTICS expired = ROW_COUNT;
+    RETURN expired;
+END;
+$$;
+
+-- Completes up to batch_size active challenges past their deadline. The
+-- participant with more completed days wins (one who gave up has no progress
+-- row and loses); equal days is a draw with no winner. Both participants'
+-- stats (wins/losses/draws, win streaks, days completed out of days total)
+-- are updated in the same statement, in deadline order when one player has
+-- several challenges in the batch.
+CREATE OR REPLACE FUNCTION public.complete_due_challenges(batch_size INTEGER)
+RETURNS TABLE(challenge_id UUID, challenger_id UUID, opponent_id UUID, winner_id UUID)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+#variable_conflict use_column
+BEGIN
+    RETURN QUERY
+    WITH due AS (
+        SELECT c.id, c.challenger_id, c.opponent_id, c.deadline
+        FROM public.challenges c
+        WHERE c.status = 'active' AND c.deadline < NOW()
+        ORDER BY c.deadline
+        LIMIT batch_size
+        FOR UPDATE SKIP LOCKED
+    ), decided AS (
+        SELECT d.id, d.deadline,
+               cp.completed_days AS challenger_days,
+               op.completed_days AS opponent_days,
+               COALESCE(cp.total_days, op.total_days, 0) AS total_days,
+               CASE
+                   WHEN COALESCE(cp.completed_days, -1) > COALESCE(op.completed_days, -1) THEN d.challenger_id
+                   WHEN COALESCE(op.completed_days, -1) > COALESCE(cp.completed_days, -1) THEN d.opponent_id
+               END AS winner
+        FROM due d
+        LEFT JOIN public.challenge_progress cp ON cp.challenge_id = d.id AND cp.user_id = d.challenger_id
+        LEFT JOIN public.challenge_progress op ON op.challenge_id = d.id AND op.user_id = d.opponent_id
+    ), completed AS (
+        UPDATE public.challenges c
+        SET status = 'completed', winner_id = d.winner, updated_at = NOW()
+        FROM decided d
+        WHERE c.id = d.id
+        RETURNING c.id, c.challenger_id, c.opponent_id, c.winner_id
+    ), results AS (
+        SELECT x.user_id,
+               CASE
+                   WHEN c.winner_id IS NULL THEN 'draw'
+                   WHEN c.winner_id = x.user_id THEN 'win'
+                   ELSE 'loss'
+               END AS outcome,
+               COALESCE(x.days, 0) AS days,
+               d.total_days,
+               ROW_NUMBER() OVER (PARTITION BY x.user_id ORDER BY d.deadline, c.id) AS n
+        FROM completed c
+        JOIN decided d ON d.id = c.id
+        CROSS JOIN LATERAL (VALUES (c.challenger_id, d.challenger_days), (c.opponent_id, d.opponent_days)) AS x(user_id, days)
+    ), win_runs AS (
+        -- Consecutive wins share a run number; run 0 extends the current streak
+        SELECT r.user_id, r.n - ROW_NUMBER() OVER (PARTITION BY r.user_id ORDER BY r.n) AS run
+        FROM results r
+        WHERE r.outcome = 'win'
+    ), streaks AS (
+        SELECT w.user_id,
+               MAX(w.len) FILTER (WHERE w.run = 0) AS leading,
+               MAX(w.len) AS longest
+        FROM (SELECT user_id, run, COUNT(*) AS len FROM win_runs GROUP BY user_id, run) w
+        GROUP BY w.user_id
+    ), totals AS (
+        SELECT r.user_id,
+               COUNT(*) FILTER (WHERE r.outcome = 'win') AS wins,
+               COUNT(*) FILTER (WHERE r.outcome = 'loss') AS losses,
+               COUNT(*) FILTER (WHERE r.outcome = 'draw') AS draws,
+               SUM(r.days) AS days,
+               SUM(r.total_days) AS total_days,
+               COUNT(*) AS finished,
+               MAX(r.n) FILTER (WHERE r.outcome <> 'win') AS last_break
+        FROM results r
+        GROUP BY r.user_id
+    ), bumped AS (
+        UPDATE public.profiles p
+        SET total_wins = COALESCE(p.total_wins, 0) + t.wins,
+            total_losses = COALESCE(p.total_losses, 0) + t.losses,
+            total_draws = p.total_draws + t.draws,
+            days_completed = p.days_completed + t.days,
+            days_total = p.days_total + t.total_days,
+            current_streak = CASE
+                WHEN t.last_break IS NULL THEN p.current_streak + t.finished
+                ELSE t.finished - t.last_break
+            END,
+            best_streak = GREATEST(p.best_streak, p.current_streak + COALESCE(s.leading, 0), COALESCE(s.longest, 0)),
+            stats_updated_at = NOW()
+        FROM totals t
+        LEFT JOIN streaks s ON s.user_id = t.user_id
+        WHERE p.id = t.user_id
+        RETURNING p.id
+    )
+    SELECT c.id, c.challenger_id, c.opponent_id, c.winner_id FROM completed c;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.expire_pending_challenges(INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.complete_due_challenges(INTEGER) FROM PUBLIC, anon, authenticated;
+
+-- Backfill the stats from challenges completed so far
+WITH results AS (
+    SELECT x.user_id,
+           CASE
+               WHEN c.winner_id IS NULL THEN 'draw'
+               WHEN c.winner_id = x.user_id THEN 'win'
+               ELSE 'loss'
+           END AS outcome,
+           COALESCE(cp.completed_days, 0) AS days,
+           COALESCE((SELECT MAX(t.total_days) FROM public.challenge_progress t WHERE t.challenge_id = c.id), 0) AS total_days,
+           ROW_NUMBER() OVER (PARTITION BY x.user_id ORDER BY c.deadline, c.id) AS n
+    FROM public.challenges c
+    CROSS JOIN LATERAL (VALUES (c.challenger_id), (c.opponent_id)) AS x(user_id)
+    LEFT JOIN public.challenge_progress cp ON cp.challenge_id = c.id AND cp.user_id = x.user_id
+    WHERE c.status = 'completed'
+), runs AS (
+    SELECT w.user_id, COUNT(*) AS len, MAX(w.n) AS last_n
+    FROM (
+        SELECT r.user_id, r.n, r.n - ROW_NUMBER() OVER (PARTITION BY r.user_id ORDER BY r.n) AS run
+        FROM results r
+        WHERE r.outcome = 'win'
+    ) w
+    GROUP BY w.user_id, w.run
+), totals AS (
+    SELECT r.user_id,
+           COUNT(*) FILTER (WHERE r.outcome = 'win') AS wins,
+           COUNT(*) FILTER (WHERE r.outcome = 'loss') AS losses,
+           COUNT(*) FILTER (WHERE r.outcome = 'draw') AS draws,
+           SUM(r.days) AS days,
+           SUM(r.total_days) AS total_days,
+           MAX(r.n) AS finished
+    FROM results r
+    GROUP BY r.user_id
+)
+UPDATE public.profiles p
+SET total_wins = t.wins,
+    total_losses = t.losses,
+    total_draws = t.draws,
+    days_completed = t.days,
+    days_total = t.total_days,
+    current_streak = COALESCE((SELECT r.len FROM runs r WHERE r.user_id = t.user_id AND r.last_n = t.finished), 0),
+    best_streak = COALESCE((SELECT MAX(r.len) FROM runs r WHERE r.user_id = t.user_id), 0),
+    stats_updated_at = NOW()
+FROM totals t
+WHERE p.id = t.user_id;
+
+-- Completed check-ins per UTC day and skill for one user (activity heatmap);
+-- served by checkins_user_created_idx.
+CREATE OR REPLACE FUNCTION public.checkin_day_counts(p_user_id UUID, p_from DATE, p_to DATE)
+RETURNS TABLE(day DATE, skill_name TEXT, checkins INTEGER)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    SELECT (k.created_at AT TIME ZONE 'UTC')::date AS day,
+           CASE WHEN c.challenger_id = k.user_id THEN c.challenger_skill ELSE c.opponent_skill END AS skill_name,
+           COUNT(*)::integer AS checkins
+    FROM public.checkins k
+    JOIN public.challenges c ON c.id = k.challenge_id
+    WHERE k.user_id = p_user_id
+      AND k.completed
+      AND k.created_at >= p_from::timestamp AT TIME ZONE 'UTC'
+      AND k.created_at < (p_to + 1)::timestamp AT TIME ZONE 'UTC'
+    GROUP BY 1, 2;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.checkin_day_counts(UUID, DATE, DATE) FROM PUBLIC, anon, authenticated;
+
 -- Done!
 SELECT 'Migration complete!' as status;
@@ -0,0 +1 @@
+"""Round-trip and latency benchmarks for the API handlers."""
@@ -0,0 +1,92 @@
+"""
+Round trips and latency of GET /api/friends/activity for users with many friends.
+
+Runs the real `get_friends_activity` handler against the in-memory fake
+client, with a simulated per-round-trip latency to Supabase. "cold" is a
+cache miss, "warm" a repeat request served from the feed cache.
+
+    cd backend && python -m benchmarks.bench_friends_activity --latency-ms 20
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("SUPABASE_URL", "https://bench.supabase.co")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "bench")
+
+from benchmarks.fake_supabase import FakeSupabase  # noqa: E402
+from core.feed_cache import friends_feed_cache  # noqa: E402
+from routers import friends  # noqa: E402
+
+ME = "00000000-0000-0000-0000-000000000000"
+SKILLS_PER_FRIEND = 2
+
+
+def build_tables(n: int) -> dict:
+    me = {"id": ME, "username": "me", "display_name": "Me", "avatar_url": None}
+    friendships, progress = [], []
+    for i in range(1, n + 1):
+        uid = f"00000000-0000-0000-0000-{i:012d}"
+        friendships.append({
+            "id": f"f{i:06d}",
+            "user_id": ME,
+            "friend_id": uid,
+            "status": "accepted",
+            "user": me,
+            "friend": {"id": uid, "username": f"user{i}", "display_name": f"User {i}", "avatar_url": None},
+        })
+        for j in range(SKILLS_PER_FRIEND):
+            # One in four challenges has already ended
+            status = "completed" if (i + j) % 4 == 0 else "active"
+            progress.append({
+                "id": f"p{i:06d}{j}",
+                "user_id": uid,
+                "challenge_id": f"c{i:06d}{j}",
+                "skill_name": f"Skill {j}",
+                "completed_days": 5,
+                "total_days": 30,
+                "challenges": {"status": status},
+            })
+    return {"friends": friendships, "challenge_progress": progress}
+
+
+def run(n: int, latency: float) -> tuple:
+    tables = build_tables(n)
+    fake = FakeSupabase(tables, latency=latency)
+    friends.get_supabase = lambda: fake
+    friends_feed_cache.invalidate(ME)
+
+    started = time.perf_counter()
+    feed = asyncio.run(friends.get_friends_activity(user_id=ME))
+    cold_ms = (time.perf_counter() - started) * 1000
+    cold_trips = fake.round_trips
+
+    started = time.perf_counter()
+    asyncio.run(friends.get_friends_activity(user_id=ME))
+    warm_ms = (time.perf_counter() - started) * 1000
+
+    expected = sum(1 for p in tables["challenge_progress"] if p["challenges"]["status"] == "active")
+    assert len(feed) == expected
+    # Previous implementation: friends query + 1 progress query per friend
+    # + 1 challenge status lookup per progress row.
+    legacy_round_trips = 1 + n + n * SKILLS_PER_FRIEND
+    return cold_trips, cold_ms, warm_ms, legacy_round_trips, legacy_round_trips * latency * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500])
+    args = parser.parse_args()
+    latency = args.latency_ms / 1000
+
+    print(f"simulated latency per round trip: {args.latency_ms:.0f} ms")
+    print(f"{'friends':>8} {'round trips':>12} {'cold ms':>9} {'warm ms':>9} {'legacy trips':>13} {'legacy ms (est)':>16}")
+    for n in args.sizes:
+        trips, cold_ms, warm_ms, legacy_trips, legacy_ms = run(n, latency)
+        print(f"{n:>8} {trips:>12} {cold_ms:>9.1f} {warm_ms:>9.2f} {legacy_trips:>13} {legacy_ms:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Latency of leaderboard reads and updates at large player counts.
+
+Fills the in-memory leaderboard with synthetic player stats and times the
+operations GET /api/leaderboard and the lifecycle job use: the global top N,
+one player's rank, a friends-only board and applying a completed challenge.
+"full sort" is the per-request cost of ranking everyone from scratch, which
+is what serving the board from a table aggregation amounts to.
+
+    cd backend && python -m benchmarks.bench_leaderboard --players 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+
+os.environ.setdefault("SUPABASE_URL", "https://bench.supabase.co")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "bench")
+
+from core.leaderboard import Leaderboard, _key, _player  # noqa: E402
+
+FRIENDS = 200
+
+
+def random_row(rng: random.Random, i: int) -> dict:
+    finished = rng.randint(1, 40)
+    wins = rng.randint(0, finished)
+    draws = rng.randint(0, finished - wins)
+    days_total = finished * 30
+    return {
+        "id": f"u{i}",
+        "total_wins": wins,
+        "total_losses": finished - wins - draws,
+        "total_draws": draws,
+        "current_streak": rng.randint(0, wins),
+        "best_streak": wins,
+        "days_completed": rng.randint(0, days_total),
+        "days_total": days_total,
+        "stats_updated_at": "2026-01-01T00:00:00+00:00",
+    }
+
+
+def percentiles(samples_ms: list) -> str:
+    samples_ms = sorted(samples_ms)
+    p99 = samples_ms[int(len(samples_ms) * 0.99) - 1]
+    return f"p50 {statistics.median(samples_ms):.4f} ms  p99 {p99:.4f} ms  max {samples_ms[-1]:.4f} ms"
+
+
+def timed(samples: list, fn, *args) -> None:
+    t = time.perf_counter()
+    fn(*args)
+    samples.append((time.perf_counter() - t) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--players", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    rows = [random_row(rng, i) for i in range(args.players)]
+    board = Leaderboard()
+    started = time.perf_counter()
+    board._load(rows)
+    board.ready = True
+    print(f"loaded {len(board)} players in {time.perf_counter() - started:.1f} s")
+
+    ids = [f"u{rng.randrange(args.players)}" for _ in range(args.queries)]
+
+    samples = []
+    for _ in ids:
+        timed(samples, board.top, 10)
+    print(f"top 10:         {percentiles(samples)}")
+
+    samples = []
+    for user_id in ids:
+        timed(samples, board.rank_of, user_id)
+    print(f"my rank:        {percentiles(samples)}")
+
+    samples = []
+    for _ in range(args.queries // 10):
+        timed(samples, board.ranked, [f"u{rng.randrange(args.players)}" for _ in range(FRIENDS)])
+    print(f"{FRIENDS} friends:    {percentiles(samples)}")
+
+    samples = []
+    for user_id in ids:
+        row = random_row(rng, int(user_id[1:]))
+        row["stats_updated_at"] = "2026-01-02T00:00:00+00:00"
+        timed(samples, board.update, row)
+    print(f"update:         {percentiles(samples)}")
+
+    players = [_player(row) for row in rows]
+    samples = []
+    for _ in range(5):
+        timed(samples, lambda: sorted(players, key=_key))
+    print(f"full sort:      {percentiles(samples)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Per-call setup overhead of an LLM request, before and after the client registry.
+
+"before" rebuilds the ChatOpenAI client, output parser and prompt template
+(including format instructions) on every call, like the old `_generate_plan`.
+"after" uses the shared client and the prebuilt prompt/parser. Both stop
+right before the network call, so only local CPU/setup cost is measured.
+
+    cd backend && python -m benchmarks.bench_llm_setup --iterations 200
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+os.environ.setdefault("SUPABASE_URL", "https://bench.supabase.co")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "bench")
+
+from langchain_core.output_parsers import PydanticOutputParser  # noqa: E402
+from langchain_core.prompts import ChatPromptTemplate  # noqa: E402
+from langchain_openai import ChatOpenAI  # noqa: E402
+
+from core import agent  # noqa: E402
+from core.llm import get_llm, init_llm_clients  # noqa: E402
+from core.prompts import LEARNING_PLAN_SYSTEM_PROMPT  # noqa: E402
+from schemas.learning_plan import LearningPlanResponse  # noqa: E402
+
+
+def per_call_setup():
+    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.3)
+    parser = PydanticOutputParser(pydantic_object=LearningPlanResponse)
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", LEARNING_PLAN_SYSTEM_PROMPT),
+            ("human", "Create the learning plan for this skill: {skill_name}"),
+        ]
+    ).partial(format_instructions=parser.get_format_instructions())
+    return llm, prompt.invoke({"skill_name": "Guitar"})
+
+
+def registry_setup():
+    return get_llm("plan"), agent._plan_prompt.invoke({"skill_name": "Guitar"})
+
+
+def measure(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    init_llm_clients()
+    per_call_setup()
+    registry_setup()
+
+    before = measure(per_call_setup, args.iterations)
+    after = measure(registry_setup, args.iterations)
+    print(f"per-call setup (before): {before:9.1f} us/call")
+    print(f"registry       (after):  {after:9.1f} us/call")
+    print(f"saved per call:          {before - after:9.1f} us ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Round trips and latency of GET /api/challenges for users with many challenges.
+
+Runs the real `get_my_challenges` handler against the in-memory fake client,
+with a simulated per-round-trip latency to Supabase. Loads the full history
+by following every cursor at the maximum page size, starting from a cold
+profile cache, so it does the same work as the legacy columns (the previous
+implementation loading the full history in one request).
+
+    cd backend && python -m benchmarks.bench_my_challenges --latency-ms 20
+"""
+import argparse
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("SUPABASE_URL", "https://bench.supabase.co")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "bench")
+
+from benchmarks.fake_supabase import FakeSupabase  # noqa: E402
+from core.loaders import ProfileLoader  # noqa: E402
+from core.pagination import MAX_PAGE_SIZE  # noqa: E402
+from core.profile_cache import profile_cache  # noqa: E402
+from routers import challenges  # noqa: E402
+
+ME = "00000000-0000-0000-0000-000000000000"
+
+
+def build_tables(n: int) -> dict:
+    now = datetime.now(timezone.utc)
+    opponents = [f"00000000-0000-0000-0000-{i:012d}" for i in range(1, min(n, 50) + 1)]
+    profiles = [
+        {"id": uid, "username": f"user{i}", "display_name": f"User {i}", "avatar_url": None}
+        for i, uid in enumerate([ME] + opponents)
+    ]
+
+    rows, progress = [], []
+    for i in range(n):
+        cid = f"00000000-0000-0000-0001-{i:012d}"
+        status = "pending" if i % 10 == 0 else "active"
+        rows.append({
+            "id": cid,
+            "challenger_id": ME,
+            "opponent_id": opponents[i % len(opponents)],
+            "challenger_skill": "Guitar",
+            "opponent_skill": "Juggling",
+            "deadline": (now + timedelta(days=30)).isoformat(),
+            "status": status,
+            # Every other pending challenge has already missed its response deadline
+            "response_deadline": (now + timedelta(days=-1 if i % 20 == 0 else 2)).isoformat(),
+            "winner_id": None,
+            "message": None,
+            "created_at": (now - timedelta(minutes=i)).isoformat(),
+        })
+        if status == "active":
+            for uid in (ME, opponents[i % len(opponents)]):
+                progress.append({
+                    "id": f"p{i:06d}{uid[-2:]}",
+                    "challenge_id": cid,
+                    "user_id": uid,
+                    "skill_name": "Guitar",
+                    "completed_days": 3,
+                    "total_days": 30,
+                    "completion_percentage": 10.0,
+                    "last_checkin": None,
+                })
+    return {"profiles": profiles, "challenges": rows, "challenge_progress": progress}
+
+
+def run(n: int, latency: float) -> tuple:
+    tables = build_tables(n)
+    now = datetime.now(timezone.utc)
+    expired = sum(1 for ch in tables["challenges"] if challenges._response_deadline_passed(ch, now))
+    fake = FakeSupabase(tables, latency=latency)
+    challenges.get_supabase = lambda: fake
+
+    # Profiles cached by an earlier size would hide the lookups
+    profile_cache.backend.clear()
+
+    started = time.perf_counter()
+    items, pages, cursor = [], 0, None
+    while True:
+        page = challenges.get_my_challenges(
+            status=None, cursor=cursor, limit=MAX_PAGE_SIZE, user_id=ME, loader=ProfileLoader(fake)
+        )
+        items.extend(page["items"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    assert len(items) == n
+    # Previous implementation: list query + 2 profile lookups and 1 progress
+    # query per challenge + 1 UPDATE per expired challenge.
+    legacy_round_trips = 1 + 3 * n + expired
+    return pages, fake.round_trips, elapsed_ms, legacy_round_trips, legacy_round_trips * latency * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+    latency = args.latency_ms / 1000
+
+    print(f"simulated latency per round trip: {args.latency_ms:.0f} ms")
+    print(f"{'challenges':>10} {'pages':>6} {'round trips':>12} {'latency ms':>11} {'legacy trips':>13} {'legacy ms (est)':>16}")
+    for n in args.sizes:
+        pages, trips, ms, legacy_trips, legacy_ms = run(n, latency)
+        print(f"{n:>10} {pages:>6} {trips:>12} {ms:>11.1f} {legacy_trips:>13} {legacy_ms:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Latency of GET /api/profiles/search (search-as-you-type) at large user counts.
+
+Fills the in-memory username index with synthetic users and times prefix
+lookups of 2-5 characters, then runs the real `search_profiles` handler
+(index lookup, profile hydration through the profile cache, friendship
+statuses) with no simulated network latency.
+
+    cd backend && python -m benchmarks.bench_username_search --users 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import time
+
+os.environ.setdefault("SUPABASE_URL", "https://bench.supabase.co")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "bench")
+
+from benchmarks.fake_supabase import FakeSupabase  # noqa: E402
+from core.loaders import ProfileLoader  # noqa: E402
+from core.profile_cache import profile_cache  # noqa: E402
+from core.username_index import username_index  # noqa: E402
+from routers import profiles  # noqa: E402
+
+ME = "me"
+
+
+def random_username(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_lowercase + string.digits + "_", k=rng.randint(4, 14)))
+
+
+def percentiles(samples_ms: list) -> str:
+    samples_ms = sorted(samples_ms)
+    p99 = samples_ms[int(len(samples_ms) * 0.99) - 1]
+    return f"p50 {statistics.median(samples_ms):.4f} ms  p99 {p99:.4f} ms  max {samples_ms[-1]:.4f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    started = time.perf_counter()
+    rows = {random_username(rng): f"u{i}" for i in range(args.users)}
+    username_index._load([(name, user_id) for name, user_id in rows.items()])
+    username_index.ready = True
+    print(f"indexed {len(username_index)} usernames in {time.perf_counter() - started:.1f} s")
+
+    prefixes = [random_username(rng)[:rng.randint(2, 5)] for _ in range(args.queries)]
+
+    samples = []
+    for prefix in prefixes:
+        t = time.perf_counter()
+        username_index.search(prefix, 10)
+        samples.append((time.perf_counter() - t) * 1000)
+    print(f"index lookup:   {percentiles(samples)}")
+
+    # Hydrate matches from the profile cache (warm), as in steady state
+    for prefix in prefixes:
+        for user_id in username_index.search(prefix, 10):
+            profile_cache.set({"id": user_id, "username": f"name-of-{user_id}", "display_name": None, "avatar_url": None})
+
+    fake = FakeSupabase({"friends": [], "profiles": []})
+    profiles.get_supabase = lambda: fake
+    samples = []
+    for prefix in prefixes:
+        profiles._search_cache.clear()
+        t = time.perf_counter()
+        profiles.search_profiles(q=prefix, limit=10, user_id=ME, loader=ProfileLoader(fake))
+        samples.append((time.perf_counter() - t) * 1000)
+    print(f"search handler: {percentiles(samples)}  (database round trips: {fake.round_trips})")
+
+
+if __name__ == "__main__":
+    main()
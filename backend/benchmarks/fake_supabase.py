@@ -0,0 +1,235 @@
+"""
+In-memory stand-in for the Supabase client used by the benchmarks.
+
+It implements just enough of the PostgREST query builder for the routers
+(select/insert/update/delete with eq, neq, in_, lt/gt, is_, not_, prefix
+like/ilike, order, limit) and counts every `execute()` as one network round trip,
+optionally sleeping `latency` seconds to simulate the hop to Supabase.
+
+`or_()` understands the `col.op.value` / `and(...)` expressions the routers
+build (eq, neq, lt, lte, gt, gte), which is enough for the ownership filters
+and keyset cursors to page through the data. Embedded resources
+(e.g. `user:user_id(...)`) are not resolved either; store them pre-joined on
+the rows. Dotted filters such as `eq("challenges.status", "active")` read
+from those embedded objects.
+"""
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+
+class FakeResult:
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+def _lookup(row: dict, column: str) -> Any:
+    value: Any = row
+    for part in column.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+_COMPARISONS = {
+    "eq": lambda v, x: str(v) == x,
+    "neq": lambda v, x: str(v) != x,
+    "lt": lambda v, x: v is not None and str(v) < x,
+    "lte": lambda v, x: v is not None and str(v) <= x,
+    "gt": lambda v, x: v is not None and str(v) > x,
+    "gte": lambda v, x: v is not None and str(v) >= x,
+}
+
+
+def _split_terms(expression: str) -> List[str]:
+    """Split a PostgREST logic expression on commas outside parentheses and quotes."""
+    terms, depth, quoted, current = [], 0, False, ""
+    for char in expression:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            terms.append(current)
+            current = ""
+            continue
+        current += char
+    terms.append(current)
+    return terms
+
+
+def _logic_check(expression: str, combine=any):
+    """Row predicate for an `or`/`and` filter expression."""
+    checks = []
+    for term in _split_terms(expression):
+        for keyword, nested in (("and(", all), ("or(", any)):
+            if term.startswith(keyword):
+                checks.append(_logic_check(term[len(keyword):-1], nested))
+                break
+        else:
+            column, op, value = term.split(".", 2)
+            compare = _COMPARISONS[op]
+            checks.append(lambda row, c=column, f=compare, x=value.strip('"'): f(_lookup(row, c), x))
+    return lambda row: combine(check(row) for check in checks)
+
+
+class _Query:
+    def __init__(self, client: "FakeSupabase", table: str):
+        self._client = client
+        self._table = table
+        self._op = "select"
+        self._payload: Any = None
+        self._filters: List[tuple] = []
+        self._row_filters: List[Any] = []
+        self._order: List[tuple] = []
+        self._limit: Optional[int] = None
+        self._single = False
+        self._count = None
+        self._head = None
+        self._negate_next = False
+
+    # Operations
+    def select(self, *_columns, count=None, head=None):
+        self._op = "select"
+        self._count = count
+        self._head = head
+        return self
+
+    def insert(self, payload):
+        self._op = "insert"
+        self._payload = payload
+        return self
+
+    def upsert(self, payload, **_kwargs):
+        self._op = "upsert"
+        self._payload = payload
+        return self
+
+    def update(self, payload):
+        self._op = "update"
+        self._payload = payload
+        return self
+
+    def delete(self):
+        self._op = "delete"
+        return self
+
+    # Filters
+    def _add_filter(self, column, check):
+        if self._negate_next:
+            self._negate_next = False
+            self._filters.append((column, lambda v: not check(v)))
+        else:
+            self._filters.append((column, check))
+        return self
+
+    @property
+    def not_(self):
+        self._negate_next = True
+        return self
+
+    def is_(self, column, value):
+        expected = {"null": None, "true": True, "false": False}.get(value, value)
+        return self._add_filter(column, lambda v: v is expected)
+
+    def eq(self, column, value):
+        return self._add_filter(column, lambda v, x=value: str(v) == str(x))
+
+    def neq(self, column, value):
+        return self._add_filter(column, lambda v, x=value: str(v) != str(x))
+
+    def in_(self, column, values):
+        wanted = {str(v) for v in values}
+        return self._add_filter(column, lambda v: str(v) in wanted)
+
+    def lt(self, column, value):
+        return self._add_filter(column, lambda v, x=value: v is not None and v < x)
+
+    def lte(self, column, value):
+        return self._add_filter(column, lambda v, x=value: v is not None and v <= x)
+
+    def gt(self, column, value):
+        return self._add_filter(column, lambda v, x=value: v is not None and v > x)
+
+    def gte(self, column, value):
+        return self._add_filter(column, lambda v, x=value: v is not None and v >= x)
+
+    def ilike(self, column, pattern):
+        prefix = pattern.rstrip("%").lower()
+        return self._add_filter(column, lambda v: str(v).lower().startswith(prefix))
+
+    def like(self, column, pattern):
+        prefix = pattern.rstrip("%").replace("\\", "")
+        return self._add_filter(column, lambda v: str(v).startswith(prefix))
+
+    def or_(self, expression):
+        self._row_filters.append(_logic_check(expression))
+        return self
+
+    # Modifiers
+    def order(self, column, desc=False):
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def single(self):
+        self._single = True
+        return self
+
+    def _matches(self, row: dict) -> bool:
+        return (
+            all(check(_lookup(row, column)) for column, check in self._filters)
+            and all(check(row) for check in self._row_filters)
+        )
+
+    def execute(self) -> FakeResult:
+        self._client.round_trips += 1
+        if self._client.latency:
+            time.sleep(self._client.latency)
+
+        rows = self._client.tables.setdefault(self._table, [])
+
+        if self._op in ("insert", "upsert"):
+            payload = self._payload if isinstance(self._payload, list) else [self._payload]
+            inserted = [{"id": str(uuid.uuid4()), **p} for p in payload]
+            rows.extend(inserted)
+            return FakeResult(inserted)
+
+        matched = [r for r in rows if self._matches(r)]
+
+        if self._op == "update":
+            for r in matched:
+                r.update(self._payload)
+            return FakeResult(matched)
+
+        if self._op == "delete":
+            self._client.tables[self._table] = [r for r in rows if r not in matched]
+            return FakeResult(matched)
+
+        for column, desc in reversed(self._order):
+            matched.sort(key=lambda r: (_lookup(r, column) is None, _lookup(r, column) or ""), reverse=desc)
+        count = len(matched) if self._count else None
+        if self._head:
+            return FakeResult([], count)
+        if self._limit is not None:
+            matched = matched[:self._limit]
+        if self._single:
+            return FakeResult(matched[0] if matched else None)
+        return FakeResult(matched, count)
+
+
+class FakeSupabase:
+    def __init__(self, tables: Dict[str, List[dict]], latency: float = 0.0):
+        self.tables = tables
+        self.latency = latency
+        self.round_trips = 0
+
+    def table(self, name: str) -> _Query:
+        return _Query(self, name)
@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from core.cache import TTLCache
+
+# Days of history kept per user: 53 weeks, the most the contribution graph shows
+HEATMAP_DAYS = 371
+# Seconds a user's daily counts are served from memory before being re-read
+# (check-ins handled by this process are added as they happen)
+ACTIVITY_CACHE_TTL = float(os.getenv("ACTIVITY_CACHE_TTL", "300"))
+ACTIVITY_CACHE_SIZE = int(os.getenv("ACTIVITY_CACHE_SIZE", "10000"))
+
+# Check-ins on a day -> intensity level 0-4 (0, 1, 2, 3-4, 5+)
+_LEVEL_THRESHOLDS = (1, 2, 3, 5)
+
+# day (ISO date) -> skill name -> completed check-ins
+DayCounts = Dict[str, Dict[str, int]]
+
+
+def utc_today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def window_start(today: date) -> date:
+    """First day covered by the cached counts."""
+    return today - timedelta(days=HEATMAP_DAYS - 1)
+
+
+def _level(count: int) -> int:
+    return sum(count >= threshold for threshold in _LEVEL_THRESHOLDS)
+
+
+def build_heatmap(days: DayCounts, start: date, end: date, skill: Optional[str] = None) -> dict:
+    """
+    Compact heatmap for `start`..`end`: one digit (intensity level) per day
+    in `levels`, so the payload stays the same size however many challenges
+    the user has run.
+    """
+    levels = []
+    total = 0
+    skills = set()
+    day = start
+    while day <= end:
+        by_skill = days.get(day.isoformat(), {})
+        skills.update(by_skill)
+        count = by_skill.get(skill, 0) if skill else sum(by_skill.values())
+        total += count
+        levels.append(str(_level(count)))
+        day += timedelta(days=1)
+
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "levels": "".join(levels),
+        "total": total,
+        "skills": sorted(skills),
+    }
+
+
+def load_day_counts(supabase, user_id: str, start: date, end: date) -> DayCounts:
+    """Completed check-ins per day and skill, bucketed by the database."""
+    result = supabase.rpc("checkin_day_counts", {
+        "p_user_id": user_id,
+        "p_from": start.isoformat(),
+        "p_to": end.isoformat(),
+    }).execute()
+    days: DayCounts = {}
+    for row in result.data or []:
+        days.setdefault(row["day"], {})[row["skill_name"]] = row["checkins"]
+    return days
+
+
+class ActivityCounts:
+    """
+    Per-user daily check-in counts for the last HEATMAP_DAYS days.
+
+    A user's counts are loaded with one grouped query on first use and then
+    kept current incrementally: `record` adds each check-in this process
+    handles. Entries expire ACTIVITY_CACHE_TTL seconds after being loaded so
+    check-ins handled by other workers show up.
+
+    Cached counts are never mutated: `record` swaps in an updated copy, so
+    the dict `get` returns can be read without holding the lock.
+    """
+
+    def __init__(self):
+        # user id -> (expires at, counts)
+        self._cache = TTLCache(maxsize=ACTIVITY_CACHE_SIZE, ttl=ACTIVITY_CACHE_TTL)
+        self._lock = threading.Lock()
+        self._stats = {"loads": 0, "recorded": 0}
+
+    def get(self, supabase, user_id: str) -> DayCounts:
+        entry = self._cache.get(str(user_id))
+        if entry is not None:
+            return entry[1]
+
+        today = utc_today()
+        days = load_day_counts(supabase, user_id, window_start(today), today)
+        with self._lock:
+            self._cache.set(str(user_id), (time.monotonic() + ACTIVITY_CACHE_TTL, days))
+        self._stats["loads"] += 1
+        return days
+
+    def record(self, user_id: str, skill_name: str, day: Optional[date] = None) -> None:
+        """Add one completed check-in (only if the user's counts are cached)."""
+        day_key = (day or utc_today()).isoformat()
+        with self._lock:
+            entry = self._cache.get(str(user_id))
+            if entry is None:
+                # The next load reads it from the database
+                return
+            expires_at, days = entry
+            by_skill = days.get(day_key, {})
+            days = {**days, day_key: {**by_skill, skill_name: by_skill.get(skill_name, 0) + 1}}
+            # Keep the load's expiry so other workers' check-ins still show up on time
+            self._cache.set(str(user_id), (expires_at, days), ttl=max(expires_at - time.monotonic(), 0.001))
+        self._stats["recorded"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._cache.stats(), **self._stats}
+
+
+activity_counts = ActivityCounts()
@@ -1,13 +1,18 @@
-from typing import TypedDict, Dict, Any
+import asyncio
+from typing import AsyncIterator, TypedDict, Dict, Any, Tuple
 
 from dotenv import load_dotenv
+from langchain_core.output_parsers import PydanticOutputParser
 from langchain_core.prompts import ChatPromptTemplate
-from langchain.output_parsers import PydanticOutputParser
-from langchain_openai import ChatOpenAI
 from langgraph.graph import END, StateGraph
 from opik import track
 
+from core.concurrency import llm_slots
+from core.llm import get_llm
+from core.plan_cache import normalize_skill, plan_cache
+from core.plan_stream import PlanStreamParser
 from core.prompts import LEARNING_PLAN_SYSTEM_PROMPT
+from core.singleflight import SingleFlight
 from schemas.learning_plan import LearningPlanResponse
 
 load_dotenv()
@@ -18,21 +23,24 @@ class PlanState(TypedDict):
     plan_json: Dict[str, Any]
 
 
-@track(name="generate_plan_llm_call")
-def _generate_plan(state: PlanState) -> PlanState:
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.3)
-    parser = PydanticOutputParser(pydantic_object=LearningPlanResponse)
+# Built once: the format instructions are the same for every request
+_plan_parser = PydanticOutputParser(pydantic_object=LearningPlanResponse)
+_plan_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system", LEARNING_PLAN_SYSTEM_PROMPT),
+        ("human", "Create the learning plan for this skill: {skill_name}"),
+    ]
+).partial(format_instructions=_plan_parser.get_format_instructions())
 
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system", LEARNING_PLAN_SYSTEM_PROMPT),
-            ("human", "Create the learning plan for this skill: {skill_name}"),
-        ]
-    ).partial(format_instructions=parser.get_format_instructions())
 
-    response = llm.invoke(prompt.invoke({"skill_name": state["skill_name"]}))
+@track(name="generate_plan_llm_call")
+async def _generate_plan(state: PlanState) -> PlanState:
+    async with llm_slots:
+        response = await get_llm("plan").ainvoke(
+            _plan_prompt.invoke({"skill_name": state["skill_name"]})
+        )
 
-    plan_json = parser.parse(response.content).model_dump()
+    plan_json = _plan_parser.parse(response.content).model_dump()
     return {"skill_name": state["skill_name"], "plan_json": plan_json}
 
 
@@ -42,8 +50,59 @@ _graph.set_entry_point("generate_plan")
 _graph.add_edge("generate_plan", END)
 _compiled_graph = _graph.compile()
 
+# Concurrent requests for the same skill share one LLM generation
+plan_flights = SingleFlight()
+
 
 @track(name="generate_learning_plan")
-def generate_learning_plan(skill_name: str) -> Dict[str, Any]:
-    result = _compiled_graph.invoke({"skill_name": skill_name})
-    return result["plan_json"]
+async def generate_learning_plan(skill_name: str, regenerate: bool = False) -> Dict[str, Any]:
+    """Return the plan for a skill, reusing a cached one unless `regenerate` is set."""
+    # The plan cache reads and writes SQLite, so it runs off the event loop
+    if not regenerate:
+        cached = await asyncio.to_thread(plan_cache.get, skill_name)
+        if cached is not None:
+            return cached
+
+    async def generate() -> Dict[str, Any]:
+        # A generation that finished just before we joined may have filled the cache
+        if not regenerate:
+            cached = await asyncio.to_thread(plan_cache.get, skill_name)
+            if cached is not None:
+                return cached
+        result = await _compiled_graph.ainvoke({"skill_name": skill_name})
+        await asyncio.to_thread(plan_cache.set, skill_name, result["plan_json"])
+        return result["plan_json"]
+
+    return await plan_flights.do(normalize_skill(skill_name), generate)
+
+
+@track(name="stream_learning_plan")
+async def stream_learning_plan(
+    skill_name: str, regenerate: bool = False
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Generate a plan while streaming it: yields ("milestone", ...) and
+    ("day", ...) as soon as each one is complete and valid, then
+    ("plan", full_plan) once the whole response has been parsed.
+    """
+    plan = None if regenerate else await asyncio.to_thread(plan_cache.get, skill_name)
+
+    if plan is None:
+        stream = PlanStreamParser()
+
+        async with llm_slots:
+            async for chunk in get_llm("plan").astream(
+                _plan_prompt.invoke({"skill_name": skill_name})
+            ):
+                for event, item in stream.feed(chunk.content):
+                    yield event, item.model_dump()
+
+        plan = _plan_parser.parse(stream.text).model_dump()
+        await asyncio.to_thread(plan_cache.set, skill_name, plan)
+    else:
+        for milestone in plan["weeklyMilestones"]:
+            yield "milestone", milestone
+        for day in plan["days"]:
+            yield "day", day
+
+    yield "plan", plan
@@ -0,0 +1,176 @@
+import os
+import secrets
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import jwt
+from fastapi import Header, HTTPException, Query
+
+from core.cache import TTLCache
+from core.supabase_client import get_supabase
+
+_url = os.getenv("SUPABASE_URL", "").rstrip("/")
+# Legacy (HS256) projects sign access tokens with the JWT secret; projects on
+# asymmetric signing keys publish them at the JWKS endpoint instead.
+_jwt_secret = os.getenv("SUPABASE_JWT_SECRET", "").strip()
+# An empty value or the .env.example placeholder means "not configured", so
+# HS256 tokens are verified remotely instead of failing with a 401
+if _jwt_secret in ("", "your_jwt_secret_here"):
+    _jwt_secret = None
+_jwks_url = f"{_url}/auth/v1/.well-known/jwks.json"
+
+JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+# Upper bound on how long a verified token stays in the cache (seconds).
+TOKEN_CACHE_TTL = float(os.getenv("AUTH_TOKEN_CACHE_TTL", "60"))
+JWKS_CACHE_TTL = int(os.getenv("AUTH_JWKS_CACHE_TTL", "600"))
+# Seconds a notification-stream ticket can be redeemed for
+STREAM_TICKET_TTL = float(os.getenv("STREAM_TICKET_TTL", "30"))
+
+_token_cache = TTLCache(maxsize=10_000, ttl=TOKEN_CACHE_TTL)
+_jwks_client: Optional[jwt.PyJWKClient] = None
+_jwks_lock = threading.Lock()
+_SUPPORTED_ALGORITHMS = ("HS256", "RS256", "ES256")
+_stats = {"local": 0, "remote": 0, "rejected": 0}
+
+# Stream tickets are held in-process, like the in-memory pub/sub broker; with
+# several workers, plug in a shared store (TTLCache's get/set/delete) with
+# `set_stream_ticket_backend`.
+_stream_tickets = TTLCache(maxsize=10_000, ttl=STREAM_TICKET_TTL)
+_stream_tickets_lock = threading.Lock()
+
+
+class _CannotVerifyLocally(Exception):
+    """Raised when the token can only be checked by Supabase Auth."""
+
+
+def _get_jwks_client() -> jwt.PyJWKClient:
+    global _jwks_client
+    with _jwks_lock:
+        if _jwks_client is None:
+            _jwks_client = jwt.PyJWKClient(
+                _jwks_url, cache_keys=True, lifespan=JWKS_CACHE_TTL
+            )
+        return _jwks_client
+
+
+def _signing_key(token: str, alg: str):
+    if alg not in _SUPPORTED_ALGORITHMS:
+        raise _CannotVerifyLocally(f"Unsupported algorithm: {alg}")
+    if alg == "HS256":
+        if not _jwt_secret:
+            raise _CannotVerifyLocally("SUPABASE_JWT_SECRET not configured")
+        return _jwt_secret
+    try:
+        return _get_jwks_client().get_signing_key_from_jwt(token).key
+    except jwt.PyJWKClientError as e:
+        raise _CannotVerifyLocally(str(e))
+
+
+def _verify_locally(token: str) -> Dict:
+    """Verify signature, expiry and audience without a network round trip."""
+    try:
+        alg = jwt.get_unverified_header(token).get("alg")
+    except jwt.DecodeError as e:
+        raise HTTPException(status_code=401, detail=f"Authentication failed: {str(e)}")
+
+    key = _signing_key(token, alg)
+    try:
+        return jwt.decode(
+            token,
+            key,
+            algorithms=[alg],
+            audience=JWT_AUDIENCE,
+            options={"require": ["exp", "sub"]},
+        )
+    except jwt.InvalidTokenError as e:
+        raise HTTPException(status_code=401, detail=f"Authentication failed: {str(e)}")
+
+
+def _verify_remotely(token: str) -> str:
+    supabase = get_supabase()
+    try:
+        user = supabase.auth.get_user(token)
+        if not user or not user.user:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        return user.user.id
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=401, detail=f"Authentication failed: {str(e)}")
+
+
+def verify_token(token: str) -> str:
+    """Resolve an access token to a user ID, verifying it locally when possible."""
+    cached = _token_cache.get(token)
+    if cached is not None:
+        return cached
+
+    try:
+        claims = _verify_locally(token)
+        user_id = claims["sub"]
+        ttl = min(TOKEN_CACHE_TTL, claims["exp"] - time.time())
+        _stats["local"] += 1
+    except _CannotVerifyLocally:
+        user_id = _verify_remotely(token)
+        ttl = TOKEN_CACHE_TTL
+        _stats["remote"] += 1
+    except HTTPException:
+        _stats["rejected"] += 1
+        raise
+
+    if ttl > 0:
+        _token_cache.set(token, user_id, ttl=ttl)
+    return user_id
+
+
+def bearer_token(authorization: str) -> str:
+    if not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Invalid authorization header")
+    return authorization.replace("Bearer ", "")
+
+
+def get_user_id(authorization: str = Header(...)) -> str:
+    """Extract user ID from the Authorization header (Bearer token)."""
+    return verify_token(bearer_token(authorization))
+
+
+def issue_stream_ticket(token: str) -> str:
+    """
+    Single-use ticket for opening the notification stream. Browsers'
+    EventSource can't send an Authorization header, and a ticket keeps the
+    access token itself out of URLs and access logs.
+    """
+    user_id = verify_token(token)
+    try:
+        # Already verified above; only the expiry is needed
+        expires_at = jwt.decode(token, options={"verify_signature": False})["exp"]
+    except (jwt.DecodeError, KeyError):
+        expires_at = time.time() + TOKEN_CACHE_TTL
+
+    ticket = secrets.token_urlsafe(32)
+    _stream_tickets.set(ticket, (user_id, expires_at))
+    return ticket
+
+
+def redeem_stream_ticket(ticket: str = Query(...)) -> Tuple[str, float]:
+    """
+    Dependency for the notification stream: (user ID, expiry of the access
+    token the ticket was issued for). Each ticket works once.
+    """
+    with _stream_tickets_lock:
+        entry = _stream_tickets.get(ticket)
+        _stream_tickets.delete(ticket)
+    if entry is None:
+        raise HTTPException(status_code=401, detail="Invalid or expired stream ticket")
+    return entry
+
+
+def set_stream_ticket_backend(backend) -> None:
+    global _stream_tickets
+    _stream_tickets = backend
+
+
+def get_auth_stats() -> Dict[str, int]:
+    """Counters for local vs remote verification and the token cache."""
+    return {**_stats, "token_cache": _token_cache.stats()}
@@ -0,0 +1,66 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds of already-seen rows each incremental refresh reads again. A row's
+# timestamp is set when its transaction runs, not when it commits, so a slow
+# transaction can land behind the high-water mark; re-reading this window
+# picks it up.
+REFRESH_OVERLAP = float(os.getenv("REFRESH_OVERLAP", "120"))
+_PAGE_SIZE = 1000
+
+
+def overlap_start(high_water: str) -> str:
+    """The timestamp REFRESH_OVERLAP seconds before `high_water`."""
+    return (datetime.fromisoformat(high_water) - timedelta(seconds=REFRESH_OVERLAP)).isoformat()
+
+
+def pull_since(new_query: Callable[[], Any], column: str, since: Optional[str]) -> List[dict]:
+    """
+    Rows with `column` at or after `since` (or every row with it set),
+    oldest first. `new_query()` returns a fresh select on the table; pages
+    are keyset-paged by (`column`, id) so equal timestamps aren't skipped.
+    """
+    rows: List[dict] = []
+    last = None
+    while True:
+        query = new_query().order(column).order("id").limit(_PAGE_SIZE)
+        if last is not None:
+            query = query.or_(f'{column}.gt."{last[column]}",and({column}.eq."{last[column]}",id.gt.{last["id"]})')
+        elif since is not None:
+            query = query.gte(column, since)
+        else:
+            query = query.not_.is_(column, "null")
+        page = query.execute().data or []
+        rows.extend(page)
+        if len(page) < _PAGE_SIZE:
+            return rows
+        last = page[-1]
+
+
+def run_refresher(index, name: str, interval: float) -> None:
+    """Build `index`, then call its `refresh` every `interval` seconds, logging failures."""
+    while not index.ready:
+        try:
+            index.build()
+        except Exception:
+            logger.exception("Building the %s failed, retrying", name)
+            time.sleep(interval)
+    while True:
+        time.sleep(interval)
+        try:
+            index.refresh()
+        except Exception:
+            logger.exception("Refreshing the %s failed", name)
+
+
+def start_refresher(index, name: str, interval: float) -> None:
+    """Run `run_refresher` for `index` in a daemon thread."""
+    threading.Thread(
+        target=run_refresher, args=(index, name, interval), name=name.replace(" ", "-"), daemon=True
+    ).start()
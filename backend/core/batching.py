@@ -0,0 +1,11 @@
+from typing import Iterator, List, Sequence
+
+# Max ids per `in_()` filter, keeps the PostgREST query string well under URL limits
+IN_CHUNK_SIZE = 200
+
+
+def chunks(ids: Sequence[str], size: int = IN_CHUNK_SIZE) -> Iterator[List[str]]:
+    """Split `ids` (de-duplicated, order kept) into `in_()`-sized lists."""
+    unique = list(dict.fromkeys(ids))
+    for i in range(0, len(unique), size):
+        yield unique[i:i + size]
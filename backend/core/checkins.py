@@ -0,0 +1,35 @@
+from typing import Optional
+
+from postgrest.exceptions import APIError
+
+from core.supabase_client import get_supabase
+
+
+class CheckinError(Exception):
+    """A check-in was rejected; carries the HTTP status to answer with."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def record_checkin(challenge_id: str, user_id: str, completed: bool, notes: Optional[str]) -> dict:
+    """
+    Record a check-in atomically with one round trip to the `record_checkin`
+    database function. Returns `{"progress", "day_number", "opponent_id", "username"}`.
+    """
+    try:
+        result = get_supabase().rpc("record_checkin", {
+            "p_challenge_id": challenge_id,
+            "p_user_id": user_id,
+            "p_completed": completed,
+            "p_notes": notes,
+        }).execute()
+    except APIError as e:
+        if e.code == "P0002":
+            raise CheckinError(404, e.message)
+        if e.code == "P0001":
+            raise CheckinError(400, e.message)
+        raise
+    return result.data
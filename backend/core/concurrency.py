@@ -0,0 +1,37 @@
+import asyncio
+import os
+from typing import Any, Awaitable
+
+from fastapi import HTTPException, Request
+
+# Max LLM calls in flight per process; extra requests queue for a slot
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+# Overall budget for an LLM-backed request, including time queued (seconds)
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "90"))
+DISCONNECT_POLL_INTERVAL = 0.5
+
+llm_slots = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+
+async def run_llm_request(request: Request, awaitable: Awaitable[Any], timeout: float = LLM_TIMEOUT) -> Any:
+    """
+    Await an LLM-backed coroutine on behalf of an HTTP request.
+
+    The work is cancelled when the client disconnects or `timeout` expires,
+    so abandoned requests don't keep holding an LLM slot.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                raise HTTPException(status_code=499, detail="Client disconnected")
+            if loop.time() >= deadline:
+                raise HTTPException(status_code=504, detail="The AI took too long to respond, please try again")
+    finally:
+        if not task.done():
+            task.cancel()
@@ -0,0 +1,81 @@
+import os
+import threading
+from typing import Any, Dict, Iterable, Optional, Set
+
+from core.cache import TTLCache
+
+# Seconds an assembled friends-activity feed is served from memory
+FRIENDS_FEED_TTL = float(os.getenv("FRIENDS_FEED_TTL", "30"))
+
+
+class FeedCache:
+    """
+    Per-viewer cache of assembled feeds.
+
+    Each cached feed records the users it was built from, and a reverse index
+    (source user -> viewers) lets a change by one user drop every feed that
+    shows them, e.g. a friend's check-in. Feeds dropped by expiry or LRU
+    eviction are unlinked from the index too, so it only tracks cached feeds.
+    """
+
+    def __init__(self, ttl: float = FRIENDS_FEED_TTL, maxsize: int = 10_000):
+        # viewer -> (feed, sources)
+        self._feeds = TTLCache(maxsize=maxsize, ttl=ttl, on_evict=self._evicted)
+        self._sources: Dict[str, Set[str]] = {}
+        self._dependents: Dict[str, Set[str]] = {}
+        # Re-entrant: setting a feed can evict another one, whose callback relocks
+        self._lock = threading.RLock()
+        self.invalidations = 0
+
+    def get(self, viewer_id: str) -> Optional[Any]:
+        entry = self._feeds.get(str(viewer_id))
+        return entry[0] if entry is not None else None
+
+    def set(self, viewer_id: str, feed: Any, sources: Iterable[str]) -> None:
+        viewer_id = str(viewer_id)
+        with self._lock:
+            self._unlink(viewer_id)
+            sources = self._sources[viewer_id] = {str(s) for s in sources}
+            for source in sources:
+                self._dependents.setdefault(source, set()).add(viewer_id)
+            self._feeds.set(viewer_id, (feed, sources))
+
+    def invalidate(self, viewer_id: str) -> None:
+        """Drop one viewer's feed (e.g. their friend list changed)."""
+        viewer_id = str(viewer_id)
+        with self._lock:
+            self._unlink(viewer_id)
+            self._feeds.delete(viewer_id)
+            self.invalidations += 1
+
+    def invalidate_source(self, source_id: str) -> None:
+        """Drop every feed built from `source_id`'s activity."""
+        with self._lock:
+            for viewer_id in self._dependents.pop(str(source_id), set()):
+                self._unlink(viewer_id)
+                self._feeds.delete(viewer_id)
+                self.invalidations += 1
+
+    def _evicted(self, viewer_id: str, entry: tuple) -> None:
+        with self._lock:
+            # Skip if the viewer's feed was rebuilt since this entry was cached
+            if self._sources.get(viewer_id) is entry[1]:
+                self._unlink(viewer_id)
+
+    def _unlink(self, viewer_id: str) -> None:
+        for source in self._sources.pop(viewer_id, ()):
+            viewers = self._dependents.get(source)
+            if viewers is not None:
+                viewers.discard(viewer_id)
+                if not viewers:
+                    del self._dependents[source]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            **self._feeds.stats(),
+            "invalidations": self.invalidations,
+            "tracked_sources": len(self._dependents),
+        }
+
+
+friends_feed_cache = FeedCache()
@@ -0,0 +1,34 @@
+import os
+from typing import Dict
+
+from core.cache import TTLCache
+
+# Seconds a user's friendship map is served from memory; friend changes
+# made through the API invalidate it immediately.
+FRIENDSHIP_CACHE_TTL = float(os.getenv("FRIENDSHIP_CACHE_TTL", "120"))
+
+_friendships = TTLCache(maxsize=10_000, ttl=FRIENDSHIP_CACHE_TTL)
+
+
+def get_friend_statuses(supabase, user_id: str) -> Dict[str, str]:
+    """Map of other user id -> friendship status for everyone `user_id` is linked to."""
+    statuses = _friendships.get(str(user_id))
+    if statuses is None:
+        result = supabase.table("friends").select("user_id, friend_id, status").or_(
+            f"user_id.eq.{user_id},friend_id.eq.{user_id}"
+        ).execute()
+        statuses = {}
+        for f in result.data or []:
+            other_id = f['friend_id'] if str(f['user_id']) == str(user_id) else f['user_id']
+            statuses[str(other_id)] = f['status']
+        _friendships.set(str(user_id), statuses)
+    return statuses
+
+
+def invalidate_friendships(*user_ids: str) -> None:
+    for user_id in user_ids:
+        _friendships.delete(str(user_id))
+
+
+def get_friendship_cache_stats() -> Dict[str, int]:
+    return _friendships.stats()
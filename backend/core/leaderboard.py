@@ -0,0 +1,159 @@
+import bisect
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from core.background import overlap_start, pull_since, start_refresher
+from core.batching import chunks
+from core.supabase_client import get_supabase
+
+# Seconds between pulls of stats changed since the last build/refresh
+# (catches challenges completed by other workers)
+LEADERBOARD_REFRESH = float(os.getenv("LEADERBOARD_REFRESH", "60"))
+
+# Profile columns complete_due_challenges maintains
+STATS_COLUMNS = (
+    "id, total_wins, total_losses, total_draws, current_streak, best_streak, "
+    "days_completed, days_total, stats_updated_at"
+)
+
+
+def _player(row: dict) -> dict:
+    days_total = row.get("days_total") or 0
+    return {
+        "user_id": str(row["id"]),
+        "wins": row.get("total_wins") or 0,
+        "losses": row.get("total_losses") or 0,
+        "draws": row.get("total_draws") or 0,
+        "current_streak": row.get("current_streak") or 0,
+        "best_streak": row.get("best_streak") or 0,
+        "completion_rate": round((row.get("days_completed") or 0) * 100.0 / days_total, 1) if days_total else 0.0,
+        "updated_at": row.get("stats_updated_at"),
+    }
+
+
+def _key(player: dict) -> tuple:
+    # Most wins, then best completion rate, then fewest losses; the id keeps keys unique
+    return (-player["wins"], -player["completion_rate"], player["losses"], player["user_id"])
+
+
+class Leaderboard:
+    """
+    In-memory leaderboard over the challenge stats on profiles.
+
+    Rank keys are kept in one sorted list, so a player's rank is a bisect and
+    the top N a slice. The board is built once in the background from every
+    profile with stats, then kept current from completion events in this
+    process (`reload`) and a periodic pull of stats changed elsewhere;
+    `ready` is False until the first build finishes.
+    """
+
+    def __init__(self):
+        self._keys: List[tuple] = []
+        self._players: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        # Newest stats_updated_at seen
+        self._high_water: Optional[str] = None
+        self.ready = False
+        self._stats = {"reads": 0, "updates": 0, "builds": 0, "refreshes": 0}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _rank(self, key: tuple) -> int:
+        # Players with equal stats share a rank
+        return bisect.bisect_left(self._keys, key[:-1]) + 1
+
+    def top(self, limit: int) -> List[dict]:
+        """The first `limit` players, best first, with their rank."""
+        with self._lock:
+            entries = [{**self._players[key[-1]], "rank": self._rank(key)} for key in self._keys[:limit]]
+        self._stats["reads"] += 1
+        return entries
+
+    def rank_of(self, user_id: str) -> Optional[dict]:
+        """A player's stats and global rank (None if they haven't finished a challenge)."""
+        with self._lock:
+            player = self._players.get(str(user_id))
+            entry = {**player, "rank": self._rank(_key(player))} if player else None
+        self._stats["reads"] += 1
+        return entry
+
+    def ranked(self, user_ids: Iterable[str]) -> List[dict]:
+        """The given players ranked among themselves (e.g. a friends leaderboard)."""
+        with self._lock:
+            players = [self._players[i] for i in {str(i) for i in user_ids} if i in self._players]
+        self._stats["reads"] += 1
+
+        entries = []
+        previous = None
+        for player in sorted(players, key=_key):
+            key = _key(player)[:-1]
+            rank = entries[-1]["rank"] if key == previous else len(entries) + 1
+            entries.append({**player, "rank": rank})
+            previous = key
+        return entries
+
+    def update(self, row: dict) -> None:
+        """Apply a profile's stats, ignoring rows older than what the board has."""
+        if not row.get("stats_updated_at"):
+            # Hasn't finished a challenge yet
+            return
+        player = _player(row)
+        with self._lock:
+            old = self._players.get(player["user_id"])
+            if old is not None:
+                if old["updated_at"] and player["updated_at"] and player["updated_at"] < old["updated_at"]:
+                    return
+                del self._keys[bisect.bisect_left(self._keys, _key(old))]
+            self._players[player["user_id"]] = player
+            bisect.insort(self._keys, _key(player))
+        self._stats["updates"] += 1
+
+    def reload(self, user_ids: Iterable[str], supabase=None) -> None:
+        """Re-read the stats of players whose challenges just completed."""
+        if not self.ready:
+            # The build (or the refresh after it) picks them up
+            return
+        supabase = supabase or get_supabase()
+        for chunk in chunks([str(i) for i in user_ids]):
+            result = supabase.table("profiles").select(STATS_COLUMNS).in_("id", chunk).execute()
+            for row in result.data or []:
+                self.update(row)
+
+    def _pull(self, supabase, since: Optional[str]) -> List[dict]:
+        """Players with stats changed at or after `since`; advances the high-water mark."""
+        rows = pull_since(lambda: supabase.table("profiles").select(STATS_COLUMNS), "stats_updated_at", since)
+        if rows and (self._high_water is None or rows[-1]["stats_updated_at"] > self._high_water):
+            self._high_water = rows[-1]["stats_updated_at"]
+        return rows
+
+    def _load(self, rows: List[dict]) -> None:
+        players = {p["user_id"]: p for p in map(_player, rows)}
+        keys = sorted(_key(p) for p in players.values())
+        with self._lock:
+            self._players = players
+            self._keys = keys
+
+    def build(self, supabase=None) -> None:
+        """Load every player with stats."""
+        self._load(self._pull(supabase or get_supabase(), None))
+        self.ready = True
+        self._stats["builds"] += 1
+
+    def refresh(self, supabase=None) -> None:
+        """Apply stats changed since the last build/refresh, re-reading the REFRESH_OVERLAP window."""
+        since = overlap_start(self._high_water) if self._high_water else None
+        for row in self._pull(supabase or get_supabase(), since):
+            self.update(row)
+        self._stats["refreshes"] += 1
+
+    def start(self) -> None:
+        """Build, then refresh every LEADERBOARD_REFRESH seconds, in a background thread."""
+        start_refresher(self, "leaderboard", LEADERBOARD_REFRESH)
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._stats, "size": len(self), "ready": self.ready}
+
+
+leaderboard = Leaderboard()
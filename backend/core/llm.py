@@ -0,0 +1,65 @@
+import threading
+from typing import Dict, Optional
+
+import httpx
+from langchain_openai import ChatOpenAI
+
+# Named LLM configurations used by the app. Each gets one long-lived client.
+LLM_CONFIGS = {
+    "plan": {"model": "gpt-4o-mini", "temperature": 0.3},
+    "suggest": {
+        "model": "gpt-4o-mini",
+        "temperature": 1.0,
+        "max_retries": 3,
+        "request_timeout": 30,
+    },
+}
+
+# Shared connection pool for all OpenAI calls (keep-alive across requests)
+_HTTP_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=60)
+
+_clients: Dict[str, ChatOpenAI] = {}
+_http_client: Optional[httpx.Client] = None
+_http_async_client: Optional[httpx.AsyncClient] = None
+_lock = threading.Lock()
+
+
+def _create(name: str) -> ChatOpenAI:
+    global _http_client, _http_async_client
+    if _http_client is None:
+        _http_client = httpx.Client(limits=_HTTP_LIMITS)
+        _http_async_client = httpx.AsyncClient(limits=_HTTP_LIMITS)
+    return ChatOpenAI(
+        **LLM_CONFIGS[name],
+        http_client=_http_client,
+        http_async_client=_http_async_client,
+    )
+
+
+def get_llm(name: str) -> ChatOpenAI:
+    """Get the shared client for a named LLM configuration."""
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = _create(name)
+    return client
+
+
+def init_llm_clients() -> None:
+    """Create every configured client up front (called on startup)."""
+    for name in LLM_CONFIGS:
+        get_llm(name)
+
+
+async def close_llm_clients() -> None:
+    global _http_client, _http_async_client
+    with _lock:
+        _clients.clear()
+        http_client, http_async_client = _http_client, _http_async_client
+        _http_client = _http_async_client = None
+    if http_client is not None:
+        http_client.close()
+    if http_async_client is not None:
+        await http_async_client.aclose()
@@ -0,0 +1,80 @@
+from typing import Dict, Iterable, Optional
+
+from core.batching import chunks
+from core.profile_cache import profile_cache
+from core.supabase_client import get_supabase
+
+
+class ProfileLoader:
+    """
+    Request-scoped profile loader.
+
+    Collects profile lookups, fetches whatever isn't loaded yet with one
+    `in_()` query (per IN_CHUNK_SIZE ids) and memoizes the rows, misses
+    included, until the request ends. Get one per request with
+    `Depends(get_profile_loader)`.
+    """
+
+    def __init__(self, supabase=None):
+        self._supabase = supabase
+        self._by_id: Dict[str, Optional[dict]] = {}
+        self._by_username: Dict[str, Optional[dict]] = {}
+
+    @property
+    def supabase(self):
+        if self._supabase is None:
+            self._supabase = get_supabase()
+        return self._supabase
+
+    def prime(self, profile: dict) -> None:
+        """Remember a profile row fetched some other way."""
+        self._by_id[str(profile["id"])] = profile
+        self._by_username[profile["username"]] = profile
+
+    def load_many(self, user_ids: Iterable[str]) -> Dict[str, dict]:
+        """Profiles for `user_ids`, keyed by id (unknown ids are left out)."""
+        ids = [str(i) for i in user_ids if i is not None]
+        missing = []
+        for user_id in ids:
+            if user_id in self._by_id:
+                continue
+            cached = profile_cache.get(user_id)
+            if cached is not None:
+                self.prime(cached)
+            else:
+                missing.append(user_id)
+
+        for chunk in chunks(missing):
+            result = self.supabase.table("profiles").select("*").in_("id", chunk).execute()
+            for profile in result.data or []:
+                profile_cache.set(profile)
+                self.prime(profile)
+            for user_id in chunk:
+                self._by_id.setdefault(user_id, None)
+
+        return {i: self._by_id[i] for i in ids if self._by_id[i] is not None}
+
+    def load(self, user_id: str) -> Optional[dict]:
+        return self.load_many([user_id]).get(str(user_id))
+
+    def load_by_username(self, username: str) -> Optional[dict]:
+        username = username.lower()
+        if username not in self._by_username:
+            cached = profile_cache.get_by_username(username)
+            if cached is not None:
+                self.prime(cached)
+                return cached
+
+            result = self.supabase.table("profiles").select("*").eq("username", username).execute()
+            if result.data:
+                profile_cache.set(result.data[0])
+                self.prime(result.data[0])
+            else:
+                self._by_username[username] = None
+        return self._by_username[username]
+
+
+def get_profile_loader() -> ProfileLoader:
+    """FastAPI dependency: a fresh loader per request."""
+    return ProfileLoader()
+
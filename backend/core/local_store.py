@@ -0,0 +1,36 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+# Local SQLite file for data this process generates and wants to keep across
+# restarts (e.g. cached learning plans). Not shared between machines.
+LOCAL_STORE_PATH = os.getenv(
+    "LOCAL_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "local_store.sqlite3"),
+)
+
+_connection = None
+_lock = threading.Lock()
+
+
+def _connect() -> sqlite3.Connection:
+    global _connection
+    if _connection is None:
+        _connection = sqlite3.connect(LOCAL_STORE_PATH, check_same_thread=False)
+        _connection.execute("PRAGMA journal_mode=WAL")
+    return _connection
+
+
+@contextmanager
+def local_store() -> Iterator[sqlite3.Connection]:
+    """Serialized access to the local store; commits on success."""
+    with _lock:
+        conn = _connect()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
@@ -0,0 +1,324 @@
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Dict, Hashable, List, Optional
+
+import httpx
+from postgrest.exceptions import APIError
+
+from core.cache import TTLCache
+from core.pubsub import get_broker
+from core.supabase_client import get_supabase, reset_supabase
+from core.unread_counter import unread_counters
+
+logger = logging.getLogger(__name__)
+
+# Max seconds a notification waits in the queue before being written
+NOTIFY_FLUSH_INTERVAL = float(os.getenv("NOTIFY_FLUSH_INTERVAL", "0.5"))
+# Max notifications written in one insert
+NOTIFY_BATCH_SIZE = int(os.getenv("NOTIFY_BATCH_SIZE", "100"))
+# Attempts per batch before it is dropped
+NOTIFY_MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "3"))
+# Seconds during which repeated notifications are merged into the first one
+NOTIFY_COALESCE_WINDOW = float(os.getenv("NOTIFY_COALESCE_WINDOW", "86400"))
+# Notifications that could not be processed, kept for inspection
+_DEAD_LETTER_SIZE = 1000
+
+# Types merged per (recipient, type, challenge) into a single unread row,
+# whose title is rewritten from the template with the merged count
+COALESCED_TITLES = {
+    "opponent_progress": "@{username} checked in {count} times!",
+}
+
+_STOP = object()
+
+
+def _coalesce_key(notification: dict) -> Optional[Hashable]:
+    data = notification.get("data") or {}
+    if notification["type"] in COALESCED_TITLES and data.get("challenge_id"):
+        return (notification["user_id"], notification["type"], data["challenge_id"])
+    return None
+
+
+def _count(notification: dict) -> int:
+    return (notification.get("data") or {}).get("count", 1)
+
+
+def _merged(notification: dict, count: int) -> dict:
+    data = {**(notification.get("data") or {}), "count": count}
+    try:
+        title = COALESCED_TITLES[notification["type"]].format(**data)
+    except KeyError:
+        # The template needs a field this notification lacks (e.g. username)
+        title = notification["title"]
+    return {**notification, "title": title, "data": data}
+
+
+class NotificationDispatcher:
+    """
+    Writes notifications off the request path.
+
+    Routers enqueue notifications; a background thread inserts them in
+    batches (at most NOTIFY_BATCH_SIZE rows, at most NOTIFY_FLUSH_INTERVAL
+    late) and, once stored, bumps unread counters and pushes them to
+    connected clients. `stop()` drains whatever is still queued. A failure
+    while flushing never stops the worker: malformed notifications are
+    dead-lettered on their own, and if a flush fails unexpectedly its batch
+    is dead-lettered and the loop carries on.
+
+    Types listed in COALESCED_TITLES are merged: repeats for the same
+    recipient and challenge update the earlier row while it is unread and
+    younger than NOTIFY_COALESCE_WINDOW, instead of adding a new one. The
+    merged row keeps its created_at, so it doesn't move between pages of
+    the notification list. The rows being merged into are tracked per worker.
+    """
+
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # coalesce key -> (row id, merged count, first seen)
+        self._open_rows = TTLCache(maxsize=10_000, ttl=NOTIFY_COALESCE_WINDOW)
+        self._dead_letters: deque = deque(maxlen=_DEAD_LETTER_SIZE)
+        self._stats = {
+            "enqueued": 0,
+            "inserted": 0,
+            "flushes": 0,
+            "last_flush_size": 0,
+            "max_flush_size": 0,
+            "retries": 0,
+            "failed_batches": 0,
+            "dropped": 0,
+            "rejected": 0,
+            "splits": 0,
+            "coalesced": 0,
+            "dead_lettered": 0,
+        }
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="notification-dispatcher", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Flush everything queued so far and stop the worker thread."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def enqueue(self, notification: dict) -> None:
+        self._stats["enqueued"] += 1
+        self._queue.put(notification)
+        self.start()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + NOTIFY_FLUSH_INTERVAL
+            while len(batch) < NOTIFY_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._safe_flush(batch)
+
+        # Drain anything enqueued after the stop signal
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftover.append(item)
+        for i in range(0, len(leftover), NOTIFY_BATCH_SIZE):
+            self._safe_flush(leftover[i:i + NOTIFY_BATCH_SIZE])
+
+    def _safe_flush(self, batch: List[dict]) -> None:
+        try:
+            self._flush(batch)
+        except Exception:
+            logger.exception("Flushing %d notifications failed, dead-lettering them", len(batch))
+            self._dead_letter(batch)
+
+    def _dead_letter(self, notifications: List[dict]) -> None:
+        self._stats["dead_lettered"] += len(notifications)
+        self._dead_letters.extend(notifications)
+
+    def dead_letters(self) -> List[dict]:
+        """The most recent notifications that could not be processed."""
+        return list(self._dead_letters)
+
+    def _flush(self, batch: List[dict]) -> None:
+        self._stats["flushes"] += 1
+        self._stats["last_flush_size"] = len(batch)
+        self._stats["max_flush_size"] = max(self._stats["max_flush_size"], len(batch))
+
+        to_insert = self._coalesce(batch)
+        if not to_insert:
+            return
+        rows = self._insert(to_insert)
+        if rows is None:
+            return
+
+        # The rows are stored; failures from here on only affect bookkeeping
+        self._stats["inserted"] += len(rows)
+        for row in rows:
+            try:
+                key = _coalesce_key(row)
+                if key is not None:
+                    self._open_rows.set(key, (row["id"], _count(row), time.monotonic()))
+                unread_counters.increment(row["user_id"])
+            except Exception:
+                logger.exception("Failed to count notification %s", row.get("id"))
+        self._publish(rows)
+
+    def _coalesce(self, batch: List[dict]) -> List[dict]:
+        """Merge repeats within the batch and into open rows; return rows to insert."""
+        to_insert = []
+        merged: Dict[Hashable, dict] = {}
+        for notification in batch:
+            try:
+                key = _coalesce_key(notification)
+                if key is None:
+                    to_insert.append(notification)
+                elif key in merged:
+                    count = _count(merged[key]) + _count(notification)
+                    merged[key] = _merged(notification, count)
+                    self._stats["coalesced"] += 1
+                else:
+                    merged[key] = notification
+            except Exception:
+                logger.exception("Dead-lettering malformed notification %s", notification)
+                self._dead_letter([notification])
+
+        for key, notification in merged.items():
+            try:
+                open_row = self._open_rows.get(key)
+                if open_row is not None:
+                    updated = self._update_open_row(key, open_row, notification)
+                    if updated is not None:
+                        self._stats["coalesced"] += 1
+                        self._publish([updated])
+                        continue
+            except Exception:
+                logger.exception("Coalescing notification failed, storing it as a new row")
+            to_insert.append(notification)
+        return to_insert
+
+    def _update_open_row(self, key: Hashable, open_row: tuple, notification: dict) -> Optional[dict]:
+        row_id, count, first_seen = open_row
+        count += _count(notification)
+        notification = _merged(notification, count)
+        try:
+            result = (
+                get_supabase().table("notifications")
+                .update({
+                    "title": notification["title"],
+                    "message": notification["message"],
+                    "data": notification["data"],
+                })
+                .eq("id", row_id)
+                .eq("read", False)
+                .execute()
+            )
+        except Exception:
+            logger.exception("Failed to update coalesced notification %s", row_id)
+            result = None
+
+        if not result or not result.data:
+            # Already read, deleted or unreachable: start a fresh row instead
+            self._open_rows.delete(key)
+            return None
+
+        remaining = NOTIFY_COALESCE_WINDOW - (time.monotonic() - first_seen)
+        self._open_rows.set(key, (row_id, count, first_seen), ttl=max(remaining, 0.001))
+        return result.data[0]
+
+    def _insert(self, batch: List[dict]) -> Optional[List[dict]]:
+        """
+        Insert `batch`, retrying dropped connections. A batch the database
+        rejects is split in half and retried, so one bad row only costs
+        itself.
+        """
+        for attempt in range(1, NOTIFY_MAX_ATTEMPTS + 1):
+            client = get_supabase()
+            try:
+                result = client.table("notifications").insert(batch).execute()
+                return result.data or []
+            except APIError as e:
+                return self._split_insert(batch, e)
+            except Exception as e:
+                if attempt == NOTIFY_MAX_ATTEMPTS:
+                    logger.exception("Dropping %d notifications after %d attempts", len(batch), attempt)
+                    self._stats["failed_batches"] += 1
+                    self._stats["dropped"] += len(batch)
+                    return None
+                self._stats["retries"] += 1
+                if isinstance(e, httpx.TransportError):
+                    reset_supabase(client)
+                time.sleep(0.2 * 2 ** (attempt - 1))
+
+    def _split_insert(self, batch: List[dict], error: APIError) -> List[dict]:
+        if len(batch) == 1:
+            logger.warning("Dropping notification rejected by the database: %s (%s)", error.message, batch[0])
+            self._stats["rejected"] += 1
+            self._stats["dropped"] += 1
+            return []
+        self._stats["splits"] += 1
+        middle = len(batch) // 2
+        return (self._insert(batch[:middle]) or []) + (self._insert(batch[middle:]) or [])
+
+    def _publish(self, rows: List[dict]) -> None:
+        # Best effort: clients resync from the REST endpoints on reconnect
+        broker = get_broker()
+        for row in rows:
+            try:
+                broker.publish(row["user_id"], "notification", row)
+            except Exception:
+                logger.exception("Failed to push notification %s", row.get("id"))
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._stats, "queue_depth": self._queue.qsize()}
+
+
+dispatcher = NotificationDispatcher()
+
+
+def notify(
+    user_id: str,
+    type: str,
+    title: str,
+    message: Optional[str] = None,
+    data: Optional[dict] = None,
+) -> None:
+    """Queue a notification for `user_id`; it is stored and pushed shortly after."""
+    dispatcher.enqueue({
+        "user_id": str(user_id),
+        "type": type,
+        "title": title,
+        "message": message,
+        "data": data,
+    })
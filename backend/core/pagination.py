@@ -0,0 +1,72 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def clamp_limit(limit: Optional[int], default: int = DEFAULT_PAGE_SIZE) -> int:
+    """Keep the requested page size within 1..MAX_PAGE_SIZE."""
+    if not limit:
+        return default
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def encode_cursor(row: dict) -> str:
+    """Opaque cursor pointing just after `row` in (created_at, id) order."""
+    raw = json.dumps([row["created_at"], str(row["id"])]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    (created_at, id) from a cursor. Both are parsed and re-serialized, since
+    they end up inside a PostgREST filter expression.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at).isoformat(), str(uuid.UUID(row_id))
+    except (ValueError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(query, cursor: Optional[str], limit: int, owner_filter: Optional[str] = None):
+    """
+    Order a query newest first by (created_at, id) and start it after `cursor`.
+
+    `owner_filter` is an `or` expression (e.g. "either side is the user") and
+    the cursor condition goes in an `or` parameter of its own; PostgREST ANDs
+    separate `or` parameters, so cursor data can never widen the owner
+    filter. Fetches one extra row so `build_page` can tell whether there is
+    a next page.
+    """
+    if owner_filter:
+        query = query.or_(owner_filter)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.or_(
+            f'created_at.lt."{created_at}",'
+            f'and(created_at.eq."{created_at}",id.lt.{row_id})'
+        )
+
+    return query.order("created_at", desc=True).order("id", desc=True).limit(limit + 1)
+
+
+def build_page(rows: List[dict], limit: int, items: Optional[list] = None) -> dict:
+    """
+    Build a page response from rows fetched with `paginate`.
+    `items` can be the rows already transformed for the response.
+    """
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    items = rows if items is None else items[:limit]
+    return {
+        "items": items,
+        "next_cursor": encode_cursor(rows[-1]) if has_more and rows else None,
+    }
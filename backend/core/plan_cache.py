@@ -0,0 +1,78 @@
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+
+from core.cache import TTLCache
+from core.local_store import local_store
+
+# How long a plan stays in the in-memory layer (seconds)
+PLAN_CACHE_TTL = float(os.getenv("PLAN_CACHE_TTL", "3600"))
+PLAN_CACHE_SIZE = int(os.getenv("PLAN_CACHE_SIZE", "256"))
+# How long a persisted plan is served before it is regenerated (seconds)
+PLAN_CACHE_MAX_AGE = float(os.getenv("PLAN_CACHE_MAX_AGE", str(30 * 24 * 3600)))
+
+
+def normalize_skill(skill_name: str) -> str:
+    """Cache key for a skill: "  Guitar " and "guitar" share one plan."""
+    return " ".join(skill_name.casefold().split())
+
+
+class PlanCache:
+    """
+    Two-level cache of generated learning plans keyed by normalized skill.
+
+    An in-memory LRU with TTL sits in front of the local SQLite store, which
+    keeps plans across restarts. Values are `LearningPlanResponse` dicts
+    (same shape as guitar_plan.json).
+    """
+
+    def __init__(self):
+        self._memory = TTLCache(maxsize=PLAN_CACHE_SIZE, ttl=PLAN_CACHE_TTL)
+        self._stats = {"memory_hits": 0, "store_hits": 0, "misses": 0, "writes": 0}
+        with local_store() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS plan_cache ("
+                " skill_key TEXT PRIMARY KEY,"
+                " plan_json TEXT NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+
+    def get(self, skill_name: str) -> Optional[Dict[str, Any]]:
+        key = normalize_skill(skill_name)
+
+        plan = self._memory.get(key)
+        if plan is not None:
+            self._stats["memory_hits"] += 1
+            return plan
+
+        with local_store() as conn:
+            row = conn.execute(
+                "SELECT plan_json FROM plan_cache WHERE skill_key = ? AND created_at > ?",
+                (key, time.time() - PLAN_CACHE_MAX_AGE),
+            ).fetchone()
+
+        if row is None:
+            self._stats["misses"] += 1
+            return None
+
+        plan = json.loads(row[0])
+        self._memory.set(key, plan)
+        self._stats["store_hits"] += 1
+        return plan
+
+    def set(self, skill_name: str, plan: Dict[str, Any]) -> None:
+        key = normalize_skill(skill_name)
+        with local_store() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO plan_cache (skill_key, plan_json, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(plan), time.time()),
+            )
+        self._memory.set(key, plan)
+        self._stats["writes"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._stats, "memory_size": len(self._memory)}
+
+
+plan_cache = PlanCache()
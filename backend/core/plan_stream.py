@@ -0,0 +1,85 @@
+import json
+from typing import List, Tuple
+
+from pydantic import BaseModel, ValidationError
+
+from schemas.learning_plan import DayPlan, WeeklyMilestone
+
+# Top-level arrays of LearningPlanResponse and the event/model for their items
+_ARRAY_ITEMS = {
+    "weeklyMilestones": ("milestone", WeeklyMilestone),
+    "days": ("day", DayPlan),
+}
+
+
+class PlanStreamParser:
+    """
+    Incrementally extract completed milestones and days from a streamed plan.
+
+    Feed it LLM tokens as they arrive; every time an object inside the
+    top-level `weeklyMilestones` or `days` array is closed and validates, it
+    is returned as `(event, model)`. Text outside the outer JSON object
+    (e.g. markdown fences) is ignored. The full text stays available in
+    `text` for the final, authoritative parse.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_key = None
+        self._item_start = None
+        self._offset = 0
+
+    @property
+    def text(self) -> str:
+        return self._buffer
+
+    def feed(self, chunk: str) -> List[Tuple[str, BaseModel]]:
+        self._buffer += chunk
+        buffer = self._buffer
+
+        completed = []
+        for i in range(self._offset, len(buffer)):
+            c = buffer[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    # Strings directly inside the outer object are its keys
+                    if self._stack == ["{"]:
+                        self._last_key = buffer[self._string_start + 1:i]
+                continue
+
+            if c == '"' and self._stack:
+                self._in_string = True
+                self._string_start = i
+            elif c in "{[":
+                if c == "{" and self._stack == ["{", "["]:
+                    self._item_start = i
+                self._stack.append(c)
+            elif c in "}]" and self._stack:
+                self._stack.pop()
+                if c == "}" and self._stack == ["{", "["] and self._item_start is not None:
+                    item = self._parse_item(buffer[self._item_start:i + 1])
+                    if item is not None:
+                        completed.append(item)
+                    self._item_start = None
+
+        self._offset = len(buffer)
+        return completed
+
+    def _parse_item(self, raw: str):
+        event, model = _ARRAY_ITEMS.get(self._last_key, (None, None))
+        if model is None:
+            return None
+        try:
+            return event, model.model_validate(json.loads(raw))
+        except (ValueError, ValidationError):
+            return None
@@ -0,0 +1,58 @@
+import os
+from typing import Dict, Optional
+
+from core.cache import TTLCache
+
+# Profiles change rarely (profile edits, win/loss updates), so they can be
+# served from memory for a while; writes through the API invalidate them.
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", "300"))
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "50000"))
+
+
+class ProfileCache:
+    """
+    Shared profile cache keyed by id, with a username -> id index.
+
+    The backend only needs TTLCache's `get`/`set`/`delete`, so a shared
+    store (e.g. Redis) can be plugged in with `set_backend` to keep several
+    workers consistent.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or TTLCache(maxsize=PROFILE_CACHE_SIZE, ttl=PROFILE_CACHE_TTL)
+        self.invalidations = 0
+
+    def get(self, user_id: str) -> Optional[dict]:
+        return self.backend.get(f"id:{user_id}")
+
+    def get_by_username(self, username: str) -> Optional[dict]:
+        username = username.lower()
+        user_id = self.backend.get(f"username:{username}")
+        if user_id is None:
+            return None
+        profile = self.get(user_id)
+        # The index may outlive a rename; only trust it if it still matches
+        if profile is None or profile["username"] != username:
+            return None
+        return profile
+
+    def set(self, profile: dict) -> None:
+        self.backend.set(f"id:{profile['id']}", profile)
+        self.backend.set(f"username:{profile['username']}", str(profile["id"]))
+
+    def invalidate(self, user_id: str) -> None:
+        profile = self.get(user_id)
+        self.backend.delete(f"id:{user_id}")
+        if profile is not None:
+            self.backend.delete(f"username:{profile['username']}")
+        self.invalidations += 1
+
+    def set_backend(self, backend) -> None:
+        self.backend = backend
+
+    def stats(self) -> Dict[str, int]:
+        stats = self.backend.stats() if hasattr(self.backend, "stats") else {}
+        return {**stats, "invalidations": self.invalidations}
+
+
+profile_cache = ProfileCache()
@@ -15,3 +15,22 @@ Output your response in this exact JSON structure:
 
 Don't add any text outside of the JSON structure.
 """
+
+
+SKILL_SUGGESTION_SYSTEM_PROMPT = (
+    "You are a wildly creative skill discovery assistant for an app "
+    "where people learn new skills in 30 days. Your job is to suggest "
+    "{count} skills that are each:\n"
+    "- Unique and surprising (avoid common/obvious suggestions)\n"
+    "- Specific (not vague like 'cooking' - instead 'Thai curry from scratch')\n"
+    "- Achievable in 30 days of daily practice\n"
+    "- From ANY domain imaginable - arts, sports, tech, crafts, music, "
+    "science, languages, games, survival, performance, anything\n"
+    "- DIFFERENT from every other skill in the list\n\n"
+    "Never repeat yourself. Always surprise the user with something "
+    "they would never have thought of."
+    "{avoid_clause}\n\n"
+    "Respond with ONLY a valid JSON array:\n"
+    '[{{ "skill_name": "Short Skill Name", "description": "One sentence why this is fun and doable in 30 days." }}, ...]\n'
+    "No markdown, no code blocks, no extra text."
+)
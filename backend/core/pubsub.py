@@ -0,0 +1,91 @@
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Tuple
+
+# Per-subscriber buffer; a client that falls this far behind drops events and
+# resyncs from the REST endpoints on its next read.
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class Broker(ABC):
+    """
+    Per-user pub/sub channel used to push events to connected clients.
+
+    `publish` may be called from any thread (sync route handlers run in the
+    threadpool); `subscribe` is used from the event loop.
+    """
+
+    @abstractmethod
+    def publish(self, user_id: str, event: str, data: dict) -> None:
+        ...
+
+    @abstractmethod
+    def subscribe(self, user_id: str):
+        ...
+
+    def stats(self) -> Dict[str, int]:
+        return {}
+
+
+class InMemoryBroker(Broker):
+    """
+    In-process broker. Only reaches clients connected to this worker, which
+    is enough for a single-process deployment and for local runs/tests.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"published": 0, "delivered": 0, "dropped": 0}
+
+    def publish(self, user_id: str, event: str, data: dict) -> None:
+        with self._lock:
+            targets = list(self._subscribers.get(str(user_id), ()))
+            self._stats["published"] += 1
+        for loop, queue in targets:
+            loop.call_soon_threadsafe(self._deliver, queue, (event, data))
+
+    def _deliver(self, queue: asyncio.Queue, item: tuple) -> None:
+        try:
+            queue.put_nowait(item)
+            self._stats["delivered"] += 1
+        except asyncio.QueueFull:
+            self._stats["dropped"] += 1
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: str) -> AsyncIterator[asyncio.Queue]:
+        entry = (asyncio.get_running_loop(), asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE))
+        with self._lock:
+            self._subscribers.setdefault(str(user_id), []).append(entry)
+        try:
+            yield entry[1]
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(str(user_id), [])
+                if entry in subscribers:
+                    subscribers.remove(entry)
+                if not subscribers:
+                    self._subscribers.pop(str(user_id), None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                **self._stats,
+                "connected_users": len(self._subscribers),
+                "connections": sum(len(s) for s in self._subscribers.values()),
+            }
+
+
+_broker: Broker = InMemoryBroker()
+
+
+def get_broker() -> Broker:
+    return _broker
+
+
+def set_broker(broker: Broker) -> None:
+    """Swap the broker, e.g. for a shared one when running several workers."""
+    global _broker
+    _broker = broker
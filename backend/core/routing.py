@@ -0,0 +1,35 @@
+import logging
+
+import httpx
+from fastapi.routing import APIRoute
+
+from core.supabase_client import reset_supabase_pool
+
+logger = logging.getLogger(__name__)
+
+# Requests that can safely run twice
+_RETRYABLE_METHODS = {"GET", "HEAD"}
+
+
+class StaleConnectionRetryRoute(APIRoute):
+    """
+    Route that retries a read once on fresh Supabase clients when a pooled
+    connection turns out to be stale (httpx.TransportError), so the user
+    doesn't see the error. Writes aren't retried; they still get the 503
+    from main.supabase_transport_error.
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def retrying_handler(request):
+            try:
+                return await handler(request)
+            except httpx.TransportError:
+                if request.method not in _RETRYABLE_METHODS:
+                    raise
+                logger.warning("Stale Supabase connection on %s %s, retrying", request.method, request.url.path)
+                reset_supabase_pool()
+                return await handler(request)
+
+        return retrying_handler
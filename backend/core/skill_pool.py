@@ -0,0 +1,202 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from typing import Dict, Iterable, List, Optional
+
+from langchain_core.prompts import ChatPromptTemplate
+from opik import track
+
+from core.concurrency import llm_slots
+from core.llm import get_llm
+from core.local_store import local_store
+from core.plan_cache import normalize_skill
+from core.prompts import SKILL_SUGGESTION_SYSTEM_PROMPT
+from core.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Suggestions generated per LLM call
+SKILL_POOL_BATCH_SIZE = int(os.getenv("SKILL_POOL_BATCH_SIZE", "25"))
+# Refill in the background once fewer unserved suggestions than this remain
+SKILL_POOL_LOW_WATER = int(os.getenv("SKILL_POOL_LOW_WATER", "50"))
+# Stop refilling once this many unserved suggestions are available
+SKILL_POOL_TARGET = int(os.getenv("SKILL_POOL_TARGET", "150"))
+# Seconds after being served that a suggestion goes back into rotation
+SKILL_POOL_REUSE_AFTER = float(os.getenv("SKILL_POOL_REUSE_AFTER", "604800"))
+# Suggestions requested when the pool can't serve one and the LLM is asked directly
+_DIRECT_BATCH_SIZE = 5
+# Recently generated names passed to the LLM so it doesn't repeat them
+_AVOID_SAMPLE_SIZE = 60
+
+_suggest_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system", SKILL_SUGGESTION_SYSTEM_PROMPT),
+        ("human", "Surprise me with {count} skills to learn! (variation: {seed})"),
+    ]
+)
+
+
+@track(name="suggest_skill_llm_call")
+async def _call_ai_for_skills(count: int, avoid: List[str]) -> List[dict]:
+    """Tracked LLM call generating a batch of skill suggestions."""
+    avoid_clause = ""
+    if avoid:
+        avoid_clause = (
+            f"\n\nIMPORTANT: These skills were already suggested, "
+            f"so do NOT suggest any of them: {', '.join(avoid)}."
+        )
+
+    async with llm_slots:
+        response = await get_llm("suggest").ainvoke(
+            _suggest_prompt.invoke({
+                "count": count,
+                "avoid_clause": avoid_clause,
+                "seed": random.randint(1, 100000),
+            })
+        )
+    content = response.content.strip()
+
+    # Handle potential markdown code blocks just in case
+    if content.startswith("```"):
+        content = content.split("\n", 1)[1].rsplit("```", 1)[0].strip()
+
+    suggestions = []
+    for item in json.loads(content):
+        skill_name = str(item.get("skill_name", "")).strip()
+        description = str(item.get("description", "")).strip()
+        if skill_name and description:
+            suggestions.append({"skill_name": skill_name, "description": description})
+
+    if not suggestions:
+        raise ValueError("AI returned no usable skill suggestions")
+
+    return suggestions
+
+
+class SkillSuggestionPool:
+    """
+    Locally stored pool of pre-generated "surprise me" skill suggestions.
+
+    Suggestions are generated in batches and de-duplicated by normalized
+    skill name. Each one is handed out once per SKILL_POOL_REUSE_AFTER:
+    unserved suggestions go first, and served ones return to rotation after
+    that window, so the pool never runs dry for good. It refills itself in
+    the background when it runs low.
+    """
+
+    def __init__(self):
+        self._refill_task: Optional[asyncio.Task] = None
+        self._batches = SingleFlight()
+        self._stats = {"served": 0, "llm_calls": 0, "generated": 0, "duplicates": 0, "empty": 0, "direct": 0}
+        with local_store() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS skill_suggestions ("
+                " skill_key TEXT PRIMARY KEY,"
+                " skill_name TEXT NOT NULL,"
+                " description TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " served_at REAL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS skill_suggestions_unserved_idx"
+                " ON skill_suggestions(served_at)"
+            )
+
+    def available(self) -> int:
+        with local_store() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM skill_suggestions WHERE served_at IS NULL OR served_at < ?",
+                (time.time() - SKILL_POOL_REUSE_AFTER,),
+            ).fetchone()[0]
+
+    def take(self, exclude: Iterable[str] = ()) -> Optional[Dict[str, str]]:
+        """Serve one random available suggestion whose skill is not in `exclude`."""
+        excluded = {normalize_skill(s) for s in exclude}
+        with local_store() as conn:
+            rows = conn.execute(
+                "SELECT skill_key, skill_name, description FROM skill_suggestions"
+                " WHERE served_at IS NULL OR served_at < ?"
+                " ORDER BY served_at IS NOT NULL, RANDOM() LIMIT ?",
+                (time.time() - SKILL_POOL_REUSE_AFTER, len(excluded) + 1),
+            ).fetchall()
+            row = next((r for r in rows if r[0] not in excluded), None)
+            if row is not None:
+                conn.execute(
+                    "UPDATE skill_suggestions SET served_at = ? WHERE skill_key = ?",
+                    (time.time(), row[0]),
+                )
+
+        if row is None:
+            self._stats["empty"] += 1
+            return None
+        self._stats["served"] += 1
+        return {"skill_name": row[1], "description": row[2]}
+
+    def _add(self, suggestions: List[dict]) -> int:
+        added = 0
+        now = time.time()
+        with local_store() as conn:
+            for s in suggestions:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO skill_suggestions"
+                    " (skill_key, skill_name, description, created_at) VALUES (?, ?, ?, ?)",
+                    (normalize_skill(s["skill_name"]), s["skill_name"], s["description"], now),
+                )
+                added += cursor.rowcount
+        self._stats["generated"] += added
+        self._stats["duplicates"] += len(suggestions) - added
+        return added
+
+    def _recent_names(self) -> List[str]:
+        with local_store() as conn:
+            rows = conn.execute(
+                "SELECT skill_name FROM skill_suggestions ORDER BY created_at DESC LIMIT ?",
+                (_AVOID_SAMPLE_SIZE,),
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    async def _generate_batch(self) -> int:
+        self._stats["llm_calls"] += 1
+        recent = await asyncio.to_thread(self._recent_names)
+        suggestions = await _call_ai_for_skills(SKILL_POOL_BATCH_SIZE, recent)
+        return await asyncio.to_thread(self._add, suggestions)
+
+    async def suggest_direct(self, exclude: Iterable[str] = ()) -> Optional[Dict[str, str]]:
+        """Ask the LLM for a suggestion outside the pool (when it can't serve one)."""
+        exclude = list(exclude)
+        excluded = {normalize_skill(s) for s in exclude}
+        self._stats["llm_calls"] += 1
+        self._stats["direct"] += 1
+        suggestions = await _call_ai_for_skills(_DIRECT_BATCH_SIZE, exclude)
+        return next((s for s in suggestions if normalize_skill(s["skill_name"]) not in excluded), None)
+
+    async def refill_once(self) -> int:
+        """Generate one batch (shared with any batch already in flight)."""
+        return await self._batches.do("batch", self._generate_batch)
+
+    async def _refill(self) -> None:
+        # The pool lives in SQLite, so reads run off the event loop
+        try:
+            if await asyncio.to_thread(self.available) >= SKILL_POOL_LOW_WATER:
+                return
+            while await asyncio.to_thread(self.available) < SKILL_POOL_TARGET:
+                if await self.refill_once() == 0:
+                    # The LLM is only repeating itself; try again on a later refill
+                    break
+        except Exception:
+            logger.exception("Skill suggestion pool refill failed")
+
+    def ensure_refill(self) -> None:
+        """Start a background refill (a no-op unless the pool is low) if none is running."""
+        if self._refill_task is not None and not self._refill_task.done():
+            return
+        self._refill_task = asyncio.create_task(self._refill())
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._stats, "available": self.available()}
+
+
+skill_pool = SkillSuggestionPool()
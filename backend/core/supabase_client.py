@@ -1,4 +1,8 @@
 import os
+import threading
+import time
+from typing import Dict, List, Optional
+
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
@@ -13,11 +17,165 @@ if not _url or not _key:
         "Set SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY in .env"
     )
 
+# Number of long-lived clients handed out round-robin. Each client keeps its
+# own keep-alive HTTP/2 connection pool, so a handful spreads concurrent
+# requests without opening a connection per call.
+POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", "4"))
+# Recycle a client that has been idle this long (seconds). Restrictive networks
+# (school/corporate WiFi, NAT gateways) silently drop idle connections, which
+# is what used to surface as stale HTTP/2 errors.
+MAX_IDLE_SECONDS = float(os.getenv("SUPABASE_POOL_MAX_IDLE", "60"))
+# Hard upper bound on a client's lifetime (seconds).
+MAX_AGE_SECONDS = float(os.getenv("SUPABASE_POOL_MAX_AGE", "900"))
+# Replaced clients may still be serving requests on other threads; their
+# connections are closed once this outlasts the PostgREST request timeout.
+RETIRE_GRACE_SECONDS = 130.0
+
+
+class _PooledClient:
+    __slots__ = ("client", "created_at", "last_used", "broken")
+
+    def __init__(self, client: Client):
+        now = time.monotonic()
+        self.client = client
+        self.created_at = now
+        self.last_used = now
+        self.broken = False
+
+    def is_healthy(self, now: float) -> bool:
+        return (
+            not self.broken
+            and now - self.last_used < MAX_IDLE_SECONDS
+            and now - self.created_at < MAX_AGE_SECONDS
+        )
+
+
+def _close(client: Client) -> None:
+    """Close the HTTP sessions held by a client's auth/postgrest/storage/functions sub-clients."""
+    # Only auth is created eagerly; the others exist once they've been used
+    sessions = [
+        getattr(client.auth, "_http_client", None),
+        getattr(client._postgrest, "session", None),
+        getattr(client._storage, "session", None),
+        getattr(client._functions, "_client", None),
+    ]
+    for session in sessions:
+        if session is not None:
+            try:
+                session.close()
+            except Exception:
+                pass
+
+
+class SupabasePool:
+    """
+    Process-wide pool of Supabase clients.
+
+    Clients are reused across requests so the HTTP connection, TLS session and
+    auth/postgrest sub-clients are only set up once. A client is replaced when
+    it has been idle or alive for too long, or after a transport error was
+    reported through `mark_broken`. Replaced clients' connections are
+    closed after RETIRE_GRACE_SECONDS.
+    """
+
+    def __init__(self, size: int = POOL_SIZE):
+        self._size = max(1, size)
+        self._slots: List[Optional[_PooledClient]] = [None] * self._size
+        self._next = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "checkouts": 0,
+            "hits": 0,
+            "creates": 0,
+            "reconnects": 0,
+            "closed": 0,
+        }
+
+    def checkout(self) -> Client:
+        with self._lock:
+            index = self._next
+            self._next = (self._next + 1) % self._size
+            slot = self._slots[index]
+            now = time.monotonic()
+            self._stats["checkouts"] += 1
+            if slot is not None and slot.is_healthy(now):
+                self._stats["hits"] += 1
+                slot.last_used = now
+                return slot.client
+
+        # Build the replacement outside the lock so other checkouts aren't held up
+        fresh = _PooledClient(create_client(_url, _key))
+        with self._lock:
+            current = self._slots[index]
+            if current is not slot:
+                # Another thread replaced it first; drop the unused client
+                current.last_used = now
+                _close(fresh.client)
+                return current.client
+            self._slots[index] = fresh
+            self._stats["creates"] += 1
+            if slot is not None:
+                self._stats["reconnects"] += 1
+
+        if slot is not None:
+            self._retire(slot.client)
+        return fresh.client
+
+    def _retire(self, client: Client) -> None:
+        """Close a replaced client once requests still using it have had time to finish."""
+        timer = threading.Timer(RETIRE_GRACE_SECONDS, self._close_retired, args=(client,))
+        timer.daemon = True
+        timer.start()
+
+    def _close_retired(self, client: Client) -> None:
+        _close(client)
+        with self._lock:
+            self._stats["closed"] += 1
+
+    def mark_broken(self, client: Client) -> None:
+        """Flag a client so it is rebuilt on next checkout."""
+        with self._lock:
+            for slot in self._slots:
+                if slot is not None and slot.client is client:
+                    slot.broken = True
+
+    def mark_all_broken(self) -> None:
+        """Flag every client, e.g. when the network changed under all of them."""
+        with self._lock:
+            for slot in self._slots:
+                if slot is not None:
+                    slot.broken = True
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = self._size
+            stats["open"] = sum(1 for s in self._slots if s is not None)
+            return stats
+
+
+_pool = SupabasePool()
+
 
 def get_supabase() -> Client:
     """
-    Create a fresh Supabase client for each request.
-    This avoids stale HTTP/2 connections being reused after network drops
-    (common on restrictive networks like school/corporate WiFi).
+    Get a pooled Supabase client.
+    Connections are kept alive and reused; stale clients are recycled
+    automatically (see SupabasePool).
     """
-    return create_client(_url, _key)
+    return _pool.checkout()
+
+
+def reset_supabase(client: Client) -> None:
+    """Force `client` to reconnect, e.g. after a dropped HTTP/2 connection."""
+    _pool.mark_broken(client)
+
+
+def reset_supabase_pool() -> None:
+    """Force every pooled client to reconnect."""
+    _pool.mark_all_broken()
+
+
+def get_pool_stats() -> Dict[str, float]:
+    """Pool metrics: hits, creates, reconnects and closed clients."""
+    return _pool.stats()
@@ -0,0 +1,108 @@
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+
+from core.cache import TTLCache
+
+# How often a user's counter is re-checked against the notifications table
+# (seconds). Bounds the drift from races or writes made outside this app.
+UNREAD_RECONCILE_INTERVAL = float(os.getenv("UNREAD_RECONCILE_INTERVAL", "300"))
+# Max users whose counters are kept in memory (least recently used dropped first)
+UNREAD_COUNTER_SIZE = int(os.getenv("UNREAD_COUNTER_SIZE", "50000"))
+
+
+class CounterBackend(ABC):
+    """Storage for per-user counters. `incr` leaves missing keys missing."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[int]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: int) -> None:
+        ...
+
+    @abstractmethod
+    def incr(self, key: str, delta: int) -> None:
+        ...
+
+
+class InMemoryCounterBackend(CounterBackend):
+    """
+    Process-local counters (one set per uvicorn worker). Counters expire
+    with the reconcile interval, after which they'd be recounted anyway.
+    """
+
+    def __init__(self):
+        self._values = TTLCache(maxsize=UNREAD_COUNTER_SIZE, ttl=UNREAD_RECONCILE_INTERVAL)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[int]:
+        return self._values.get(key)
+
+    def set(self, key: str, value: int) -> None:
+        self._values.set(key, value)
+
+    def incr(self, key: str, delta: int) -> None:
+        with self._lock:
+            value = self._values.get(key)
+            if value is not None:
+                self._values.set(key, max(0, value + delta))
+
+
+class UnreadCounters:
+    """
+    Maintained per-user unread notification counts.
+
+    Counters are adjusted as notifications are created and read, so reading
+    one is O(1). A counter is (re)built from a count query the first time it
+    is needed and at most every UNREAD_RECONCILE_INTERVAL afterwards.
+    """
+
+    def __init__(self, backend: Optional[CounterBackend] = None):
+        self.backend = backend or InMemoryCounterBackend()
+        # Users recounted within the last UNREAD_RECONCILE_INTERVAL
+        self._reconciled = TTLCache(maxsize=UNREAD_COUNTER_SIZE, ttl=UNREAD_RECONCILE_INTERVAL)
+        self._stats = {"hits": 0, "recounts": 0}
+
+    def get(self, supabase, user_id: str) -> int:
+        user_id = str(user_id)
+        value = self.backend.get(user_id)
+
+        if value is not None and self._reconciled.get(user_id):
+            self._stats["hits"] += 1
+            return value
+
+        result = (
+            supabase.table("notifications")
+            .select("id", count="exact")
+            .eq("user_id", user_id)
+            .eq("read", False)
+            .execute()
+        )
+        value = result.count or 0
+        self.backend.set(user_id, value)
+        self._reconciled.set(user_id, True)
+        self._stats["recounts"] += 1
+        return value
+
+    def increment(self, user_id: str, by: int = 1) -> None:
+        self.backend.incr(str(user_id), by)
+
+    def decrement(self, user_id: str, by: int = 1) -> None:
+        self.backend.incr(str(user_id), -by)
+
+    def reset(self, user_id: str) -> None:
+        self.backend.set(str(user_id), 0)
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._stats, "tracked": len(self._reconciled)}
+
+
+unread_counters = UnreadCounters()
+
+
+def set_counter_backend(backend: CounterBackend) -> None:
+    """Use a shared backend (e.g. Redis) so all workers see the same counts."""
+    unread_counters.backend = backend
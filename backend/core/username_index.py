@@ -0,0 +1,109 @@
+import bisect
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from core.background import overlap_start, pull_since, start_refresher
+from core.supabase_client import get_supabase
+
+# Seconds between pulls of profiles created since the last build/refresh
+# (catches sign-ups handled by other workers)
+USERNAME_INDEX_REFRESH = float(os.getenv("USERNAME_INDEX_REFRESH", "60"))
+_PAGE_SIZE = 1000
+
+
+class UsernameIndex:
+    """
+    Sorted in-memory index of usernames for prefix search.
+
+    Usernames (stored lowercase) and their profile ids live in two parallel
+    sorted lists, so a prefix lookup is a bisect plus a short scan. The index
+    is built once in the background and then kept current incrementally;
+    `ready` is False until the first build finishes.
+    """
+
+    def __init__(self):
+        self._names: List[str] = []
+        self._ids: List[str] = []
+        self._lock = threading.Lock()
+        self._high_water: Optional[str] = None
+        self.ready = False
+        self._stats = {"searches": 0, "builds": 0, "refreshes": 0, "added": 0}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def search(self, prefix: str, limit: int, exclude_id: Optional[str] = None) -> List[str]:
+        """Ids of up to `limit` users whose username starts with `prefix`."""
+        prefix = prefix.lower()
+        matches = []
+        with self._lock:
+            i = bisect.bisect_left(self._names, prefix)
+            while i < len(self._names) and len(matches) < limit and self._names[i].startswith(prefix):
+                if self._ids[i] != exclude_id:
+                    matches.append(self._ids[i])
+                i += 1
+        self._stats["searches"] += 1
+        return matches
+
+    def add(self, user_id: str, username: str) -> None:
+        username = username.lower()
+        with self._lock:
+            i = bisect.bisect_left(self._names, username)
+            if i < len(self._names) and self._names[i] == username:
+                self._ids[i] = str(user_id)
+                return
+            self._names.insert(i, username)
+            self._ids.insert(i, str(user_id))
+        self._stats["added"] += 1
+
+    def _load(self, rows: List[Tuple[str, str]]) -> None:
+        rows.sort()
+        with self._lock:
+            self._names = [name for name, _ in rows]
+            self._ids = [user_id for _, user_id in rows]
+
+    def build(self, supabase=None) -> None:
+        """Load every username, paging through the table in username order."""
+        supabase = supabase or get_supabase()
+        rows: List[Tuple[str, str]] = []
+        high_water = None
+        last = None
+        while True:
+            query = supabase.table("profiles").select("id, username, created_at").order("username").limit(_PAGE_SIZE)
+            if last is not None:
+                query = query.gt("username", last)
+            page = query.execute().data or []
+            for p in page:
+                rows.append((p["username"].lower(), str(p["id"])))
+                if p.get("created_at") and (high_water is None or p["created_at"] > high_water):
+                    high_water = p["created_at"]
+            if len(page) < _PAGE_SIZE:
+                break
+            last = page[-1]["username"]
+
+        self._load(rows)
+        self._high_water = high_water
+        self.ready = True
+        self._stats["builds"] += 1
+
+    def refresh(self, supabase=None) -> None:
+        """Add profiles created since the last build/refresh, re-reading the REFRESH_OVERLAP window."""
+        supabase = supabase or get_supabase()
+        since = overlap_start(self._high_water) if self._high_water else None
+        rows = pull_since(lambda: supabase.table("profiles").select("id, username, created_at"), "created_at", since)
+        for p in rows:
+            self.add(p["id"], p["username"])
+        if rows and (self._high_water is None or rows[-1]["created_at"] > self._high_water):
+            self._high_water = rows[-1]["created_at"]
+        self._stats["refreshes"] += 1
+
+    def start(self) -> None:
+        """Build, then refresh every USERNAME_INDEX_REFRESH seconds, in a background thread."""
+        start_refresher(self, "username index", USERNAME_INDEX_REFRESH)
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._stats, "size": len(self), "ready": self.ready}
+
+
+username_index = UsernameIndex()
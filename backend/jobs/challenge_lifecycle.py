@@ -0,0 +1,109 @@
+"""
+Challenge lifecycle job.
+
+Expires pending challenges whose response deadline has passed and completes
+active challenges past their deadline (winner, participants' stats), in
+batches of LIFECYCLE_BATCH rows (see `expire_pending_challenges` and
+`complete_due_challenges` in supabase_schema.sql). Runs every
+LIFECYCLE_INTERVAL seconds inside the API, or on demand:
+
+    python -m jobs.challenge_lifecycle
+"""
+import argparse
+import logging
+import os
+from typing import Dict, List, Optional
+
+from core.feed_cache import friends_feed_cache
+from core.leaderboard import leaderboard
+from core.notifications import dispatcher, notify
+from core.profile_cache import profile_cache
+from core.supabase_client import get_supabase
+from jobs.runner import Job
+
+logger = logging.getLogger(__name__)
+
+LIFECYCLE_BATCH = int(os.getenv("LIFECYCLE_BATCH", "500"))
+# Seconds between in-app runs; 0 disables the background task
+LIFECYCLE_INTERVAL = float(os.getenv("LIFECYCLE_INTERVAL", "60"))
+# Upper bound on batches per step and run
+MAX_BATCHES_PER_RUN = 100
+
+job = Job("Challenge lifecycle", LIFECYCLE_INTERVAL, totals=("expired", "completed"))
+
+
+def _on_completed(rows: List[dict]) -> None:
+    """Refresh caches and the leaderboard and tell both participants how it ended."""
+    if rows:
+        try:
+            leaderboard.reload({user_id for row in rows for user_id in (row["challenger_id"], row["opponent_id"])})
+        except Exception:
+            # The next leaderboard refresh catches up; still notify below
+            logger.exception("Reloading leaderboard stats failed")
+
+    for row in rows:
+        participants = (row["challenger_id"], row["opponent_id"])
+        for user_id in participants:
+            profile_cache.invalidate(user_id)
+            friends_feed_cache.invalidate_source(user_id)
+
+        for user_id in participants:
+            if row["winner_id"] is None:
+                title, message = "Challenge ended in a draw", "You both put in the same number of days."
+            elif str(row["winner_id"]) == str(user_id):
+                title, message = "You won the challenge! 🏆", "You completed more days than your opponent."
+            else:
+                title, message = "Challenge over", "Your opponent completed more days this time."
+            notify(
+                user_id=user_id,
+                type="challenge_completed",
+                title=title,
+                message=message,
+                data={"challenge_id": row["challenge_id"], "winner_id": row["winner_id"]},
+            )
+
+
+def run_lifecycle(batch_size: Optional[int] = None) -> Dict[str, float]:
+    """Run one expiry + completion pass and return what it did."""
+    batch_size = batch_size or LIFECYCLE_BATCH
+    supabase = get_supabase()
+
+    with job.track() as result:
+        result.update(expired=0, completed=0)
+        for _ in range(MAX_BATCHES_PER_RUN):
+            expired = supabase.rpc("expire_pending_challenges", {"batch_size": batch_size}).execute().data or 0
+            result["expired"] += expired
+            if expired < batch_size:
+                break
+
+        for _ in range(MAX_BATCHES_PER_RUN):
+            rows = supabase.rpc("complete_due_challenges", {"batch_size": batch_size}).execute().data or []
+            result["completed"] += len(rows)
+            _on_completed(rows)
+            if len(rows) < batch_size:
+                break
+
+    return result
+
+
+async def run_periodically() -> None:
+    """Background task started from the API's lifespan."""
+    await job.run_periodically(run_lifecycle)
+
+
+def get_lifecycle_stats() -> Dict[str, float]:
+    return job.stats()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Expire and complete due challenges.")
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+
+    job.run_once(lambda: run_lifecycle(args.batch_size))
+    # Write out the completion notifications before exiting
+    dispatcher.stop()
+
+
+if __name__ == "__main__":
+    main()
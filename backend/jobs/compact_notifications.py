@@ -0,0 +1,84 @@
+"""
+Notification retention job.
+
+Deletes read notifications older than NOTIFY_RETENTION_DAYS, or beyond each
+user's newest NOTIFY_KEEP_PER_USER read ones, NOTIFY_COMPACT_BATCH users per
+call (see `compact_notifications` in supabase_schema.sql). A pass over all
+users resumes where the last run stopped and only one worker runs it at a
+time. Runs every NOTIFY_COMPACT_INTERVAL seconds inside the API, or on
+demand:
+
+    python -m jobs.compact_notifications [--max-age-days N] [--keep N]
+"""
+import argparse
+import os
+from typing import Dict, Optional
+
+from core.supabase_client import get_supabase
+from jobs.runner import Job
+
+NOTIFY_RETENTION_DAYS = int(os.getenv("NOTIFY_RETENTION_DAYS", "30"))
+NOTIFY_KEEP_PER_USER = int(os.getenv("NOTIFY_KEEP_PER_USER", "200"))
+# Users handled per database call
+NOTIFY_COMPACT_BATCH = int(os.getenv("NOTIFY_COMPACT_BATCH", "1000"))
+# Seconds between in-app runs; 0 disables the background task
+NOTIFY_COMPACT_INTERVAL = float(os.getenv("NOTIFY_COMPACT_INTERVAL", "3600"))
+# Upper bound on calls per run, so one run can't hold the database for long;
+# an unfinished pass continues on the next run
+MAX_BATCHES_PER_RUN = 100
+
+job = Job("Notification compaction", NOTIFY_COMPACT_INTERVAL, totals=("deleted",))
+
+
+def compact_notifications(
+    max_age_days: Optional[int] = None,
+    keep_per_user: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    pass_interval: Optional[float] = None,
+) -> Dict[str, float]:
+    """Run (or continue) a compaction pass and return what it did."""
+    params = {
+        "max_age_days": NOTIFY_RETENTION_DAYS if max_age_days is None else max_age_days,
+        "keep_per_user": NOTIFY_KEEP_PER_USER if keep_per_user is None else keep_per_user,
+        "batch_size": batch_size or NOTIFY_COMPACT_BATCH,
+        # A new pass over all users starts at most once per interval
+        "pass_interval_seconds": int(max(NOTIFY_COMPACT_INTERVAL if pass_interval is None else pass_interval, 0)),
+    }
+    supabase = get_supabase()
+
+    with job.track() as result:
+        result.update(deleted=0, batches=0, status=None)
+        while result["batches"] < MAX_BATCHES_PER_RUN:
+            row = supabase.rpc("compact_notifications", params).execute().data[0]
+            result["batches"] += 1
+            result["deleted"] += row["deleted"]
+            result["status"] = row["status"]
+            # 'busy': another worker is compacting; 'idle': a pass finished recently
+            if row["status"] != "more":
+                break
+
+    return result
+
+
+async def run_periodically() -> None:
+    """Background task started from the API's lifespan."""
+    await job.run_periodically(compact_notifications, run_at_start=False)
+
+
+def get_compaction_stats() -> Dict[str, float]:
+    return job.stats()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Delete old read notifications.")
+    parser.add_argument("--max-age-days", type=int, default=None)
+    parser.add_argument("--keep", type=int, default=None, help="read notifications kept per user")
+    parser.add_argument("--batch-size", type=int, default=None, help="users per database call")
+    args = parser.parse_args()
+
+    # On demand, start a new pass even if one finished recently
+    job.run_once(lambda: compact_notifications(args.max_age_days, args.keep, args.batch_size, pass_interval=0))
+
+
+if __name__ == "__main__":
+    main()
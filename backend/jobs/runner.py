@@ -0,0 +1,63 @@
+import asyncio
+import json
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """
+    Run bookkeeping and the in-app schedule shared by the jobs.
+
+    A run fills the dict yielded by `track()` as it goes: every key becomes a
+    `last_run_<key>` stat, and the keys in `totals` are also summed across
+    runs. What a run managed to do is recorded even when it fails partway.
+    """
+
+    def __init__(self, name: str, interval: float, totals: Iterable[str] = ()):
+        self.name = name
+        # Seconds between in-app runs; 0 disables the background task
+        self.interval = interval
+        self._totals = tuple(totals)
+        self._stats: Dict[str, Any] = {"runs": 0, "failures": 0, **{key: 0 for key in self._totals}}
+
+    @contextmanager
+    def track(self) -> Iterator[Dict[str, Any]]:
+        result: Dict[str, Any] = {}
+        started = time.perf_counter()
+        try:
+            yield result
+        except Exception:
+            self._stats["failures"] += 1
+            raise
+        finally:
+            result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            self._stats["runs"] += 1
+            for key, value in result.items():
+                if key in self._totals:
+                    self._stats[key] += value
+                self._stats["last_run_ms" if key == "elapsed_ms" else f"last_run_{key}"] = value
+
+    async def run_periodically(self, run: Callable[[], Any], run_at_start: bool = True) -> None:
+        """Background task started from the API's lifespan: `run` in a thread every `interval` seconds."""
+        if self.interval <= 0:
+            return
+        if not run_at_start:
+            await asyncio.sleep(self.interval)
+        while True:
+            try:
+                await asyncio.to_thread(run)
+            except Exception:
+                logger.exception("%s run failed", self.name)
+            await asyncio.sleep(self.interval)
+
+    def run_once(self, run: Callable[[], Dict[str, Any]]) -> None:
+        """Run on demand from the command line and print what the run did."""
+        logging.basicConfig(level=logging.INFO)
+        print(json.dumps(run()))
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self._stats)
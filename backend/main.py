@@ -1,16 +1,57 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+import httpx
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from opik import configure as configure_opik
 
-from routers import agent, profiles, challenges, friends, notifications
+from core.activity import activity_counts
+from core.agent import plan_flights
+from core.auth import get_auth_stats
+from core.feed_cache import friends_feed_cache
+from core.friendships import get_friendship_cache_stats
+from core.leaderboard import leaderboard
+from core.llm import close_llm_clients, init_llm_clients
+from core.notifications import dispatcher
+from core.plan_cache import plan_cache
+from core.profile_cache import profile_cache
+from core.pubsub import get_broker
+from core.skill_pool import skill_pool
+from core.supabase_client import get_pool_stats, reset_supabase_pool
+from core.unread_counter import unread_counters
+from core.username_index import username_index
+from jobs import challenge_lifecycle, compact_notifications
+from routers import agent, profiles, challenges, friends, notifications, leaderboards
 
 # Configure Opik for LLM observability/tracing
 configure_opik()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_llm_clients()
+    skill_pool.ensure_refill()
+    dispatcher.start()
+    username_index.start()
+    leaderboard.start()
+    background = [
+        asyncio.create_task(compact_notifications.run_periodically()),
+        asyncio.create_task(challenge_lifecycle.run_periodically()),
+    ]
+    yield
+    for task in background:
+        task.cancel()
+    await asyncio.to_thread(dispatcher.stop)
+    await close_llm_clients()
+
+
 app = FastAPI(
     title="SkillMaxxing API",
     description="Learn any skill in 30 days with multiplayer challenges",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -27,6 +68,20 @@ app.include_router(profiles.router)
 app.include_router(challenges.router)
 app.include_router(friends.router)
 app.include_router(notifications.router)
+app.include_router(leaderboards.router)
+
+
+@app.exception_handler(httpx.TransportError)
+async def supabase_transport_error(request: Request, exc: httpx.TransportError):
+    # A pooled connection was dropped mid-request (typically a stale HTTP/2
+    # connection after a network change). Rebuild the clients so the retry
+    # gets a fresh connection. The failing client isn't known here, and a
+    # network change usually leaves every connection stale.
+    reset_supabase_pool()
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database connection was reset, please retry"},
+    )
 
 
 @app.get("/")
@@ -39,6 +94,28 @@ def health_check() -> dict:
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+def metrics() -> dict:
+    return {
+        "supabase_pool": get_pool_stats(),
+        "auth": get_auth_stats(),
+        "plan_cache": plan_cache.stats(),
+        "plan_generation": plan_flights.stats(),
+        "skill_pool": skill_pool.stats(),
+        "notification_push": get_broker().stats(),
+        "unread_counters": unread_counters.stats(),
+        "friends_feed_cache": friends_feed_cache.stats(),
+        "profile_cache": profile_cache.stats(),
+        "friendship_cache": get_friendship_cache_stats(),
+        "username_index": username_index.stats(),
+        "notification_dispatch": dispatcher.stats(),
+        "notification_compaction": compact_notifications.get_compaction_stats(),
+        "challenge_lifecycle": challenge_lifecycle.get_lifecycle_stats(),
+        "leaderboard": leaderboard.stats(),
+        "activity_counts": activity_counts.stats(),
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -1,8 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends, Header
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends
+from collections import defaultdict
+from typing import Dict, List, Optional
 from datetime import datetime, timezone, timedelta
 import secrets
 import string
+from core.activity import activity_counts
+from core.auth import get_user_id
+from core.batching import chunks
+from core.checkins import CheckinError, record_checkin
+from core.feed_cache import friends_feed_cache
+from core.loaders import ProfileLoader, get_profile_loader
+from core.pagination import DEFAULT_PAGE_SIZE, build_page, clamp_limit, paginate
+from core.notifications import notify
+from core.routing import StaleConnectionRetryRoute
 from core.supabase_client import get_supabase
 from schemas.challenges import (
     ChallengeCreate,
@@ -13,56 +23,63 @@ from schemas.challenges import (
     ChallengeWithProgress,
     ChallengeStatus,
 )
+from schemas.pagination import Page
 
-router = APIRouter(prefix="/api/challenges", tags=["challenges"])
+router = APIRouter(prefix="/api/challenges", tags=["challenges"], route_class=StaleConnectionRetryRoute)
 
 
-def get_user_id(authorization: str = Header(...)) -> str:
-    """Extract user ID from the Authorization header (Bearer token)."""
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
-    
-    token = authorization.replace("Bearer ", "")
-    supabase = get_supabase()
-    
-    try:
-        user = supabase.auth.get_user(token)
-        if not user or not user.user:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        return user.user.id
-    except Exception as e:
-        raise HTTPException(status_code=401, detail=f"Authentication failed: {str(e)}")
+# challenge_progress columns returned to clients
+PROGRESS_COLUMNS = (
+    "id, challenge_id, user_id, skill_name, completed_days, total_days, "
+    "completion_percentage, last_checkin, total_checkins"
+)
+
+
+def get_progress_by_challenge_ids(supabase, challenge_ids: List[str]) -> Dict[str, List[dict]]:
+    """Helper to get progress rows for many challenges in one query, grouped by challenge ID."""
+    progress = defaultdict(list)
+    for chunk in chunks(challenge_ids):
+        result = supabase.table("challenge_progress")\
+            .select(PROGRESS_COLUMNS)\
+            .in_("challenge_id", chunk)\
+            .execute()
+        for p in result.data or []:
+            progress[p["challenge_id"]].append(p)
+    return progress
 
 
-def get_profile_by_id(supabase, user_id: str):
-    """Helper to get a profile by user ID."""
-    result = supabase.table("profiles").select("id, username, display_name, avatar_url").eq("id", user_id).execute()
-    return result.data[0] if result.data else None
+def _response_deadline_passed(ch: dict, now: datetime) -> bool:
+    """True for a pending challenge whose response deadline is in the past."""
+    if ch["status"] != "pending" or not ch.get("response_deadline"):
+        return False
+    try:
+        rd = datetime.fromisoformat(ch["response_deadline"].replace("Z", "+00:00"))
+    except (ValueError, TypeError):
+        return False
+    return rd < now
 
 
 @router.post("", response_model=ChallengeResponse)
 def create_challenge(
     challenge: ChallengeCreate,
-    user_id: str = Depends(get_user_id)
+    user_id: str = Depends(get_user_id),
+    loader: ProfileLoader = Depends(get_profile_loader),
 ):
     """Create a new challenge and send it to an opponent."""
     supabase = get_supabase()
     
     # Get challenger profile
-    challenger_profile = supabase.table("profiles").select("*").eq("id", user_id).execute()
-    if not challenger_profile.data:
+    challenger_profile = loader.load(user_id)
+    if not challenger_profile:
         raise HTTPException(status_code=400, detail="You must create a profile first")
     
     # Find opponent by username
-    opponent = supabase.table("profiles")\
-        .select("*")\
-        .eq("username", challenge.opponent_username.lower())\
-        .execute()
+    opponent = loader.load_by_username(challenge.opponent_username)
     
-    if not opponent.data:
+    if not opponent:
         raise HTTPException(status_code=404, detail=f"User @{challenge.opponent_username} not found")
     
-    opponent_id = opponent.data[0]["id"]
+    opponent_id = opponent["id"]
     
     if opponent_id == user_id:
         raise HTTPException(status_code=400, detail="You cannot challenge yourself")
@@ -97,70 +114,72 @@ def create_challenge(
     challenge_data = result.data[0]
     
     # Add profile info
-    challenge_data["challenger"] = get_profile_by_id(supabase, user_id)
-    challenge_data["opponent"] = opponent.data[0]
+    challenge_data["challenger"] = challenger_profile
+    challenge_data["opponent"] = opponent
     
     # Create notification for opponent
-    supabase.table("notifications").insert({
-        "user_id": opponent_id,
-        "type": "challenge_received",
-        "title": f"New challenge from @{challenger_profile.data[0]['username']}!",
-        "message": f"They want to challenge you to learn {challenge.opponent_skill}",
-        "data": {"challenge_id": challenge_data["id"]},
-    }).execute()
+    notify(
+        user_id=opponent_id,
+        type="challenge_received",
+        title=f"New challenge from @{challenger_profile['username']}!",
+        message=f"They want to challenge you to learn {challenge.opponent_skill}",
+        data={"challenge_id": challenge_data["id"]},
+    )
     
     return challenge_data
 
 
-@router.get("", response_model=List[ChallengeWithProgress])
+@router.get("", response_model=Page[ChallengeWithProgress])
 def get_my_challenges(
     status: str = None,
-    user_id: str = Depends(get_user_id)
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    user_id: str = Depends(get_user_id),
+    loader: ProfileLoader = Depends(get_profile_loader),
 ):
-    """Get all challenges for the current user."""
+    """Get the current user's challenges, newest first, one page at a time."""
     supabase = get_supabase()
+    limit = clamp_limit(limit)
     
     # Build query
-    query = supabase.table("challenges")\
-        .select("*")\
-        .or_(f"challenger_id.eq.{user_id},opponent_id.eq.{user_id}")\
-        .order("created_at", desc=True)
+    query = supabase.table("challenges").select("*")
     
     if status:
         query = query.eq("status", status)
     
+    query = paginate(
+        query, cursor, limit,
+        owner_filter=f"challenger_id.eq.{user_id},opponent_id.eq.{user_id}",
+    )
     result = query.execute()
+    rows = result.data or []
+    challenges = rows[:limit]
     
-    challenges_with_progress = []
+    if not challenges:
+        return build_page(rows, limit)
+
+    # Pending challenges past their response deadline are expired by the
+    # lifecycle job; show them as expired until it has run
     now = datetime.now(timezone.utc)
+    for ch in challenges:
+        if _response_deadline_passed(ch, now):
+            ch["status"] = "expired"
 
-    for ch in result.data or []:
-        # Auto-expire pending challenges past their response deadline
-        if ch["status"] == "pending" and ch.get("response_deadline"):
-            try:
-                rd = datetime.fromisoformat(ch["response_deadline"].replace("Z", "+00:00"))
-                if rd < now:
-                    supabase.table("challenges").update(
-                        {"status": "expired"}
-                    ).eq("id", ch["id"]).execute()
-                    ch["status"] = "expired"
-            except (ValueError, TypeError):
-                pass
-
-        # Get profiles
-        ch["challenger"] = get_profile_by_id(supabase, ch["challenger_id"])
-        ch["opponent"] = get_profile_by_id(supabase, ch["opponent_id"])
-        
-        # Get progress for both participants
-        progress_result = supabase.table("challenge_progress")\
-            .select("*")\
-            .eq("challenge_id", ch["id"])\
-            .execute()
+    # Hydrate profiles and progress for all challenges at once
+    profiles = loader.load_many(
+        [ch["challenger_id"] for ch in challenges] + [ch["opponent_id"] for ch in challenges]
+    )
+    progress_by_challenge = get_progress_by_challenge_ids(supabase, [ch["id"] for ch in challenges])
+    
+    challenges_with_progress = []
+    for ch in challenges:
+        ch["challenger"] = profiles.get(ch["challenger_id"])
+        ch["opponent"] = profiles.get(ch["opponent_id"])
         
         my_progress = None
         opponent_progress = None
         
-        for p in progress_result.data or []:
+        for p in progress_by_challenge.get(ch["id"], []):
             if p["user_id"] == user_id:
                 my_progress = p
             else:
@@ -172,13 +191,14 @@ def get_my_challenges(
             "opponent_progress": opponent_progress,
         })
     
-    return challenges_with_progress
+    return build_page(rows, limit, challenges_with_progress)
 
 
 @router.get("/{challenge_id}", response_model=ChallengeWithProgress)
 def get_challenge(
     challenge_id: str,
-    user_id: str = Depends(get_user_id)
+    user_id: str = Depends(get_user_id),
+    loader: ProfileLoader = Depends(get_profile_loader),
 ):
     """Get a specific challenge with progress."""
     supabase = get_supabase()
@@ -195,12 +215,13 @@ def get_challenge(
         raise HTTPException(status_code=403, detail="You are not part of this challenge")
     
     # Get profiles
-    ch["challenger"] = get_profile_by_id(supabase, ch["challenger_id"])
-    ch["opponent"] = get_profile_by_id(supabase, ch["opponent_id"])
+    profiles = loader.load_many([ch["challenger_id"], ch["opponent_id"]])
+    ch["challenger"] = profiles.get(ch["challenger_id"])
+    ch["opponent"] = profiles.get(ch["opponent_id"])
     
     # Get progress
     progress_result = supabase.table("challenge_progress")\
-        .select("*")\
+        .select(PROGRESS_COLUMNS)\
         .eq("challenge_id", challenge_id)\
         .execute()
     
@@ -224,7 +245,8 @@ def get_challenge(
 def respond_to_challenge(
     challenge_id: str,
     response: ChallengeAccept,
-    user_id: str = Depends(get_user_id)
+    user_id: str = Depends(get_user_id),
+    loader: ProfileLoader = Depends(get_profile_loader),
 ):
     """Accept or decline a challenge."""
     supabase = get_supabase()
@@ -244,17 +266,9 @@ def respond_to_challenge(
     if ch["status"] != ChallengeStatus.PENDING.value:
         raise HTTPException(status_code=400, detail="Challenge is no longer pending")
 
-    # Check if response deadline has passed
-    if ch.get("response_deadline"):
-        try:
-            rd = datetime.fromisoformat(ch["response_deadline"].replace("Z", "+00:00"))
-            if rd < datetime.now(timezone.utc):
-                supabase.table("challenges").update(
-                    {"status": "expired"}
-                ).eq("id", ch["id"]).execute()
-                raise HTTPException(status_code=400, detail="Response deadline has passed. This challenge has expired.")
-        except (ValueError, TypeError):
-            pass
+    # Check if response deadline has passed (the lifecycle job marks it expired)
+    if _response_deadline_passed(ch, datetime.now(timezone.utc)):
+        raise HTTPException(status_code=400, detail="Response deadline has passed. This challenge has expired.")
 
     new_status = ChallengeStatus.ACTIVE.value if response.accept else ChallengeStatus.DECLINED.value
     
@@ -279,28 +293,31 @@ def respond_to_challenge(
             }
         ]
         supabase.table("challenge_progress").insert(progress_data).execute()
+        friends_feed_cache.invalidate_source(ch["challenger_id"])
+        friends_feed_cache.invalidate_source(ch["opponent_id"])
         
         # Notify challenger
-        supabase.table("notifications").insert({
-            "user_id": ch["challenger_id"],
-            "type": "challenge_accepted",
-            "title": "Challenge accepted! 🎉",
-            "message": "Your challenge has been accepted. Game on!",
-            "data": {"challenge_id": challenge_id},
-        }).execute()
+        notify(
+            user_id=ch["challenger_id"],
+            type="challenge_accepted",
+            title="Challenge accepted! 🎉",
+            message="Your challenge has been accepted. Game on!",
+            data={"challenge_id": challenge_id},
+        )
     else:
         # Notify challenger of decline
-        supabase.table("notifications").insert({
-            "user_id": ch["challenger_id"],
-            "type": "challenge_declined",
-            "title": "Challenge declined",
-            "message": "Your challenge was declined.",
-            "data": {"challenge_id": challenge_id},
-        }).execute()
+        notify(
+            user_id=ch["challenger_id"],
+            type="challenge_declined",
+            title="Challenge declined",
+            message="Your challenge was declined.",
+            data={"challenge_id": challenge_id},
+        )
     
     updated = update_result.data[0]
-    updated["challenger"] = get_profile_by_id(supabase, ch["challenger_id"])
-    updated["opponent"] = get_profile_by_id(supabase, ch["opponent_id"])
+    profiles = loader.load_many([ch["challenger_id"], ch["opponent_id"]])
+    updated["challenger"] = profiles.get(ch["challenger_id"])
+    updated["opponent"] = profiles.get(ch["opponent_id"])
     
     return updated
 
@@ -312,78 +329,34 @@ def daily_checkin(
     user_id: str = Depends(get_user_id)
 ):
     """Record a daily check-in for a challenge."""
-    supabase = get_supabase()
-    
-    # Get challenge
-    challenge = supabase.table("challenges").select("*").eq("id", challenge_id).execute()
-    
-    if not challenge.data:
-        raise HTTPException(status_code=404, detail="Challenge not found")
-    
-    ch = challenge.data[0]
-    
-    if ch["status"] != ChallengeStatus.ACTIVE.value:
-        raise HTTPException(status_code=400, detail="Challenge is not active")
-    
-    # Get user's progress
-    progress = supabase.table("challenge_progress")\
-        .select("*")\
-        .eq("challenge_id", challenge_id)\
-        .eq("user_id", user_id)\
-        .execute()
-    
-    if not progress.data:
-        raise HTTPException(status_code=404, detail="Progress record not found")
-    
-    current = progress.data[0]
-    
-    # Update progress
-    completed_days = current["completed_days"] + (1 if checkin.completed else 0)
-    completion_percentage = (completed_days / current["total_days"]) * 100
-    
-    # Add to daily log
-    daily_log = current.get("daily_log") or []
-    daily_log.append({
-        "day": len(daily_log) + 1,
-        "completed": checkin.completed,
-        "notes": checkin.notes,
-        "date": datetime.now(timezone.utc).isoformat(),
-    })
-    
-    update_data = {
-        "completed_days": completed_days,
-        "completion_percentage": completion_percentage,
-        "last_checkin": datetime.now(timezone.utc).isoformat(),
-        "daily_log": daily_log,
-    }
-    
-    result = supabase.table("challenge_progress")\
-        .update(update_data)\
-        .eq("id", current["id"])\
-        .execute()
+    # Validate, append the check-in and update the aggregates in one
+    # database round trip (see record_checkin in supabase_schema.sql)
+    try:
+        recorded = record_checkin(challenge_id, user_id, checkin.completed, checkin.notes)
+    except CheckinError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    friends_feed_cache.invalidate_source(user_id)
+    if checkin.completed:
+        activity_counts.record(user_id, recorded["progress"]["skill_name"])
     
     # Notify opponent of progress
-    opponent_id = ch["opponent_id"] if ch["challenger_id"] == user_id else ch["challenger_id"]
-    user_profile = get_profile_by_id(supabase, user_id)
-    
-    supabase.table("notifications").insert({
-        "user_id": opponent_id,
-        "type": "opponent_progress",
-        "title": f"@{user_profile['username']} checked in!",
-        "message": f"Day {len(daily_log)} - {'Completed' if checkin.completed else 'Logged'}",
-        "data": {"challenge_id": challenge_id},
-    }).execute()
-    
-    # Check if challenge should complete (deadline passed or both at 100%)
-    # This could be moved to a background job
+    username = recorded["username"] or "Someone"
+    notify(
+        user_id=recorded["opponent_id"],
+        type="opponent_progress",
+        title=f"@{username} checked in!",
+        message=f"Day {recorded['day_number']} - {'Completed' if checkin.completed else 'Logged'}",
+        data={"challenge_id": challenge_id, "username": username},
+    )
     
-    return result.data[0]
+    return recorded["progress"]
 
 
 @router.post("/{challenge_id}/give-up")
 def give_up_challenge(
     challenge_id: str,
-    user_id: str = Depends(get_user_id)
+    user_id: str = Depends(get_user_id),
+    loader: ProfileLoader = Depends(get_profile_loader),
 ):
     """Give up on an active challenge. The opponent continues solo."""
     supabase = get_supabase()
@@ -421,18 +394,20 @@ def give_up_challenge(
         supabase.table("challenges").update(
             {"status": ChallengeStatus.CANCELLED.value}
         ).eq("id", challenge_id).execute()
+    friends_feed_cache.invalidate_source(user_id)
+    friends_feed_cache.invalidate_source(opponent_id)
 
     # Notify the opponent
-    user_profile = get_profile_by_id(supabase, user_id)
+    user_profile = loader.load(user_id)
     username = user_profile["username"] if user_profile else "Someone"
 
-    supabase.table("notifications").insert({
-        "user_id": opponent_id,
-        "type": "opponent_gave_up",
-        "title": f"@{username} gave up on the challenge",
-        "message": "You can continue learning on your own!",
-        "data": {"challenge_id": challenge_id},
-    }).execute()
+    notify(
+        user_id=opponent_id,
+        type="opponent_gave_up",
+        title=f"@{username} gave up on the challenge",
+        message="You can continue learning on your own!",
+        data={"challenge_id": challenge_id},
+    )
 
     return {"message": "You gave up on the challenge. Your opponent can continue."}
 
@@ -440,7 +415,8 @@ def give_up_challenge(
 @router.post("/{challenge_id}/withdraw")
 def withdraw_challenge(
     challenge_id: str,
-    user_id: str = Depends(get_user_id)
+    user_id: str = Depends(get_user_id),
+    loader: ProfileLoader = Depends(get_profile_loader),
 ):
     """Withdraw a pending challenge (only the challenger can do this)."""
     supabase = get_supabase()
@@ -463,14 +439,14 @@ def withdraw_challenge(
     ).eq("id", challenge_id).execute()
 
     # Notify opponent
-    user_profile = get_profile_by_id(supabase, user_id)
-    supabase.table("notifications").insert({
-        "user_id": ch["opponent_id"],
-        "type": "challenge_withdrawn",
-        "title": "Challenge withdrawn",
-        "message": f"@{user_profile['username']} withdrew their challenge",
-        "data": {"challenge_id": challenge_id},
-    }).execute()
+    user_profile = loader.load(user_id)
+    notify(
+        user_id=ch["opponent_id"],
+        type="challenge_withdrawn",
+        title="Challenge withdrawn",
+        message=f"@{user_profile['username']} withdrew their challenge",
+        data={"challenge_id": challenge_id},
+    )
 
     return {"message": "Challenge withdrawn"}
 
@@ -485,13 +461,14 @@ def _generate_invite_code(length=8):
 def create_challenge_link(
     challenge: ChallengeCreate,
     user_id: str = Depends(get_user_id),
+    loader: ProfileLoader = Depends(get_profile_loader),
 ):
     """Create a shareable challenge invite link. Anyone with the link can accept."""
     supabase = get_supabase()
 
     # Get creator profile
-    creator = supabase.table("profiles").select("*").eq("id", user_id).execute()
-    if not creator.data:
+    creator = loader.load(user_id)
+    if not creator:
         raise HTTPException(status_code=400, detail="You must create a profile first")
 
     if challenge.deadline <= datetime.now(timezone.utc):
@@ -546,6 +523,7 @@ def get_challenge_link(code: str, user_id: str = Depends(get_user_id)):
 def accept_challenge_link(
     code: str,
     user_id: str = Depends(get_user_id),
+    loader: ProfileLoader = Depends(get_profile_loader),
 ):
     """Accept a challenge invite link and create the challenge."""
     supabase = get_supabase()
@@ -589,16 +567,16 @@ def accept_challenge_link(
     }).eq("id", link["id"]).execute()
 
     # Notify the creator
-    user_profile = supabase.table("profiles").select("username").eq("id", user_id).single().execute()
-    username = user_profile.data["username"] if user_profile.data else "Someone"
-
-    supabase.table("notifications").insert({
-        "user_id": link["creator_id"],
-        "type": "challenge_link_accepted",
-        "title": "Challenge link accepted!",
-        "message": f"@{username} accepted your challenge invite",
-        "data": {"challenge_id": challenge_id},
-    }).execute()
+    user_profile = loader.load(user_id)
+    username = user_profile["username"] if user_profile else "Someone"
+
+    notify(
+        user_id=link["creator_id"],
+        type="challenge_link_accepted",
+        title="Challenge link accepted!",
+        message=f"@{username} accepted your challenge invite",
+        data={"challenge_id": challenge_id},
+    )
 
     return {
         "message": "Challenge created from invite link",
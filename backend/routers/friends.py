@@ -1,28 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Optional
 from datetime import datetime
 from uuid import UUID
+from core.auth import get_user_id
+from core.batching import chunks
+from core.feed_cache import friends_feed_cache
+from core.friendships import invalidate_friendships
+from core.loaders import ProfileLoader, get_profile_loader
+from core.pagination import DEFAULT_PAGE_SIZE, build_page, clamp_limit, paginate
+from core.notifications import notify
+from core.routing import StaleConnectionRetryRoute
 from core.supabase_client import get_supabase
+from schemas.pagination import Page
 
-router = APIRouter(prefix="/api/friends", tags=["friends"])
-
-def get_user_id(authorization: str = Header(...)) -> str:
-    """Extract user ID from the Authorization header (Bearer token)."""
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
-    
-    token = authorization.replace("Bearer ", "")
-    supabase = get_supabase()
-    
-    try:
-        # Verify the token and get user
-        user = supabase.auth.get_user(token)
-        if not user or not user.user:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        return user.user.id
-    except Exception as e:
-        raise HTTPException(status_code=401, detail=f"Authentication failed: {str(e)}")
+router = APIRouter(prefix="/api/friends", tags=["friends"], route_class=StaleConnectionRetryRoute)
 
 class FriendRequest(BaseModel):
     friend_id: UUID
@@ -38,65 +30,87 @@ class FriendResponse(BaseModel):
 class RequestAction(BaseModel):
     accept: bool
 
-@router.get("", response_model=List[FriendResponse])
-async def get_friends(user_id: str = Depends(get_user_id)):
+@router.get("", response_model=Page[FriendResponse])
+async def get_friends(
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    user_id: str = Depends(get_user_id),
+):
     supabase = get_supabase()
+    limit = clamp_limit(limit)
     
-    # Get all accepted friends
+    # Get accepted friends, newest friendships first
     # We need to check both user_id and friend_id columns because friendship is bidirectional
-    response = supabase.table("friends").select(
-        "id, status, user:user_id(id, username, display_name, avatar_url), friend:friend_id(id, username, display_name, avatar_url)"
-    ).or_(f"user_id.eq.{user_id},friend_id.eq.{user_id}").eq("status", "accepted").execute()
+    query = supabase.table("friends").select(
+        "id, status, created_at, user:user_id(id, username, display_name, avatar_url), friend:friend_id(id, username, display_name, avatar_url)"
+    ).eq("status", "accepted")
+    response = paginate(
+        query, cursor, limit, owner_filter=f"user_id.eq.{user_id},friend_id.eq.{user_id}"
+    ).execute()
     
+    rows = response.data or []
     friends = []
-    if response.data:
-        for item in response.data:
-            # Determine which side is the friend
-            # item['user'] is object, item['friend'] is object
-            # Supabase returns them as dictionaries
-            
-            # Since user_id is UUID string but response might have it as string too
-            u_id = item['user']['id']
-            
-            is_user_initiator = str(u_id) == str(user_id)
-            friend_data = item['friend'] if is_user_initiator else item['user']
-            
-            friends.append({
-                "id": friend_data['id'],
-                "username": friend_data['username'],
-                "display_name": friend_data['display_name'],
-                "avatar_url": friend_data['avatar_url'],
-                "status": item['status'],
-                "friendship_id": item['id']
-            })
+    for item in rows[:limit]:
+        # Determine which side is the friend
+        # item['user'] is object, item['friend'] is object
+        # Supabase returns them as dictionaries
+        
+        # Since user_id is UUID string but response might have it as string too
+        u_id = item['user']['id']
         
-    return friends
+        is_user_initiator = str(u_id) == str(user_id)
+        friend_data = item['friend'] if is_user_initiator else item['user']
+        
+        friends.append({
+            "id": friend_data['id'],
+            "username": friend_data['username'],
+            "display_name": friend_data['display_name'],
+            "avatar_url": friend_data['avatar_url'],
+            "status": item['status'],
+            "friendship_id": item['id']
+        })
+        
+    return build_page(rows, limit, friends)
 
-@router.get("/requests", response_model=List[FriendResponse])
-async def get_friend_requests(user_id: str = Depends(get_user_id)):
+@router.get("/requests", response_model=Page[FriendResponse])
+async def get_friend_requests(
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    from_user: Optional[UUID] = None,
+    user_id: str = Depends(get_user_id),
+):
     supabase = get_supabase()
+    limit = clamp_limit(limit)
     
     # Get pending requests where current user is the friend_id (receiver)
-    response = supabase.table("friends").select(
-        "id, status, user:user_id(id, username, display_name, avatar_url)"
-    ).eq("friend_id", user_id).eq("status", "pending").execute()
+    query = supabase.table("friends").select(
+        "id, status, created_at, user:user_id(id, username, display_name, avatar_url)"
+    ).eq("friend_id", user_id).eq("status", "pending")
+    if from_user:
+        # The request from one user (e.g. to answer it from its notification)
+        query = query.eq("user_id", str(from_user))
+    response = paginate(query, cursor, limit).execute()
     
+    rows = response.data or []
     requests = []
-    if response.data:
-        for item in response.data:
-            requests.append({
-                "id": item['user']['id'],
-                "username": item['user']['username'],
-                "display_name": item['user']['display_name'],
-                "avatar_url": item['user']['avatar_url'],
-                "status": item['status'],
-                "friendship_id": item['id']
-            })
+    for item in rows[:limit]:
+        requests.append({
+            "id": item['user']['id'],
+            "username": item['user']['username'],
+            "display_name": item['user']['display_name'],
+            "avatar_url": item['user']['avatar_url'],
+            "status": item['status'],
+            "friendship_id": item['id']
+        })
         
-    return requests
+    return build_page(rows, limit, requests)
 
 @router.post("", status_code=status.HTTP_201_CREATED)
-async def add_friend(request: FriendRequest, user_id: str = Depends(get_user_id)):
+async def add_friend(
+    request: FriendRequest,
+    user_id: str = Depends(get_user_id),
+    loader: ProfileLoader = Depends(get_profile_loader),
+):
     supabase = get_supabase()
     friend_id_str = str(request.friend_id)
     
@@ -122,26 +136,32 @@ async def add_friend(request: FriendRequest, user_id: str = Depends(get_user_id)
             "friend_id": friend_id_str,
             "status": "pending"
         }).execute()
+        invalidate_friendships(user_id, friend_id_str)
         
         # Get user info for notification
-        user_info = supabase.table("profiles").select("username").eq("id", user_id).single().execute()
-        username = user_info.data['username'] if user_info.data else "Someone"
+        user_info = loader.load(user_id)
+        username = user_info['username'] if user_info else "Someone"
         
         # Create notification for friend
-        supabase.table("notifications").insert({
-            "user_id": friend_id_str,
-            "type": "friend_request",
-            "title": "New Friend Request",
-            "message": f"@{username} sent you a friend request",
-            "data": {"requester_id": user_id}
-        }).execute()
+        notify(
+            user_id=friend_id_str,
+            type="friend_request",
+            title="New Friend Request",
+            message=f"@{username} sent you a friend request",
+            data={"requester_id": user_id},
+        )
         
         return result.data[0]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/{request_id}/respond")
-async def respond_to_request(request_id: UUID, action: RequestAction, user_id: str = Depends(get_user_id)):
+async def respond_to_request(
+    request_id: UUID,
+    action: RequestAction,
+    user_id: str = Depends(get_user_id),
+    loader: ProfileLoader = Depends(get_profile_loader),
+):
     supabase = get_supabase()
     req_id_str = str(request_id)
     
@@ -159,28 +179,30 @@ async def respond_to_request(request_id: UUID, action: RequestAction, user_id: s
             
         # Notify sender
         friendship = result.data[0]
+        friends_feed_cache.invalidate(user_id)
+        friends_feed_cache.invalidate(friendship['user_id'])
+        invalidate_friendships(user_id, friendship['user_id'])
         
         # Get user info for notification
-        user_info = supabase.table("profiles").select("username").eq("id", user_id).single().execute()
-        username = user_info.data['username'] if user_info.data else "Someone"
+        user_info = loader.load(user_id)
+        username = user_info['username'] if user_info else "Someone"
         
-        try:
-            supabase.table("notifications").insert({
-                "user_id": friendship['user_id'],
-                "type": "friend_accepted",
-                "title": "Friend Request Accepted",
-                "message": f"@{username} accepted your friend request",
-                "data": {"friend_id": user_id}
-            }).execute()
-        except:
-            pass # Notification failure shouldn't fail the request
+        notify(
+            user_id=friendship['user_id'],
+            type="friend_accepted",
+            title="Friend Request Accepted",
+            message=f"@{username} accepted your friend request",
+            data={"friend_id": user_id},
+        )
         
         return {"message": "Friend request accepted"}
     else:
         # Delete the request if declined
         result = supabase.table("friends").delete().eq("id", req_id_str).eq("friend_id", user_id).execute()
         
-        if not result.data:
+        if result.data:
+            invalidate_friendships(user_id, result.data[0]["user_id"])
+        else:
             # It might have been already deleted or not found
             # check if it exists at all
             existing = supabase.table("friends").select("id").eq("id", req_id_str).execute()
@@ -194,6 +216,10 @@ async def respond_to_request(request_id: UUID, action: RequestAction, user_id: s
 @router.get("/activity")
 async def get_friends_activity(user_id: str = Depends(get_user_id)):
     """Get active challenge skills from friends for the discover feed."""
+    cached = friends_feed_cache.get(user_id)
+    if cached is not None:
+        return cached
+
     supabase = get_supabase()
 
     # Get all accepted friends
@@ -201,48 +227,36 @@ async def get_friends_activity(user_id: str = Depends(get_user_id)):
         "user:user_id(id, username, display_name, avatar_url), friend:friend_id(id, username, display_name, avatar_url)"
     ).or_(f"user_id.eq.{user_id},friend_id.eq.{user_id}").eq("status", "accepted").execute()
 
-    if not friends_response.data:
-        return []
-
     # Collect friend IDs
-    friend_ids = []
     friend_map = {}
-    for item in friends_response.data:
+    for item in friends_response.data or []:
         u_id = item['user']['id']
         is_user_initiator = str(u_id) == str(user_id)
         friend_data = item['friend'] if is_user_initiator else item['user']
-        fid = str(friend_data['id'])
-        friend_ids.append(fid)
-        friend_map[fid] = friend_data
-
-    if not friend_ids:
-        return []
+        friend_map[str(friend_data['id'])] = friend_data
 
-    # Get active challenge progress for all friends
+    # Progress of all friends in active challenges, joined to the challenge
+    # status server-side instead of checked one challenge at a time
     activity = []
-    for fid in friend_ids:
+    for chunk in chunks(list(friend_map)):
         progress_result = supabase.table("challenge_progress")\
-            .select("skill_name, completed_days, total_days, challenge_id")\
-            .eq("user_id", fid)\
+            .select("user_id, skill_name, completed_days, total_days, challenges!inner(status)")\
+            .in_("user_id", chunk)\
+            .eq("challenges.status", "active")\
             .execute()
 
-        if not progress_result.data:
-            continue
-
-        for p in progress_result.data:
-            # Verify the challenge is active
-            ch = supabase.table("challenges").select("status").eq("id", p["challenge_id"]).execute()
-            if ch.data and ch.data[0]["status"] == "active":
-                friend_data = friend_map.get(fid, {})
-                activity.append({
-                    "username": friend_data.get("username", "unknown"),
-                    "display_name": friend_data.get("display_name"),
-                    "avatar_url": friend_data.get("avatar_url"),
-                    "skill_name": p["skill_name"],
-                    "completed_days": p["completed_days"],
-                    "total_days": p["total_days"],
-                })
+        for p in progress_result.data or []:
+            friend_data = friend_map.get(str(p["user_id"]), {})
+            activity.append({
+                "username": friend_data.get("username", "unknown"),
+                "display_name": friend_data.get("display_name"),
+                "avatar_url": friend_data.get("avatar_url"),
+                "skill_name": p["skill_name"],
+                "completed_days": p["completed_days"],
+                "total_days": p["total_days"],
+            })
 
+    friends_feed_cache.set(user_id, activity, sources=friend_map)
     return activity
 
 
@@ -257,5 +271,9 @@ async def remove_friend(friendship_id: UUID, user_id: str = Depends(get_user_id)
     
     if not result.data:
         raise HTTPException(status_code=404, detail="Friendship not found")
-        
+
+    friends_feed_cache.invalidate(result.data[0]["user_id"])
+    friends_feed_cache.invalidate(result.data[0]["friend_id"])
+    invalidate_friendships(result.data[0]["user_id"], result.data[0]["friend_id"])
+
     return {"message": "Friend removed"}
@@ -0,0 +1,60 @@
+from fastapi import APIRouter, HTTPException, Depends
+from typing import Optional
+from core.auth import get_user_id
+from core.friendships import get_friend_statuses
+from core.leaderboard import leaderboard
+from core.loaders import ProfileLoader, get_profile_loader
+from core.routing import StaleConnectionRetryRoute
+from core.supabase_client import get_supabase
+from schemas.challenges import LeaderboardResponse
+
+router = APIRouter(prefix="/api/leaderboard", tags=["leaderboard"], route_class=StaleConnectionRetryRoute)
+
+MAX_LEADERBOARD_LIMIT = 100
+
+
+@router.get("", response_model=LeaderboardResponse)
+def get_leaderboard(
+    scope: str = "global",
+    limit: int = 10,
+    user_id: str = Depends(get_user_id),
+    loader: ProfileLoader = Depends(get_profile_loader),
+):
+    """Top players by wins (globally or among friends) plus the current user's rank."""
+    if scope not in ("global", "friends"):
+        raise HTTPException(status_code=400, detail="scope must be 'global' or 'friends'")
+
+    if not leaderboard.ready:
+        raise HTTPException(status_code=503, detail="Leaderboard is still loading, please retry")
+
+    limit = max(1, min(limit, MAX_LEADERBOARD_LIMIT))
+
+    if scope == "global":
+        entries = leaderboard.top(limit)
+        me = leaderboard.rank_of(user_id)
+    else:
+        statuses = get_friend_statuses(get_supabase(), user_id)
+        friend_ids = [other_id for other_id, status in statuses.items() if status == "accepted"]
+        ranked = leaderboard.ranked(friend_ids + [str(user_id)])
+        entries = ranked[:limit]
+        me = next((e for e in ranked if e["user_id"] == str(user_id)), None)
+
+    # Names and avatars come from the profile cache, not the board
+    profiles = loader.load_many([e["user_id"] for e in entries] + ([me["user_id"]] if me else []))
+
+    def with_profile(entry: Optional[dict]) -> Optional[dict]:
+        profile = profiles.get(entry["user_id"]) if entry else None
+        if profile is None:
+            return None
+        return {
+            **entry,
+            "username": profile["username"],
+            "display_name": profile.get("display_name"),
+            "avatar_url": profile.get("avatar_url"),
+        }
+
+    return {
+        "scope": scope,
+        "entries": [e for e in map(with_profile, entries) if e is not None],
+        "me": with_profile(me),
+    }
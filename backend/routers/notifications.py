@@ -1,27 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, Header
+import asyncio
+import time
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Optional, Tuple
 from datetime import datetime
+from core.auth import STREAM_TICKET_TTL, bearer_token, get_user_id, issue_stream_ticket, redeem_stream_ticket
+from core.pagination import DEFAULT_PAGE_SIZE, build_page, clamp_limit, paginate
+from core.pubsub import get_broker
+from core.routing import StaleConnectionRetryRoute
+from core.sse import SSE_HEADERS, format_sse
 from core.supabase_client import get_supabase
+from core.unread_counter import unread_counters
+from schemas.pagination import Page
 
-router = APIRouter(prefix="/api/notifications", tags=["notifications"])
-
-
-def get_user_id(authorization: str = Header(...)) -> str:
-    """Extract user ID from the Authorization header (Bearer token)."""
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
+router = APIRouter(prefix="/api/notifications", tags=["notifications"], route_class=StaleConnectionRetryRoute)
 
-    token = authorization.replace("Bearer ", "")
-    supabase = get_supabase()
-
-    try:
-        user = supabase.auth.get_user(token)
-        if not user or not user.user:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        return user.user.id
-    except Exception as e:
-        raise HTTPException(status_code=401, detail=f"Authentication failed: {str(e)}")
+# Comment line sent on idle streams so proxies don't close the connection
+HEARTBEAT_SECONDS = 25
 
 
 class NotificationResponse(BaseModel):
@@ -38,24 +35,61 @@ class NotificationCount(BaseModel):
     unread: int
 
 
-@router.get("", response_model=List[NotificationResponse])
+class StreamTicket(BaseModel):
+    ticket: str
+    expires_in: float
+
+
+@router.get("", response_model=Page[NotificationResponse])
 async def get_notifications(
-    limit: int = 20,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
     user_id: str = Depends(get_user_id),
 ):
-    """Get notifications for the current user, newest first."""
+    """Get notifications for the current user, newest first, one page at a time."""
     supabase = get_supabase()
-
-    result = (
-        supabase.table("notifications")
-        .select("*")
-        .eq("user_id", user_id)
-        .order("created_at", desc=True)
-        .limit(limit)
-        .execute()
-    )
-
-    return result.data or []
+    limit = clamp_limit(limit)
+
+    query = supabase.table("notifications").select("*").eq("user_id", user_id)
+    result = paginate(query, cursor, limit).execute()
+
+    return build_page(result.data or [], limit)
+
+
+@router.post("/stream-ticket", response_model=StreamTicket)
+def create_stream_ticket(authorization: str = Header(...)):
+    """Get a short-lived, single-use ticket for opening the notification stream."""
+    return {"ticket": issue_stream_ticket(bearer_token(authorization)), "expires_in": STREAM_TICKET_TTL}
+
+
+@router.get("/stream")
+async def stream_notifications(session: Tuple[str, float] = Depends(redeem_stream_ticket)):
+    """
+    Server-sent events stream of new notifications for the current user,
+    opened with a ticket from POST /stream-ticket. Emits a `notification`
+    event with the notification row as it is created, and `expired` (then
+    closes) when the access token the ticket was issued for expires.
+    """
+    user_id, expires_at = session
+
+    async def events():
+        async with get_broker().subscribe(user_id) as queue:
+            yield format_sse("ready", {})
+            while True:
+                remaining = expires_at - time.time()
+                if remaining <= 0:
+                    yield format_sse("expired", {})
+                    return
+                try:
+                    event, data = await asyncio.wait_for(
+                        queue.get(), timeout=min(HEARTBEAT_SECONDS, remaining)
+                    )
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                yield format_sse(event, data)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
 
 
 @router.get("/unread-count", response_model=NotificationCount)
@@ -63,15 +97,7 @@ async def get_unread_count(user_id: str = Depends(get_user_id)):
     """Get the count of unread notifications."""
     supabase = get_supabase()
 
-    result = (
-        supabase.table("notifications")
-        .select("id", count="exact")
-        .eq("user_id", user_id)
-        .eq("read", False)
-        .execute()
-    )
-
-    return {"unread": result.count or 0}
+    return {"unread": unread_counters.get(supabase, user_id)}
 
 
 @router.post("/{notification_id}/read")
@@ -84,11 +110,23 @@ async def mark_as_read(notification_id: str, user_id: str = Depends(get_user_id)
         .update({"read": True})
         .eq("id", notification_id)
         .eq("user_id", user_id)
+        .eq("read", False)
         .execute()
     )
 
-    if not result.data:
-        raise HTTPException(status_code=404, detail="Notification not found")
+    if result.data:
+        unread_counters.decrement(user_id)
+    else:
+        # Nothing changed: either it was already read or it doesn't exist
+        existing = (
+            supabase.table("notifications")
+            .select("id")
+            .eq("id", notification_id)
+            .eq("user_id", user_id)
+            .execute()
+        )
+        if not existing.data:
+            raise HTTPException(status_code=404, detail="Notification not found")
 
     return {"message": "Notification marked as read"}
 
@@ -101,5 +139,6 @@ async def mark_all_as_read(user_id: str = Depends(get_user_id)):
     supabase.table("notifications").update({"read": True}).eq(
         "user_id", user_id
     ).eq("read", False).execute()
+    unread_counters.reset(user_id)
 
     return {"message": "All notifications marked as read"}
@@ -1,50 +1,50 @@
-from fastapi import APIRouter, HTTPException, Depends, Header
+import os
+from datetime import date, timedelta
+from fastapi import APIRouter, HTTPException, Depends
 from typing import List, Optional
+from core.activity import HEATMAP_DAYS, activity_counts, build_heatmap, load_day_counts, utc_today, window_start
+from core.auth import get_user_id
+from core.cache import TTLCache
+from core.friendships import get_friend_statuses
+from core.loaders import ProfileLoader, get_profile_loader
+from core.profile_cache import profile_cache
+from core.routing import StaleConnectionRetryRoute
 from core.supabase_client import get_supabase
+from core.username_index import username_index
 from schemas.challenges import (
+    ActivityHeatmapResponse,
     ProfileCreate,
     ProfileUpdate,
     ProfileResponse,
     ProfileSearchResult,
+    ProfileSummaryResponse,
 )
 
-router = APIRouter(prefix="/api/profiles", tags=["profiles"])
+router = APIRouter(prefix="/api/profiles", tags=["profiles"], route_class=StaleConnectionRetryRoute)
 
+# Profile fields embedded next to challenges
+PROFILE_SUMMARY_COLUMNS = "id, username, display_name, avatar_url"
 
-def get_user_id(authorization: str = Header(...)) -> str:
-    """Extract user ID from the Authorization header (Bearer token)."""
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
-    
-    token = authorization.replace("Bearer ", "")
-    supabase = get_supabase()
-    
-    try:
-        # Verify the token and get user
-        user = supabase.auth.get_user(token)
-        if not user or not user.user:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        return user.user.id
-    except Exception as e:
-        raise HTTPException(status_code=401, detail=f"Authentication failed: {str(e)}")
+# Seconds a search response is reused for the same user and prefix
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "10"))
+_search_cache = TTLCache(maxsize=20_000, ttl=SEARCH_CACHE_TTL)
 
 
 @router.post("", response_model=ProfileResponse)
 def create_profile(
     profile: ProfileCreate,
-    user_id: str = Depends(get_user_id)
+    user_id: str = Depends(get_user_id),
+    loader: ProfileLoader = Depends(get_profile_loader),
 ):
     """Create a profile for the authenticated user with a unique username."""
     supabase = get_supabase()
     
     # Check if username is taken
-    existing = supabase.table("profiles").select("id").eq("username", profile.username.lower()).execute()
-    if existing.data:
+    if loader.load_by_username(profile.username):
         raise HTTPException(status_code=400, detail="Username already taken")
     
     # Check if user already has a profile
-    existing_profile = supabase.table("profiles").select("id").eq("id", user_id).execute()
-    if existing_profile.data:
+    if loader.load(user_id):
         raise HTTPException(status_code=400, detail="Profile already exists")
     
     # Create profile
@@ -60,20 +60,45 @@ def create_profile(
     if not result.data:
         raise HTTPException(status_code=500, detail="Failed to create profile")
     
+    profile_cache.set(result.data[0])
+    username_index.add(user_id, data["username"])
     return result.data[0]
 
 
 @router.get("/me", response_model=Optional[ProfileResponse])
-def get_my_profile(user_id: str = Depends(get_user_id)):
+def get_my_profile(
+    user_id: str = Depends(get_user_id),
+    loader: ProfileLoader = Depends(get_profile_loader),
+):
     """Get the current user's profile."""
+    return loader.load(user_id)
+
+
+def _count(query) -> int:
+    return query.execute().count or 0
+
+
+@router.get("/me/summary", response_model=ProfileSummaryResponse)
+def get_my_summary(user_id: str = Depends(get_user_id)):
+    """Active challenge, friend and pending request counts for the current user."""
     supabase = get_supabase()
-    
-    result = supabase.table("profiles").select("*").eq("id", user_id).execute()
-    
-    if not result.data:
-        return None
-    
-    return result.data[0]
+    return {
+        "active_challenges": _count(
+            supabase.table("challenges").select("id", count="exact", head=True)
+            .eq("status", "active")
+            .or_(f"challenger_id.eq.{user_id},opponent_id.eq.{user_id}")
+        ),
+        "friends": _count(
+            supabase.table("friends").select("id", count="exact", head=True)
+            .eq("status", "accepted")
+            .or_(f"user_id.eq.{user_id},friend_id.eq.{user_id}")
+        ),
+        "friend_requests": _count(
+            supabase.table("friends").select("id", count="exact", head=True)
+            .eq("friend_id", user_id)
+            .eq("status", "pending")
+        ),
+    }
 
 
 @router.patch("/me", response_model=ProfileResponse)
@@ -90,10 +115,12 @@ def update_my_profile(
         raise HTTPException(status_code=400, detail="No fields to update")
     
     result = supabase.table("profiles").update(update_data).eq("id", user_id).execute()
+    profile_cache.invalidate(user_id)
     
     if not result.data:
         raise HTTPException(status_code=404, detail="Profile not found")
     
+    profile_cache.set(result.data[0])
     return result.data[0]
 
 
@@ -101,84 +128,86 @@ def update_my_profile(
 def search_profiles(
     q: str,
     limit: int = 10,
-    user_id: str = Depends(get_user_id)
+    user_id: str = Depends(get_user_id),
+    loader: ProfileLoader = Depends(get_profile_loader),
 ):
     """Search for users by username (for @tagging)."""
     if len(q) < 2:
         return []
     
     supabase = get_supabase()
+    prefix = q.lower()
+    limit = max(1, min(limit, 50))
     
-    # 1. Search profiles
-    result = supabase.table("profiles")\
-        .select("id, username, display_name, avatar_url")\
-        .ilike("username", f"{q.lower()}%")\
-        .neq("id", user_id)\
-        .limit(limit)\
-        .execute()
-        
-    profiles = result.data or []
-    if not profiles:
-        return []
-        
-    # 2. Get friendship statuses for these profiles
-    profile_ids = [p['id'] for p in profiles]
+    # Search-as-you-type repeats the same prefixes. A cached response is only
+    # reused while the friendship map it was built from is still current.
+    statuses = get_friend_statuses(supabase, user_id)
+    cache_key = (user_id, prefix, limit)
+    cached = _search_cache.get(cache_key)
+    if cached is not None and cached[0] is statuses:
+        return cached[1]
+    
+    # 1. Search profiles (in-memory index; the database until it has loaded)
+    if username_index.ready:
+        profiles = list(loader.load_many(username_index.search(prefix, limit, exclude_id=user_id)).values())
+        profiles.sort(key=lambda p: p["username"])
+    else:
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        result = supabase.table("profiles")\
+            .select("id, username, display_name, avatar_url")\
+            .like("username", f"{escaped}%")\
+            .neq("id", user_id)\
+            .order("username")\
+            .limit(limit)\
+            .execute()
+        profiles = result.data or []
     
-    # Check friendships where current user is involved
-    friendships = supabase.table("friends").select("user_id, friend_id, status").or_(
-        f"user_id.eq.{user_id},friend_id.eq.{user_id}"
-    ).in_("friend_id" if profiles[0]['id'] != user_id else "user_id", profile_ids).execute()
+    # 2. Add friendship status from the caller's cached friendship map
+    response = [
+        {
+            "id": p["id"],
+            "username": p["username"],
+            "display_name": p.get("display_name"),
+            "avatar_url": p.get("avatar_url"),
+            "friendStatus": statuses.get(str(p["id"])),
+        }
+        for p in profiles
+    ]
     
-    # Map status
-    friend_map = {}
-    for f in friendships.data:
-        other_id = f['friend_id'] if f['user_id'] == user_id else f['user_id']
-        friend_map[other_id] = f['status']
-        
-    # Add status to response
-    for p in profiles:
-        p['friendStatus'] = friend_map.get(p['id'], None)
-        
-    return profiles
+    _search_cache.set(cache_key, (statuses, response))
+    return response
 
 
 @router.get("/{username}", response_model=ProfileResponse)
 def get_profile_by_username(
     username: str,
-    user_id: str = Depends(get_user_id)
+    user_id: str = Depends(get_user_id),
+    loader: ProfileLoader = Depends(get_profile_loader),
 ):
     """Get a user's profile by username."""
-    supabase = get_supabase()
+    profile = loader.load_by_username(username)
     
-    result = supabase.table("profiles")\
-        .select("*")\
-        .eq("username", username.lower())\
-        .execute()
-    
-    if not result.data:
+    if not profile:
         raise HTTPException(status_code=404, detail="User not found")
     
-    return result.data[0]
+    return profile
 
 
 @router.get("/{username}/full")
 def get_full_profile(
     username: str,
-    user_id: str = Depends(get_user_id)
+    user_id: str = Depends(get_user_id),
+    loader: ProfileLoader = Depends(get_profile_loader),
 ):
     """Get a user's full profile including friendship status, skills they're learning, and shared challenges."""
     supabase = get_supabase()
 
     # Get the target profile
-    profile_result = supabase.table("profiles")\
-        .select("*")\
-        .eq("username", username.lower())\
-        .execute()
+    target = loader.load_by_username(username)
 
-    if not profile_result.data:
+    if not target:
         raise HTTPException(status_code=404, detail="User not found")
 
-    target = profile_result.data[0]
     target_id = target["id"]
     is_self = str(target_id) == str(user_id)
 
@@ -199,27 +228,24 @@ def get_full_profile(
     current_skills = []
     if is_friend or is_self:
         skills_result = supabase.table("challenge_progress")\
-            .select("skill_name, completed_days, total_days, completion_percentage, challenge_id")\
+            .select("skill_name, completed_days, total_days, completion_percentage, challenges!inner(status)")\
             .eq("user_id", target_id)\
+            .eq("challenges.status", "active")\
             .execute()
 
-        # Filter to only active challenges
-        if skills_result.data:
-            for s in skills_result.data:
-                ch = supabase.table("challenges").select("status").eq("id", s["challenge_id"]).execute()
-                if ch.data and ch.data[0]["status"] == "active":
-                    current_skills.append({
-                        "skill_name": s["skill_name"],
-                        "completed_days": s["completed_days"],
-                        "total_days": s["total_days"],
-                        "completion_percentage": float(s["completion_percentage"] or 0),
-                    })
-
-    # Get shared challenges - only if friends or self
+        for s in skills_result.data or []:
+            current_skills.append({
+                "skill_name": s["skill_name"],
+                "completed_days": s["completed_days"],
+                "total_days": s["total_days"],
+                "completion_percentage": float(s["completion_percentage"] or 0),
+            })
+
+    # Get shared challenges with both participants' profiles embedded - only if friends or self
     shared_challenges = []
     if is_friend or is_self:
         shared_result = supabase.table("challenges")\
-            .select("*")\
+            .select(f"*, challenger:challenger_id({PROFILE_SUMMARY_COLUMNS}), opponent:opponent_id({PROFILE_SUMMARY_COLUMNS})")\
             .or_(
                 f"and(challenger_id.eq.{user_id},opponent_id.eq.{target_id}),"
                 f"and(challenger_id.eq.{target_id},opponent_id.eq.{user_id})"
@@ -228,19 +254,7 @@ def get_full_profile(
             .limit(20)\
             .execute()
 
-        if shared_result.data:
-            for ch in shared_result.data:
-                # Add profile info
-                challenger_profile = supabase.table("profiles")\
-                    .select("id, username, display_name, avatar_url")\
-                    .eq("id", ch["challenger_id"]).execute()
-                opponent_profile = supabase.table("profiles")\
-                    .select("id, username, display_name, avatar_url")\
-                    .eq("id", ch["opponent_id"]).execute()
-
-                ch["challenger"] = challenger_profile.data[0] if challenger_profile.data else None
-                ch["opponent"] = opponent_profile.data[0] if opponent_profile.data else None
-                shared_challenges.append(ch)
+        shared_challenges = shared_result.data or []
 
     return {
         "profile": target,
@@ -252,6 +266,45 @@ def get_full_profile(
     }
 
 
+@router.get("/{username}/activity-heatmap", response_model=ActivityHeatmapResponse)
+def get_activity_heatmap(
+    username: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    skill: Optional[str] = None,
+    user_id: str = Depends(get_user_id),
+    loader: ProfileLoader = Depends(get_profile_loader),
+):
+    """Get a user's daily practice intensity for the contribution graph (friends or self only)."""
+    supabase = get_supabase()
+
+    target = loader.load_by_username(username)
+
+    if not target:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    target_id = str(target["id"])
+    if target_id != str(user_id) and get_friend_statuses(supabase, user_id).get(target_id) != "accepted":
+        raise HTTPException(status_code=403, detail="Only friends can see this activity")
+
+    # Defaults to the last 52 weeks, ending today (UTC days)
+    today = utc_today()
+    end = end or today
+    start = start or end - timedelta(weeks=52) + timedelta(days=1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if (end - start).days >= HEATMAP_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range can span at most {HEATMAP_DAYS} days")
+
+    # Recent ranges come from the cached per-day counts; older ones are read directly
+    if start >= window_start(today) and end <= today:
+        days = activity_counts.get(supabase, target_id)
+    else:
+        days = load_day_counts(supabase, target_id, start, end)
+
+    return build_heatmap(days, start, end, skill)
+
+
 @router.get("/check/{username}")
 def check_username_available(username: str):
     """Check if a username is available (no auth required)."""
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 
 
@@ -38,9 +38,19 @@ class ProfileResponse(BaseModel):
     bio: Optional[str] = None
     total_wins: int = 0
     total_losses: int = 0
+    total_draws: int = 0
+    current_streak: int = 0
+    best_streak: int = 0
     created_at: datetime
 
 
+class ProfileSummaryResponse(BaseModel):
+    """Counts shown next to the profile, so clients don't page through lists to count them."""
+    active_challenges: int
+    friends: int
+    friend_requests: int
+
+
 class ProfileSearchResult(BaseModel):
     id: str
     username: str
@@ -49,6 +59,14 @@ class ProfileSearchResult(BaseModel):
     friendStatus: Optional[str] = None  # 'accepted', 'pending', or None
 
 
+class ActivityHeatmapResponse(BaseModel):
+    start: date
+    end: date
+    levels: str  # One digit per day from start: intensity level 0-4
+    total: int  # Completed check-ins in the range
+    skills: List[str]  # Skills practiced in the range (for filtering)
+
+
 # ============================================
 # Challenge Schemas
 # ============================================
@@ -97,9 +115,34 @@ class ChallengeProgressResponse(BaseModel):
     total_days: int
     completion_percentage: float
     last_checkin: Optional[datetime] = None
+    total_checkins: int = 0
 
 
 class ChallengeWithProgress(BaseModel):
     challenge: ChallengeResponse
     my_progress: Optional[ChallengeProgressResponse] = None
     opponent_progress: Optional[ChallengeProgressResponse] = None
+
+
+# ============================================
+# Leaderboard Schemas
+# ============================================
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: str
+    username: str
+    display_name: Optional[str] = None
+    avatar_url: Optional[str] = None
+    wins: int = 0
+    losses: int = 0
+    draws: int = 0
+    current_streak: int = 0
+    best_streak: int = 0
+    completion_rate: float = 0  # % of challenge days completed
+
+
+class LeaderboardResponse(BaseModel):
+    scope: str  # 'global' or 'friends'
+    entries: List[LeaderboardEntry]
+    me: Optional[LeaderboardEntry] = None  # None until the user finishes a challenge
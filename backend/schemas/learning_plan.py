@@ -5,6 +5,7 @@ from pydantic import BaseModel, Field
 
 class LearningPlanRequest(BaseModel):
     skill_name: str = Field(..., min_length=1)
+    regenerate: bool = False  # Skip the plan cache and generate a fresh plan
 
 
 class Task(BaseModel):
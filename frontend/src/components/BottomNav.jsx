@@ -1,7 +1,8 @@
 import { NavLink, useNavigate } from 'react-router-dom'
 import { useState, useEffect } from 'react'
 import { Home, Compass, Swords, Users, User } from 'lucide-react'
-import { friendsApi } from '../lib/api'
+import { profileApi } from '../lib/api'
+import { subscribeToNotifications } from '../lib/notification-stream'
 import { useSkill } from '../lib/skill-context'
 
 export default function BottomNav() {
@@ -9,16 +10,21 @@ export default function BottomNav() {
     const { getActivePlan } = useSkill()
     const navigate = useNavigate()
 
+    // Refresh the pending-requests badge when notifications are pushed
     useEffect(() => {
         fetchPending()
-        const interval = setInterval(fetchPending, 30000)
-        return () => clearInterval(interval)
+        window.addEventListener('notifications-updated', fetchPending)
+        const unsubscribe = subscribeToNotifications()
+        return () => {
+            window.removeEventListener('notifications-updated', fetchPending)
+            unsubscribe()
+        }
     }, [])
 
     const fetchPending = async () => {
         try {
-            const requests = await friendsApi.getFriendRequests()
-            setPendingRequests(requests.length)
+            const summary = await profileApi.getMySummary()
+            setPendingRequests(summary.friend_requests)
         } catch {
             // silently fail
         }
@@ -1,31 +1,24 @@
-import { useMemo, useState } from 'react'
+import { useEffect, useMemo, useState } from 'react'
 import { BookOpen } from 'lucide-react'
+import { profileApi } from '../lib/api'
 
-// Generate activity data for skill checkins, optionally filtered by skill
-function generateActivityData(checkinsData = [], filterSkill = null) {
-    const today = new Date()
+// Lay out the server's per-day levels (one digit per day, oldest first) as
+// 52 weeks of 7 days
+function generateActivityData(heatmap) {
+    if (!heatmap) return []
+    const start = new Date(`${heatmap.start}T00:00:00Z`)
     const data = []
 
-    // Generate 52 weeks (1 year) of data
-    for (let week = 51; week >= 0; week--) {
+    for (let week = 0; week < 52; week++) {
         const weekData = []
         for (let day = 0; day < 7; day++) {
-            const date = new Date(today)
-            date.setDate(date.getDate() - (week * 7 + (6 - day)))
-
-            const dateStr = date.toISOString().split('T')[0]
-
-            // Count activity on this date, optionally filtered by skill
-            const activity = checkinsData.filter(c => {
-                const matchesDate = c.date?.startsWith(dateStr)
-                const matchesSkill = filterSkill ? c.skill_name === filterSkill : true
-                return matchesDate && matchesSkill
-            }).length
+            const index = week * 7 + day
+            const date = new Date(start)
+            date.setUTCDate(start.getUTCDate() + index)
 
             weekData.push({
-                date: dateStr,
-                count: activity,
-                level: activity === 0 ? 0 : activity === 1 ? 1 : activity === 2 ? 2 : activity >= 3 ? 3 : 4
+                date: date.toISOString().split('T')[0],
+                level: Number(heatmap.levels[index] || 0),
             })
         }
         data.push(weekData)
@@ -42,8 +35,21 @@ const LEVEL_COLORS = [
     'bg-emerald-800',  // Level 4 - high activity
 ]
 
-export default function ContributionGraph({ activeSkills = [], checkinsData = [] }) {
+const LEVEL_LABELS = ['No sessions', '1 session', '2 sessions', '3-4 sessions', '5+ sessions']
+
+export default function ContributionGraph({ username, activeSkills = [] }) {
     const [filterSkill, setFilterSkill] = useState(null) // null = "All"
+    const [heatmap, setHeatmap] = useState(null)
+
+    // Bucketed server-side; a year of activity is a few hundred bytes
+    useEffect(() => {
+        if (!username) return
+        let cancelled = false
+        profileApi.getActivityHeatmap(username, filterSkill)
+            .then(data => { if (!cancelled) setHeatmap(data) })
+            .catch(err => console.error('Failed to load activity:', err))
+        return () => { cancelled = true }
+    }, [username, filterSkill])
 
     // Deduplicate skill names from activeSkills (can be strings or objects)
     const skillNames = useMemo(() => {
@@ -51,24 +57,15 @@ export default function ContributionGraph({ activeSkills = [], checkinsData = []
         return [...new Set(names)]
     }, [activeSkills])
 
-    // Also collect unique skill names from checkins data for the filter chips
-    const checkinSkillNames = useMemo(() => {
-        const names = new Set()
-        checkinsData.forEach(c => {
-            if (c.skill_name) names.add(c.skill_name)
-        })
-        return [...names]
-    }, [checkinsData])
+    // Also include skills practiced in the range for the filter chips
+    const checkinSkillNames = useMemo(() => heatmap?.skills || [], [heatmap])
 
     // Merge skill names from both sources
     const allFilterableSkills = useMemo(() => {
         return [...new Set([...skillNames, ...checkinSkillNames])]
     }, [skillNames, checkinSkillNames])
 
-    const activityData = useMemo(
-        () => generateActivityData(checkinsData, filterSkill),
-        [checkinsData, filterSkill]
-    )
+    const activityData = useMemo(() => generateActivityData(heatmap), [heatmap])
 
     const months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
 
@@ -88,13 +85,10 @@ export default function ContributionGraph({ activeSkills = [], checkinsData = []
         return labels
     }, [activityData])
 
-    const totalContributions = useMemo(
-        () => activityData.flat().reduce((sum, day) => sum + day.count, 0),
-        [activityData]
-    )
+    const totalContributions = heatmap?.total || 0
 
     // Empty state: no skills and no checkins
-    const isEmpty = allFilterableSkills.length === 0 && checkinsData.length === 0
+    const isEmpty = allFilterableSkills.length === 0 && totalContributions === 0
 
     if (isEmpty) {
         return (
@@ -157,7 +151,7 @@ export default function ContributionGraph({ activeSkills = [], checkinsData = []
                             <div
                                 key={`${weekIndex}-${dayIndex}`}
                                 className={`w-2.5 h-2.5 rounded-sm ${LEVEL_COLORS[day.level]} transition-colors`}
-                                title={`${day.date}: ${day.count} session${day.count !== 1 ? 's' : ''}`}
+                                title={`${day.date}: ${LEVEL_LABELS[day.level]}`}
                             />
                         ))}
                     </div>
@@ -0,0 +1,15 @@
+export default function LoadMoreButton({ onClick, loading }) {
+    return (
+        <button
+            onClick={onClick}
+            disabled={loading}
+            className="w-full py-3 mt-4 bg-white border border-stone-200 rounded-xl text-sm font-medium text-stone-600 hover:bg-stone-50 transition-colors disabled:opacity-50 flex items-center justify-center"
+        >
+            {loading ? (
+                <div className="animate-spin rounded-full h-4 w-4 border-b-2 border-stone-400" />
+            ) : (
+                'Load more'
+            )}
+        </button>
+    )
+}
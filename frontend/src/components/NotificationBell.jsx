@@ -3,6 +3,7 @@ import { useNavigate } from 'react-router-dom'
 import { Bell, UserPlus, Swords, Check, X, Trophy, TrendingUp, Link as LinkIcon } from 'lucide-react'
 import { notificationsApi, friendsApi, challengeApi } from '../lib/api'
 import { broadcastNotificationUpdate } from '../lib/notification-sync'
+import { subscribeToNotifications } from '../lib/notification-stream'
 
 const ICON_MAP = {
     friend_request: UserPlus,
@@ -12,6 +13,7 @@ const ICON_MAP = {
     challenge_declined: X,
     challenge_link_accepted: LinkIcon,
     opponent_progress: TrendingUp,
+    challenge_completed: Trophy,
 }
 
 const COLOR_MAP = {
@@ -22,6 +24,7 @@ const COLOR_MAP = {
     challenge_declined: 'bg-red-100 text-red-600',
     challenge_link_accepted: 'bg-purple-100 text-purple-600',
     opponent_progress: 'bg-indigo-100 text-indigo-600',
+    challenge_completed: 'bg-amber-100 text-amber-600',
 }
 
 const ACTIONABLE_TYPES = ['friend_request', 'challenge_received']
@@ -36,11 +39,10 @@ export default function NotificationBell() {
     const dropdownRef = useRef(null)
     const navigate = useNavigate()
 
-    // Poll for unread count every 15 seconds
+    // Unread count is refreshed when the server pushes a new notification
     useEffect(() => {
         fetchUnreadCount()
-        const interval = setInterval(fetchUnreadCount, 15000)
-        return () => clearInterval(interval)
+        return subscribeToNotifications()
     }, [])
 
     // Listen for broadcast events from other components (SetupPage, ChallengesPage, FriendsPage)
@@ -133,6 +135,7 @@ export default function NotificationBell() {
             case 'challenge_declined':
             case 'challenge_link_accepted':
             case 'opponent_progress':
+            case 'challenge_completed':
                 navigate('/challenges')
                 break
             default:
@@ -146,8 +149,7 @@ export default function NotificationBell() {
         setActionLoading(notification.id + '-accept')
         try {
             const requesterId = notification.data?.requester_id
-            const requests = await friendsApi.getFriendRequests()
-            const req = requests.find(r => r.id === requesterId)
+            const req = await friendsApi.getFriendRequestFrom(requesterId)
             if (req) {
                 await friendsApi.respondToRequest(req.friendship_id, true)
                 setActedOn(prev => ({ ...prev, [notification.id]: 'accepted' }))
@@ -165,8 +167,7 @@ export default function NotificationBell() {
         setActionLoading(notification.id + '-decline')
         try {
             const requesterId = notification.data?.requester_id
-            const requests = await friendsApi.getFriendRequests()
-            const req = requests.find(r => r.id === requesterId)
+            const req = await friendsApi.getFriendRequestFrom(requesterId)
             if (req) {
                 await friendsApi.respondToRequest(req.friendship_id, false)
                 setActedOn(prev => ({ ...prev, [notification.id]: 'declined' }))
@@ -1,13 +1,15 @@
 import { useState, useEffect } from 'react'
 import { useNavigate } from 'react-router-dom'
 import { Trophy, Target, Flame, BookOpen, Swords, Settings } from 'lucide-react'
-import { profileApi, challengeApi } from '../lib/api'
+import { profileApi } from '../lib/api'
+import { useSkill } from '../lib/skill-context'
 import UserSearchInput from './UserSearchInput'
 
 export default function ProfileSidebar() {
     const [profile, setProfile] = useState(null)
-    const [stats, setStats] = useState({ wins: 0, active: 0, streak: 0, skills: 0 })
+    const [stats, setStats] = useState({ wins: 0, active: 0, streak: 0 })
     const [loading, setLoading] = useState(true)
+    const { allSkillNames } = useSkill()
     const navigate = useNavigate()
 
     useEffect(() => {
@@ -16,21 +18,16 @@ export default function ProfileSidebar() {
 
     const loadProfile = async () => {
         try {
-            const profileData = await profileApi.getMyProfile()
+            // Stats come from the profile totals and summary counts, not the challenge history
+            const [profileData, summary] = await Promise.all([
+                profileApi.getMyProfile(),
+                profileApi.getMySummary(),
+            ])
             setProfile(profileData)
-
-            // Load challenges to calculate stats
-            const challenges = await challengeApi.getMyChallenges()
-            const activeChallenges = challenges.filter(c => c.challenge.status === 'active')
-            const completedWins = challenges.filter(c =>
-                c.challenge.status === 'completed' && c.challenge.winner_id === profileData?.id
-            )
-
             setStats({
-                wins: profileData?.total_wins || completedWins.length,
-                active: activeChallenges.length,
-                streak: calculateStreak(challenges),
-                skills: countSkills(challenges),
+                wins: profileData?.total_wins || 0,
+                active: summary.active_challenges,
+                streak: profileData?.current_streak || 0,
             })
         } catch (err) {
             console.error('Failed to load profile:', err)
@@ -38,30 +35,6 @@ export default function ProfileSidebar() {
         setLoading(false)
     }
 
-    const calculateStreak = (challenges) => {
-        // Simple streak calculation based on recent activity
-        const activeChallenges = challenges.filter(c => c.challenge.status === 'active')
-        if (activeChallenges.length === 0) return 0
-
-        // Check if user has checked in today
-        const today = new Date().toDateString()
-        const hasCheckedInToday = activeChallenges.some(c =>
-            c.my_progress?.last_checkin && new Date(c.my_progress.last_checkin).toDateString() === today
-        )
-
-        return hasCheckedInToday ? Math.max(1, activeChallenges.length) : 0
-    }
-
-    const countSkills = (challenges) => {
-        const skills = new Set()
-        challenges.forEach(c => {
-            if (c.my_progress?.skill_name) {
-                skills.add(c.my_progress.skill_name)
-            }
-        })
-        return skills.size
-    }
-
     const handleUserSelect = (user) => {
         navigate(`/challenges/new?opponent=${user.username}`)
     }
@@ -117,7 +90,7 @@ export default function ProfileSidebar() {
                     </div>
                     <div className="bg-purple-50 rounded-xl p-3 text-center">
                         <BookOpen className="w-5 h-5 text-purple-600 mx-auto mb-1" />
-                        <p className="text-lg font-semibold text-stone-900">{stats.skills}</p>
+                        <p className="text-lg font-semibold text-stone-900">{allSkillNames.length}</p>
                         <p className="text-xs text-stone-500">Skills</p>
                     </div>
                 </div>
@@ -29,6 +29,16 @@ async function authFetch(endpoint, options = {}) {
     return response.json()
 }
 
+/**
+ * Build a query string from the given params, skipping empty values
+ */
+function buildQuery(params) {
+    const query = new URLSearchParams(
+        Object.entries(params).filter(([, value]) => value !== null && value !== undefined)
+    ).toString()
+    return query ? `?${query}` : ''
+}
+
 // ============================================
 // Profile API
 // ============================================
@@ -38,6 +48,11 @@ export const profileApi = {
         return authFetch('/profiles/me')
     },
 
+    // Active challenge, friend and pending request counts
+    async getMySummary() {
+        return authFetch('/profiles/me/summary')
+    },
+
     async createProfile(username, displayName, bio) {
         return authFetch('/profiles', {
             method: 'POST',
@@ -68,6 +83,10 @@ export const profileApi = {
     async getProfileByUsername(username) {
         return authFetch(`/profiles/${username}`)
     },
+
+    async getActivityHeatmap(username, skill = null) {
+        return authFetch(`/profiles/${username}/activity-heatmap${buildQuery({ skill })}`)
+    },
 }
 
 // ============================================
@@ -75,9 +94,8 @@ export const profileApi = {
 // ============================================
 
 export const challengeApi = {
-    async getMyChallenges(status = null) {
-        const query = status ? `?status=${status}` : ''
-        return authFetch(`/challenges${query}`)
+    async getMyChallengesPage(status = null, cursor = null, limit = 20) {
+        return authFetch(`/challenges${buildQuery({ status, cursor, limit })}`)
     },
 
     async getChallenge(challengeId) {
@@ -136,6 +154,47 @@ export const learningPlanApi = {
             body: JSON.stringify({ skill_name: skillName }),
         })
     },
+
+    /**
+     * Stream a plan as server-sent events. `onEvent(event, data)` is called for
+     * each `milestone` and `day` as it is generated; resolves with the full plan.
+     */
+    async streamPlan(skillName, onEvent = () => {}) {
+        const response = await fetch(`${API_BASE}/learning-plan/stream`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ skill_name: skillName }),
+        })
+
+        if (!response.ok) {
+            throw new Error(`Failed to generate plan (${response.status})`)
+        }
+
+        const reader = response.body.getReader()
+        const decoder = new TextDecoder()
+        let buffer = ''
+
+        while (true) {
+            const { done, value } = await reader.read()
+            if (done) break
+            buffer += decoder.decode(value, { stream: true })
+
+            let boundary
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const raw = buffer.slice(0, boundary)
+                buffer = buffer.slice(boundary + 2)
+
+                const event = raw.match(/^event: (.*)$/m)?.[1]
+                const data = JSON.parse(raw.match(/^data: (.*)$/m)?.[1] ?? 'null')
+
+                if (event === 'error') throw new Error(data?.detail || 'Failed to generate plan')
+                if (event === 'plan') return data
+                onEvent(event, data)
+            }
+        }
+
+        throw new Error('Plan stream ended unexpectedly')
+    },
 }
 
 // ============================================
@@ -143,12 +202,18 @@ export const learningPlanApi = {
 // ============================================
 
 export const friendsApi = {
-    async getMyFriends() {
-        return authFetch('/friends')
+    async getMyFriendsPage(cursor = null, limit = 20) {
+        return authFetch(`/friends${buildQuery({ cursor, limit })}`)
+    },
+
+    async getFriendRequestsPage(cursor = null, limit = 20) {
+        return authFetch(`/friends/requests${buildQuery({ cursor, limit })}`)
     },
 
-    async getFriendRequests() {
-        return authFetch('/friends/requests')
+    // The pending request from one user, or null
+    async getFriendRequestFrom(userId) {
+        const page = await authFetch(`/friends/requests${buildQuery({ from_user: userId, limit: 1 })}`)
+        return page.items[0] || null
     },
 
     async addFriend(userId) {
@@ -182,7 +247,12 @@ export const friendsApi = {
 
 export const notificationsApi = {
     async getNotifications(limit = 20) {
-        return authFetch(`/notifications?limit=${limit}`)
+        const page = await this.getNotificationsPage(null, limit)
+        return page.items
+    },
+
+    async getNotificationsPage(cursor = null, limit = 20) {
+        return authFetch(`/notifications${buildQuery({ cursor, limit })}`)
     },
 
     async getUnreadCount() {
@@ -200,6 +270,12 @@ export const notificationsApi = {
             method: 'POST',
         })
     },
+
+    async getStreamTicket() {
+        return authFetch('/notifications/stream-ticket', {
+            method: 'POST',
+        })
+    },
 }
 
 // ============================================
@@ -0,0 +1,102 @@
+import { notificationsApi } from './api'
+import { broadcastNotificationUpdate } from './notification-sync'
+
+/**
+ * Single shared server-sent events connection for pushed notifications.
+ *
+ * Every pushed notification (and every reconnect, in case something was
+ * missed while disconnected) is re-broadcast as the existing
+ * `notifications-updated` window event, so components refresh from the
+ * REST endpoints only when something actually changed. While the stream is
+ * down (or EventSource is unavailable) that event is fired on a timer
+ * instead, so badges keep updating by polling.
+ */
+
+const RECONNECT_DELAY = 5000
+const POLL_INTERVAL = 30000
+
+let source = null
+let subscribers = 0
+let reconnectTimer = null
+let pollTimer = null
+
+function startPolling() {
+    if (!pollTimer) pollTimer = setInterval(broadcastNotificationUpdate, POLL_INTERVAL)
+}
+
+function stopPolling() {
+    clearInterval(pollTimer)
+    pollTimer = null
+}
+
+function scheduleReconnect(delay) {
+    clearTimeout(reconnectTimer)
+    reconnectTimer = setTimeout(connect, delay)
+}
+
+async function connect() {
+    if (subscribers === 0) return
+    if (typeof EventSource === 'undefined') {
+        startPolling()
+        return
+    }
+
+    // EventSource can't send headers, so the stream is opened with a
+    // short-lived single-use ticket instead of the access token
+    let ticket
+    try {
+        ({ ticket } = await notificationsApi.getStreamTicket())
+    } catch {
+        startPolling()
+        scheduleReconnect(RECONNECT_DELAY)
+        return
+    }
+    if (subscribers === 0) return
+
+    source = new EventSource(`/api/notifications/stream?ticket=${encodeURIComponent(ticket)}`)
+
+    source.addEventListener('ready', () => {
+        stopPolling()
+        broadcastNotificationUpdate()
+    })
+    source.addEventListener('notification', (e) => {
+        window.dispatchEvent(
+            new CustomEvent('notification-received', { detail: JSON.parse(e.data) })
+        )
+        broadcastNotificationUpdate()
+    })
+    // The access token behind the ticket ran out; reconnect with a fresh one
+    source.addEventListener('expired', () => {
+        closeSource()
+        scheduleReconnect(0)
+    })
+    source.onerror = () => {
+        closeSource()
+        startPolling()
+        scheduleReconnect(RECONNECT_DELAY)
+    }
+}
+
+function closeSource() {
+    if (source) {
+        source.close()
+        source = null
+    }
+}
+
+function disconnect() {
+    closeSource()
+    stopPolling()
+    clearTimeout(reconnectTimer)
+}
+
+/** Open the shared stream (if needed). Returns an unsubscribe function. */
+export function subscribeToNotifications() {
+    subscribers += 1
+    if (subscribers === 1) connect()
+
+    return () => {
+        subscribers -= 1
+        if (subscribers === 0) disconnect()
+    }
+}
@@ -39,10 +39,11 @@ export function SkillProvider({ children }) {
 
   const syncChallenges = useCallback(async () => {
     try {
-      const data = await challengeApi.getMyChallenges("active")
+      // Active challenges are few (they end at their deadline), so one page covers them
+      const { items } = await challengeApi.getMyChallengesPage("active", null, 100)
       const newChallengeSkills = {}
 
-      for (const item of data) {
+      for (const item of items) {
         const { challenge, my_progress } = item
         if (!my_progress) continue
 
@@ -0,0 +1,56 @@
+import { useState, useEffect, useCallback, useRef } from 'react'
+
+/**
+ * Cursor-paged list: loads the first page, then further pages on demand
+ * (`loadMore`), so a long history is never downloaded in one go.
+ *
+ * `fetchPage(cursor)` must resolve to `{ items, next_cursor }`. The list
+ * reloads from the first page whenever `deps` change.
+ */
+export function usePagedList(fetchPage, deps = []) {
+    const [items, setItems] = useState([])
+    const [cursor, setCursor] = useState(null)
+    const [loading, setLoading] = useState(true)
+    const [loadingMore, setLoadingMore] = useState(false)
+    // Bumped on every reload so responses for an older list are ignored
+    const generation = useRef(0)
+
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+    const load = useCallback(fetchPage, deps)
+
+    const reload = useCallback(async () => {
+        const current = ++generation.current
+        setLoading(true)
+        try {
+            const page = await load(null)
+            if (current !== generation.current) return
+            setItems(page.items)
+            setCursor(page.next_cursor)
+        } catch (err) {
+            console.error('Failed to load list:', err)
+        }
+        if (current === generation.current) setLoading(false)
+    }, [load])
+
+    useEffect(() => {
+        reload()
+    }, [reload])
+
+    const loadMore = async () => {
+        if (!cursor || loadingMore) return
+        const current = generation.current
+        setLoadingMore(true)
+        try {
+            const page = await load(cursor)
+            if (current === generation.current) {
+                setItems(prev => [...prev, ...page.items])
+                setCursor(page.next_cursor)
+            }
+        } catch (err) {
+            console.error('Failed to load more:', err)
+        }
+        setLoadingMore(false)
+    }
+
+    return { items, setItems, loading, loadingMore, hasMore: !!cursor, loadMore, reload }
+}
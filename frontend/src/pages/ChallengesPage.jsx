@@ -1,32 +1,28 @@
-import { useState, useEffect } from 'react'
+import { useState } from 'react'
 import { Link } from 'react-router-dom'
 import { Plus, Swords, Clock, Trophy, ChevronRight, Check, X, Ban } from 'lucide-react'
 import { challengeApi } from '../lib/api'
 import { useAuth } from '../lib/auth-context'
 import NotificationBell from '../components/NotificationBell'
+import LoadMoreButton from '../components/LoadMoreButton'
 import { markChallengeNotificationRead } from '../lib/notification-sync'
+import { usePagedList } from '../lib/use-paged-list'
 
 export default function ChallengesPage() {
-    const [challenges, setChallenges] = useState([])
-    const [loading, setLoading] = useState(true)
     const [filter, setFilter] = useState('all') // all, pending, active, completed
     const [actionLoading, setActionLoading] = useState(null)
     const { user } = useAuth()
-
-    useEffect(() => {
-        loadChallenges()
-    }, [filter])
-
-    const loadChallenges = async () => {
-        setLoading(true)
-        try {
-            const data = await challengeApi.getMyChallenges(filter === 'all' ? null : filter)
-            setChallenges(data)
-        } catch (err) {
-            console.error('Failed to load challenges:', err)
-        }
-        setLoading(false)
-    }
+    const {
+        items: challenges,
+        loading,
+        loadingMore,
+        hasMore,
+        loadMore,
+        reload: loadChallenges,
+    } = usePagedList(
+        cursor => challengeApi.getMyChallengesPage(filter === 'all' ? null : filter, cursor),
+        [filter]
+    )
 
     const handleAccept = async (e, challengeId) => {
         e.preventDefault()
@@ -312,6 +308,7 @@ export default function ChallengesPage() {
                                 </div>
                             )
                         })}
+                        {hasMore && <LoadMoreButton onClick={loadMore} loading={loadingMore} />}
                     </div>
                 )}
             </div>
@@ -6,25 +6,30 @@ import {
 } from 'lucide-react'
 import { profileApi, friendsApi, challengeLinksApi } from '../lib/api'
 import NotificationBell from '../components/NotificationBell'
+import LoadMoreButton from '../components/LoadMoreButton'
 import { markFriendNotificationRead } from '../lib/notification-sync'
+import { usePagedList } from '../lib/use-paged-list'
 
 export default function FriendsPage() {
     const [searchParams, setSearchParams] = useSearchParams()
     const initialTab = searchParams.get('tab') || 'friends'
     const [tab, setTab] = useState(initialTab)
-    const [friends, setFriends] = useState([])
-    const [requests, setRequests] = useState([])
+    const friendsList = usePagedList(cursor => friendsApi.getMyFriendsPage(cursor))
+    const requestsList = usePagedList(cursor => friendsApi.getFriendRequestsPage(cursor))
+    const friends = friendsList.items
+    const requests = requestsList.items
+    const loading = friendsList.loading || requestsList.loading
+    const [counts, setCounts] = useState({ friends: 0, friend_requests: 0 })
     const [searchQuery, setSearchQuery] = useState('')
     const [searchResults, setSearchResults] = useState([])
     const [searching, setSearching] = useState(false)
-    const [loading, setLoading] = useState(true)
     const [actionLoading, setActionLoading] = useState(null)
     const [showInviteModal, setShowInviteModal] = useState(false)
     const [inviteCopied, setInviteCopied] = useState(false)
     const navigate = useNavigate()
 
     useEffect(() => {
-        loadData()
+        loadCounts()
     }, [])
 
     useEffect(() => {
@@ -34,19 +39,13 @@ export default function FriendsPage() {
         }
     }, [searchParams])
 
-    const loadData = async () => {
-        setLoading(true)
+    // Tab badges come from counts, since the lists are only loaded a page at a time
+    const loadCounts = async () => {
         try {
-            const [friendsData, requestsData] = await Promise.all([
-                friendsApi.getMyFriends(),
-                friendsApi.getFriendRequests(),
-            ])
-            setFriends(friendsData)
-            setRequests(requestsData)
+            setCounts(await profileApi.getMySummary())
         } catch (err) {
-            console.error('Failed to load friends data:', err)
+            console.error('Failed to load friend counts:', err)
         }
-        setLoading(false)
     }
 
     const handleSearch = async (value) => {
@@ -82,9 +81,9 @@ export default function FriendsPage() {
         setActionLoading(request.friendship_id)
         try {
             await friendsApi.respondToRequest(request.friendship_id, true)
-            setRequests(prev => prev.filter(r => r.friendship_id !== request.friendship_id))
-            const updatedFriends = await friendsApi.getMyFriends()
-            setFriends(updatedFriends)
+            requestsList.setItems(prev => prev.filter(r => r.friendship_id !== request.friendship_id))
+            friendsList.reload()
+            loadCounts()
             // Mark the friend request notification as read and update bell badge
             markFriendNotificationRead(request.id)
         } catch (err) {
@@ -97,7 +96,8 @@ export default function FriendsPage() {
         setActionLoading(request.friendship_id + '-decline')
         try {
             await friendsApi.respondToRequest(request.friendship_id, false)
-            setRequests(prev => prev.filter(r => r.friendship_id !== request.friendship_id))
+            requestsList.setItems(prev => prev.filter(r => r.friendship_id !== request.friendship_id))
+            loadCounts()
             // Mark the friend request notification as read and update bell badge
             markFriendNotificationRead(request.id)
         } catch (err) {
@@ -111,7 +111,8 @@ export default function FriendsPage() {
         setActionLoading(friend.friendship_id)
         try {
             await friendsApi.removeFriend(friend.friendship_id)
-            setFriends(prev => prev.filter(f => f.friendship_id !== friend.friendship_id))
+            friendsList.setItems(prev => prev.filter(f => f.friendship_id !== friend.friendship_id))
+            loadCounts()
         } catch (err) {
             console.error('Failed to remove friend:', err)
         }
@@ -141,8 +142,8 @@ export default function FriendsPage() {
     }
 
     const tabs = [
-        { id: 'friends', label: 'Friends', count: friends.length },
-        { id: 'requests', label: 'Requests', count: requests.length },
+        { id: 'friends', label: 'Friends', count: counts.friends },
+        { id: 'requests', label: 'Requests', count: counts.friend_requests },
         { id: 'search', label: 'Find People' },
     ]
 
@@ -258,6 +259,9 @@ export default function FriendsPage() {
                                                 </div>
                                             </div>
                                         ))}
+                                        {friendsList.hasMore && (
+                                            <LoadMoreButton onClick={friendsList.loadMore} loading={friendsList.loadingMore} />
+                                        )}
                                     </div>
                                 )}
                             </div>
@@ -313,6 +317,9 @@ export default function FriendsPage() {
                                                 </div>
                                             </div>
                                         ))}
+                                        {requestsList.hasMore && (
+                                            <LoadMoreButton onClick={requestsList.loadMore} loading={requestsList.loadingMore} />
+                                        )}
                                     </div>
                                 )}
                             </div>
@@ -12,7 +12,7 @@ export default function ProfilePage() {
     const [stats, setStats] = useState({ wins: 0, losses: 0, active: 0, completed: 0 })
     const [recentChallenges, setRecentChallenges] = useState([])
     const [friends, setFriends] = useState([])
-    const [checkinsData, setCheckinsData] = useState([])
+    const [friendCount, setFriendCount] = useState(0)
     const [editing, setEditing] = useState(false)
     const [editForm, setEditForm] = useState({ display_name: '', bio: '' })
     const [loading, setLoading] = useState(true)
@@ -27,10 +27,13 @@ export default function ProfilePage() {
 
     const loadProfile = async () => {
         try {
-            const [profileData, challengeData, friendsData] = await Promise.all([
+            // Totals come from the profile and summary counts; only the few
+            // friends and challenges shown are fetched
+            const [profileData, summary, friendsPage, challengesPage] = await Promise.all([
                 profileApi.getMyProfile(),
-                challengeApi.getMyChallenges(),
-                friendsApi.getMyFriends()
+                profileApi.getMySummary(),
+                friendsApi.getMyFriendsPage(null, 6),
+                challengeApi.getMyChallengesPage(null, null, 5),
             ])
 
             setProfile(profileData)
@@ -39,35 +42,17 @@ export default function ProfilePage() {
                 bio: profileData?.bio || '',
             })
 
-            setFriends(friendsData)
-
-            const active = challengeData.filter(c => c.challenge.status === 'active')
-            const completed = challengeData.filter(c => c.challenge.status === 'completed')
-            const wins = completed.filter(c => c.challenge.winner_id === profileData?.id)
-            const losses = completed.filter(c => c.challenge.winner_id && c.challenge.winner_id !== profileData?.id)
+            setFriends(friendsPage.items)
+            setFriendCount(summary.friends)
 
             setStats({
-                wins: wins.length,
-                losses: losses.length,
-                active: active.length,
-                completed: completed.length,
+                wins: profileData?.total_wins || 0,
+                losses: profileData?.total_losses || 0,
+                active: summary.active_challenges,
+                completed: (profileData?.total_wins || 0) + (profileData?.total_losses || 0) + (profileData?.total_draws || 0),
             })
 
-            setRecentChallenges(challengeData.slice(0, 5))
-
-            // Build checkins data from ALL daily_log entries (not just last_checkin)
-            const checkins = []
-            challengeData.forEach(c => {
-                if (c.my_progress?.daily_log) {
-                    c.my_progress.daily_log.forEach(entry => {
-                        checkins.push({
-                            date: entry.date,
-                            skill_name: c.my_progress.skill_name,
-                        })
-                    })
-                }
-            })
-            setCheckinsData(checkins)
+            setRecentChallenges(challengesPage.items)
 
             // Sync challenge skills to context
             syncChallenges()
@@ -196,14 +181,14 @@ export default function ProfilePage() {
                         <div className="flex items-center gap-2">
                             <Users className="w-4 h-4 text-stone-400" />
                             <span className="text-sm text-stone-600">
-                                <span className="font-semibold text-stone-900">{friends.length}</span> friends
+                                <span className="font-semibold text-stone-900">{friendCount}</span> friends
                             </span>
                         </div>
                     </div>
                 </div>
 
                 {/* Contribution Graph */}
-                <ContributionGraph activeSkills={allSkillNames} checkinsData={checkinsData} />
+                <ContributionGraph username={profile?.username} activeSkills={allSkillNames} />
 
                 {/* Friends Quick Card */}
                 <div
@@ -218,7 +203,7 @@ export default function ProfilePage() {
                             <div>
                                 <h3 className="font-medium text-stone-900">Friends</h3>
                                 <p className="text-sm text-stone-500">
-                                    {friends.length === 0 ? 'Find people to learn with' : `${friends.length} friend${friends.length !== 1 ? 's' : ''}`}
+                                    {friendCount === 0 ? 'Find people to learn with' : `${friendCount} friend${friendCount !== 1 ? 's' : ''}`}
                                 </p>
                             </div>
                         </div>
@@ -235,9 +220,9 @@ export default function ProfilePage() {
                                     {friend.username[0].toUpperCase()}
                                 </div>
                             ))}
-                            {friends.length > 6 && (
+                            {friendCount > 6 && (
                                 <div className="w-8 h-8 bg-stone-200 rounded-full flex items-center justify-center text-xs font-medium text-stone-600 ring-2 ring-white">
-                                    +{friends.length - 6}
+                                    +{friendCount - 6}
                                 </div>
                             )}
                         </div>
@@ -49,9 +49,10 @@ export default function SetupPage() {
 
   const loadPendingChallenge = async () => {
     try {
-      const data = await challengeApi.getMyChallenges("pending")
+      // Pending challenges expire after a few days, so the newest page is enough
+      const { items } = await challengeApi.getMyChallengesPage("pending", null, 100)
       // Filter to only incoming challenges (where I'm the opponent)
-      const incoming = data.filter(item => item.challenge.opponent_id === user.id)
+      const incoming = items.filter(item => item.challenge.opponent_id === user.id)
       if (incoming.length > 0) {
         setPendingChallenge(incoming[0]) // most recent
       }
@@ -1,6 +1,7 @@
 import { useEffect, useState } from "react"
 import { useNavigate } from "react-router-dom"
 import { useSkill } from "@/lib/skill-context.jsx"
+import { learningPlanApi } from "@/lib/api.js"
 import { Compass, Layers, ListChecks } from "lucide-react"
 
 const steps = [
@@ -55,6 +56,8 @@ export default function LoadingPage() {
   const { activeSkill, setPlanForSkill } = useSkill()
   const [currentStep, setCurrentStep] = useState(0)
   const [completed, setCompleted] = useState([false, false, false])
+  const [milestones, setMilestones] = useState([])
+  const [days, setDays] = useState([])
   const [error, setError] = useState("")
 
   useEffect(() => {
@@ -63,38 +66,28 @@ export default function LoadingPage() {
       return
     }
 
-    const stepDurations = [1200, 1400, 1000]
-    let totalDelay = 0
+    let cancelled = false
 
-    stepDurations.forEach((duration, index) => {
-      totalDelay += duration
-      setTimeout(() => {
-        setCompleted((prev) => {
-          const next = [...prev]
-          next[index] = true
-          return next
-        })
-        if (index < steps.length - 1) {
-          setCurrentStep(index + 1)
-        }
-      }, totalDelay)
-    })
-
-    const minEndTime = Date.now() + totalDelay + 600
+    // Mark every step before `step` as done and make `step` the active one
+    const reachStep = (step) => {
+      setCompleted((prev) => prev.map((done, index) => done || index < step))
+      setCurrentStep((prev) => Math.max(prev, step))
+    }
 
     const run = async () => {
       try {
-        const res = await fetch("/api/learning-plan", {
-          method: "POST",
-          headers: { "Content-Type": "application/json" },
-          body: JSON.stringify({ skill_name: activeSkill }),
+        const rawPlan = await learningPlanApi.streamPlan(activeSkill, (event, data) => {
+          if (cancelled) return
+          if (event === "milestone") {
+            reachStep(1)
+            setMilestones((prev) => [...prev, data])
+          } else if (event === "day") {
+            reachStep(2)
+            setDays((prev) => [...prev, data])
+          }
         })
+        if (cancelled) return
 
-        if (!res.ok) {
-          throw new Error(`Failed to generate plan (${res.status})`)
-        }
-
-        const rawPlan = await res.json()
         const plan = {
           ...rawPlan,
           skillName: activeSkill,
@@ -110,18 +103,20 @@ export default function LoadingPage() {
           })),
         }
 
+        setCompleted([true, true, true])
         setPlanForSkill(activeSkill, plan)
-        const remaining = minEndTime - Date.now()
-        if (remaining > 0) {
-          await new Promise((resolve) => setTimeout(resolve, remaining))
-        }
         navigate("/plan/today")
       } catch (err) {
-        setError(err instanceof Error ? err.message : "Failed to generate plan")
+        if (!cancelled) {
+          setError(err instanceof Error ? err.message : "Failed to generate plan")
+        }
       }
     }
 
     run()
+    return () => {
+      cancelled = true
+    }
   }, [activeSkill, navigate, setPlanForSkill])
 
   return (
@@ -188,6 +183,35 @@ export default function LoadingPage() {
           })}
         </div>
 
+        {milestones.length > 0 && (
+          <div className="mt-10 text-left space-y-2 animate-in fade-in duration-500">
+            {milestones.map((milestone) => (
+              <div key={milestone.week} className="flex gap-3 text-sm">
+                <span className="text-muted-foreground shrink-0">Week {milestone.week}</span>
+                <span className="text-foreground">{milestone.goal}</span>
+              </div>
+            ))}
+          </div>
+        )}
+
+        {days.length > 0 && (
+          <div className="mt-6 text-left animate-in fade-in duration-500">
+            <div className="flex justify-between text-sm text-muted-foreground mb-2">
+              <span>Day {days[days.length - 1].day}</span>
+              <span>{days.length} / 30 days</span>
+            </div>
+            <div className="h-1.5 rounded-full bg-muted overflow-hidden">
+              <div
+                className="h-full bg-primary transition-all duration-300"
+                style={{ width: `${(days.length / 30) * 100}%` }}
+              />
+            </div>
+            <p className="mt-3 text-sm text-foreground truncate">
+              {days[days.length - 1].tasks[0]?.title}
+            </p>
+          </div>
+        )}
+
         <div className="mt-12 flex justify-center">
           <div className="flex gap-1">
             {[0, 1, 2].map((i) => (